@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Admission Control
+
+Caps how many expensive requests run at once so they cannot take over every
+worker thread. Each guarded endpoint has its own concurrency limit and a
+bounded wait queue, and all of them share one capacity. When a slot frees,
+the highest-priority waiter gets it, so workout generation goes ahead of
+batch work and feedback/retraining. A request that finds its queue full,
+or waits past its timeout, is rejected at once with 503 and Retry-After
+instead of adding to the tail latency of everyone else.
+"""
+
+from contextlib import contextmanager
+from typing import Dict, Optional
+import itertools
+import logging
+import os
+import threading
+import time
+
+from flask import g, jsonify, request
+
+logger = logging.getLogger(__name__)
+
+# Higher priorities are admitted first
+PRIORITY_GENERATION = 2
+PRIORITY_BULK = 1
+PRIORITY_RETRAINING = 0
+
+# Guarded requests running at once, across all guarded endpoints
+DEFAULT_CAPACITY = int(os.environ.get('ADMISSION_CAPACITY', 8))
+
+DEFAULT_QUEUE_TIMEOUT = 2.0
+
+
+class Overloaded(Exception):
+    """Raised when a request cannot be admitted."""
+
+    def __init__(self, name: str, retry_after: int):
+        super().__init__(f"{name} is over capacity")
+        self.retry_after = retry_after
+
+
+class RoutePolicy:
+    """Admission settings for one endpoint or background task."""
+
+    def __init__(self, limit: int, queue: int = 0, priority: int = PRIORITY_GENERATION,
+                 timeout: Optional[float] = DEFAULT_QUEUE_TIMEOUT, retry_after: int = 1):
+        """
+        Args:
+            limit (int): Requests of this kind running at once
+            queue (int): Requests allowed to wait for a slot
+            priority (int): Higher values are admitted first
+            timeout (float): Longest wait for a slot in seconds (None waits forever)
+            retry_after (int): Retry-After value sent with a rejection
+        """
+        self.limit = limit
+        self.queue = queue
+        self.priority = priority
+        self.timeout = timeout
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Shared-capacity, per-route concurrency limiter with a priority queue."""
+
+    def __init__(self, policies: Dict[str, RoutePolicy], capacity: int = DEFAULT_CAPACITY):
+        self.policies = policies
+        self.capacity = capacity
+        self._cond = threading.Condition()
+        self._running: Dict[str, int] = {}
+        self._waiting: Dict[str, int] = {}
+        self._waiters = []  # (-priority, sequence, name)
+        self._sequence = itertools.count()
+        self.stats = {'admitted': 0, 'queued': 0, 'rejected': 0}
+
+    def guards(self, name: str) -> bool:
+        return name in self.policies
+
+    def _can_run(self, name: str) -> bool:
+        return (sum(self._running.values()) < self.capacity and
+                self._running.get(name, 0) < self.policies[name].limit)
+
+    def _next_waiter(self):
+        """Highest-priority (then oldest) waiter that could run now, if any."""
+        return min((entry for entry in self._waiters if self._can_run(entry[2])), default=None)
+
+    def acquire(self, name: str):
+        """
+        Take a slot for `name`, waiting in priority order if necessary.
+
+        Raises:
+            Overloaded: If the queue for `name` is full or the wait times out
+        """
+        policy = self.policies[name]
+        with self._cond:
+            if self._can_run(name) and self._next_waiter() is None:
+                self._admit(name)
+                return
+            if self._waiting.get(name, 0) >= policy.queue:
+                self.stats['rejected'] += 1
+                raise Overloaded(name, policy.retry_after)
+
+            entry = (-policy.priority, next(self._sequence), name)
+            self._waiters.append(entry)
+            self._waiting[name] = self._waiting.get(name, 0) + 1
+            self.stats['queued'] += 1
+            deadline = None if policy.timeout is None else time.monotonic() + policy.timeout
+            try:
+                while self._next_waiter() != entry:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        self.stats['rejected'] += 1
+                        raise Overloaded(name, policy.retry_after)
+                    self._cond.wait(remaining)
+            finally:
+                self._waiters.remove(entry)
+                self._waiting[name] -= 1
+            self._admit(name)
+            # Another waiter may be admissible too
+            self._cond.notify_all()
+
+    def _admit(self, name: str):
+        self._running[name] = self._running.get(name, 0) + 1
+        self.stats['admitted'] += 1
+
+    def release(self, name: str):
+        with self._cond:
+            self._running[name] -= 1
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, name: str):
+        """Hold a slot for the duration of a block, e.g. a retraining batch."""
+        self.acquire(name)
+        try:
+            yield
+        finally:
+            self.release(name)
+
+    def snapshot(self) -> Dict:
+        with self._cond:
+            return dict(self.stats, running=dict(self._running), waiting=dict(self._waiting),
+                        capacity=self.capacity)
+
+
+def install_admission_control(app, policies: Dict[str, RoutePolicy],
+                              capacity: int = DEFAULT_CAPACITY) -> AdmissionController:
+    """
+    Guard a Flask app's expensive endpoints.
+
+    Args:
+        app: Flask application
+        policies (Dict[str, RoutePolicy]): Endpoint (view function) name -> policy;
+            background tasks may use further names through `slot()`
+        capacity (int): Guarded requests running at once
+
+    Returns:
+        AdmissionController: The app's controller
+    """
+    controller = AdmissionController(policies, capacity)
+
+    @app.before_request
+    def _admit_request():
+        if not controller.guards(request.endpoint):
+            return None
+        try:
+            controller.acquire(request.endpoint)
+        except Overloaded as e:
+            logger.warning(f"Rejected {request.endpoint}: over capacity")
+            response = jsonify({'success': False, 'error': 'Server is busy, please retry shortly'})
+            response.status_code = 503
+            response.headers['Retry-After'] = str(e.retry_after)
+            return response
+        g.admission_slot = request.endpoint
+        return None
+
+    @app.teardown_request
+    def _release_request(error):
+        # Runs after a streamed response has finished
+        name = g.pop('admission_slot', None)
+        if name:
+            controller.release(name)
+
+    return controller
@@ -6,10 +6,24 @@ A Flask web application that provides an AI-powered workout planning interface
 with machine learning capabilities for personalized recommendations.
 """
 
-from flask import Flask, render_template, request, jsonify, redirect, url_for, session
+from flask import Flask, render_template, request, jsonify, redirect, url_for, session, Response, stream_with_context
 from ai_workout_planner import AIWorkoutPlanner
+from admission import PRIORITY_BULK, PRIORITY_GENERATION, PRIORITY_RETRAINING, RoutePolicy, install_admission_control
+from api_encoding import api_response
+from batch_generation import generate_workouts, iter_workouts, validate_batch
+from feedback_queue import DEFAULT_QUEUE_PATH, RETRAINING_SLOT, FeedbackQueue
+from history_store import DEFAULT_PAGE_SIZE, parse_history_filters
+from metrics import install_metrics
+from profiling import install_profiling
+from static_assets import configure_static_assets
+from streaming import requested_stream_format, stream_response
+from template_cache import configure_template_caching
+from warmup import Warmup
+from workout_store import DEFAULT_STORE_PATH, WorkoutStore
 import json
 import os
+import time
+import uuid
 from datetime import datetime
 import logging
 
@@ -19,15 +33,58 @@ logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 app.secret_key = 'ai_workout_planner_secret_key_2024'
+configure_template_caching(app)
+configure_static_assets(app)
+install_metrics(app)
+
+# Concurrency limits for expensive endpoints: generation is admitted ahead of
+# batches, and both ahead of feedback and the retraining it triggers
+admission = install_admission_control(app, {
+    'generate_workout': RoutePolicy(limit=8, queue=16, priority=PRIORITY_GENERATION),
+    'api_generate_workout': RoutePolicy(limit=8, queue=16, priority=PRIORITY_GENERATION),
+    'api_generate_workouts_batch': RoutePolicy(limit=2, queue=2, priority=PRIORITY_BULK, retry_after=5),
+    'submit_feedback': RoutePolicy(limit=4, queue=8, priority=PRIORITY_RETRAINING),
+    'api_submit_feedback': RoutePolicy(limit=4, queue=8, priority=PRIORITY_RETRAINING),
+    RETRAINING_SLOT: RoutePolicy(limit=1, queue=1, priority=PRIORITY_RETRAINING, timeout=None)
+})
 
 # Initialize AI planner
+load_started = time.perf_counter()
 planner = AIWorkoutPlanner()
 
+# Opt-in profiling of generation and feedback (PROFILE_TOKEN / PROFILE_SAMPLE_RATE)
+profiler = install_profiling(app, planner)
+
+# Feedback is applied to the planner in the background, in micro-batches
+feedback_queue = FeedbackQueue(planner, os.environ.get('FEEDBACK_QUEUE_PATH', DEFAULT_QUEUE_PATH),
+                               admission=admission)
+
+# Generated workouts are stored server-side, keyed by workout ID
+workout_store = WorkoutStore(os.environ.get('WORKOUT_STORE_PATH', DEFAULT_STORE_PATH))
+
+# Build candidate pools, run representative predictions and render the key
+# templates before traffic arrives; /ready succeeds once this has finished
+warmup = Warmup(app, planner, pages={
+    'ai_index.html': lambda workout: {},
+    'ai_workout_result.html': lambda workout: {'workout': workout}
+})
+warmup.record('models', time.perf_counter() - load_started)
+warmup.start()
+
+def session_user_id():
+    """ID of the browser's user, so their recent exercises follow them."""
+    return session.setdefault('user_id', uuid.uuid4().hex)
+
 @app.route('/')
 def index():
     """Main page with workout generation form."""
     return render_template('ai_index.html')
 
+@app.route('/ready')
+def readiness_check():
+    """Readiness probe: succeeds only once the startup warm-up has completed."""
+    return jsonify(warmup.status()), (200 if warmup.ready else 503)
+
 @app.route('/generate_workout', methods=['POST'])
 def generate_workout():
     """Generate AI-powered workout."""
@@ -45,13 +102,14 @@ def generate_workout():
         planner.set_user_preferences(preferences)
         
         # Generate AI workout
-        workout = planner.generate_workout()
+        workout = planner.generate_workout(user_id=session_user_id())
         
         # Save workout
         planner.save_workout(workout)
         
-        # Store in session for feedback
-        session['current_workout'] = workout
+        # Keep the workout server-side; the session only carries its ID
+        workout_store.put(workout)
+        session['current_workout_id'] = workout['id']
         
         return render_template('ai_workout_result.html', workout=workout)
         
@@ -59,11 +117,19 @@ def generate_workout():
         logger.error(f"Error generating workout: {e}")
         return render_template('ai_error.html', error=str(e))
 
+@app.route('/workout/<workout_id>')
+def view_workout(workout_id):
+    """Display a previously generated workout."""
+    workout = workout_store.get(workout_id)
+    if workout is None:
+        return render_template('ai_error.html', error=f"Workout {workout_id} not found"), 404
+    return render_template('ai_workout_result.html', workout=workout)
+
 @app.route('/feedback', methods=['POST'])
 def submit_feedback():
     """Submit workout feedback for AI learning."""
     try:
-        workout_id = request.form.get('workout_id')
+        workout_id = request.form.get('workout_id') or session.get('current_workout_id')
         
         # Get feedback data
         feedback = {
@@ -80,8 +146,8 @@ def submit_feedback():
                 exercise_name = key.replace('exercise_rating_', '')
                 feedback['exercise_ratings'][exercise_name] = int(value)
         
-        # Record feedback for AI learning
-        planner.record_workout_feedback(workout_id, feedback)
+        # Queue feedback for AI learning; resubmitting the form is a no-op
+        feedback_queue.submit(workout_id, feedback, request.form.get('idempotency_key'))
         
         return render_template('ai_feedback_success.html', feedback=feedback)
         
@@ -102,15 +168,41 @@ def user_insights():
 
 @app.route('/history')
 def workout_history():
-    """Display workout history."""
+    """Display one page of workout history, newest first."""
     try:
-        history = planner.user_history
-        return render_template('ai_history.html', history=history)
+        filters = parse_history_filters(request.args)
+        history, next_cursor = planner.user_history.page(
+            cursor=request.args.get('cursor'),
+            limit=request.args.get('limit', DEFAULT_PAGE_SIZE, type=int),
+            **filters
+        )
+        
+        older_url = None
+        if next_cursor:
+            query = {k: v for k, v in request.args.items() if k != 'cursor'}
+            older_url = url_for('workout_history', cursor=next_cursor, **query)
+        
+        return render_template('ai_history.html', history=history,
+                               stats=planner.user_history.summary(), older_url=older_url)
         
     except Exception as e:
         logger.error(f"Error getting history: {e}")
         return render_template('ai_error.html', error=str(e))
 
+@app.route('/api/history')
+def api_get_history():
+    """API endpoint streaming workout history as NDJSON, newest first."""
+    try:
+        filters = parse_history_filters(request.args)
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    
+    return Response(stream_with_context(planner.user_history.iter_ndjson(**filters)),
+                    mimetype='application/x-ndjson')
+
 @app.route('/api/workout', methods=['POST'])
 def api_generate_workout():
     """API endpoint for generating workouts."""
@@ -119,9 +211,10 @@ def api_generate_workout():
         preferences = data.get('preferences', {})
         
         planner.set_user_preferences(preferences)
-        workout = planner.generate_workout()
+        workout = planner.generate_workout(user_id=data.get('user_id'))
+        workout_store.put(workout)
         
-        return jsonify({
+        return api_response({
             'success': True,
             'workout': workout
         })
@@ -132,6 +225,45 @@ def api_generate_workout():
             'error': str(e)
         }), 400
 
+@app.route('/api/workout/<workout_id>')
+def api_get_workout(workout_id):
+    """API endpoint for fetching a previously generated workout."""
+    workout = workout_store.get(workout_id)
+    if workout is None:
+        return jsonify({
+            'success': False,
+            'error': f"Workout {workout_id} not found"
+        }), 404
+    
+    return api_response({
+        'success': True,
+        'workout': workout
+    })
+
+@app.route('/api/workouts/batch', methods=['POST'])
+def api_generate_workouts_batch():
+    """API endpoint for generating several workouts in one request."""
+    try:
+        data = request.get_json() or {}
+        preference_sets = validate_batch(data.get('preferences'))
+        stream_format = requested_stream_format(request, data)
+        
+        if stream_format:
+            # One workout (with its progress prediction) per line/event, in completion order
+            results = iter_workouts(planner, preference_sets, with_progress=True)
+            return stream_response(results, stream_format, event='workout', done={'count': len(preference_sets)})
+        
+        return api_response({
+            'success': True,
+            'results': generate_workouts(planner, preference_sets, with_progress=True)
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
 @app.route('/api/feedback', methods=['POST'])
 def api_submit_feedback():
     """API endpoint for submitting feedback."""
@@ -139,13 +271,15 @@ def api_submit_feedback():
         data = request.get_json()
         workout_id = data.get('workout_id')
         feedback = data.get('feedback', {})
+        idempotency_key = request.headers.get('Idempotency-Key') or data.get('idempotency_key')
         
-        planner.record_workout_feedback(workout_id, feedback)
+        queued, idempotency_key = feedback_queue.submit(workout_id, feedback, idempotency_key)
         
         return jsonify({
             'success': True,
-            'message': 'Feedback recorded successfully'
-        })
+            'status': 'queued' if queued else 'duplicate',
+            'idempotency_key': idempotency_key
+        }), 202
         
     except Exception as e:
         return jsonify({
@@ -153,6 +287,14 @@ def api_submit_feedback():
             'error': str(e)
         }), 400
 
+@app.route('/api/feedback/queue')
+def api_feedback_queue():
+    """API endpoint reporting feedback queue depth and processing lag."""
+    return jsonify({
+        'success': True,
+        'queue': feedback_queue.stats()
+    })
+
 @app.route('/api/insights')
 def api_get_insights():
     """API endpoint for getting user insights."""
@@ -170,6 +312,28 @@ def api_get_insights():
             'error': str(e)
         }), 400
 
+@app.route('/api/insights/rollups')
+def api_get_rollups():
+    """API endpoint for weekly/monthly training trends."""
+    try:
+        filters = parse_history_filters(request.args)
+        rollups = planner.get_training_rollups(
+            period=request.args.get('period', 'week'),
+            start=filters['start'],
+            end=filters['end']
+        )
+        
+        return jsonify({
+            'success': True,
+            'rollups': rollups
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
 if __name__ == '__main__':
     # Create templates directory if it doesn't exist
     os.makedirs('templates', exist_ok=True)
@@ -6,39 +6,75 @@ A sophisticated workout generator that learns from user feedback and adapts
 workouts based on performance, progress, and preferences.
 """
 
+import heapq
 import json
+import os
 import random
 import numpy as np
 import pickle
+import uuid
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional, Tuple
 import logging
+from sklearn.base import clone
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.preprocessing import StandardScaler
 from sklearn.model_selection import train_test_split
 import pandas as pd
 
+from exercise_stats import ExerciseStats
+from history_store import HistoryStore
+from metrics import timed, timed_stage
+from recent_exercises import DEFAULT_RECENT_PATH, RecentExercises, UserRecentExercises
+from time_budget import ACCESSORY_REST_SECONDS, DEFAULT_SET_SECONDS, MAX_CANDIDATES, fit_section
+from weighted_sampling import weighted_sample
+from workout_storage import default_storage
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Upper bound on cached (section, equipment, experience level) candidate pools
+MAX_CANDIDATE_POOLS = 1024
+
+# Upper bound on memoized difficulty predictions between retrains
+MAX_PREDICTION_CACHE = 10000
+
+# Most recent feedback IDs remembered so that redelivered feedback is skipped
+MAX_APPLIED_FEEDBACK_IDS = 10000
+
+
+def _model_file_mtime(path: str) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
 class AIWorkoutPlanner:
     """AI-powered workout planner with machine learning capabilities."""
     
-    def __init__(self, data_file: str = 'workout_data.json', model_file: str = 'ai_model.pkl'):
+    def __init__(self, data_file: str = 'workout_data.json', model_file: str = 'ai_model.pkl',
+                 data: Optional[Dict] = None, recent_path: str = DEFAULT_RECENT_PATH):
         """
         Initialize the AI workout planner.
         
         Args:
             data_file (str): Path to workout data file
             model_file (str): Path to save/load ML model
+            data (Dict): Already-loaded workout data, e.g. a catalog shared with
+                other planners; data_file is not read when this is given
+            recent_path (str): SQLite file holding each user's recent exercises
         """
-        self.data = self._load_workout_data(data_file)
+        self.data = data if data is not None else self._load_workout_data(data_file)
         self.model_file = model_file
         self.user_preferences = {}
-        self.user_history = []
-        self.exercise_performance = {}
+        self.user_history = HistoryStore()
         self.progress_tracker = {}
+        self._candidate_pools = {}
+        self._difficulty_cache = {}
+        self.applied_feedback_ids = []
+        self.storage = default_storage()
         
         # ML Models
         self.difficulty_model = None
@@ -46,13 +82,15 @@ class AIWorkoutPlanner:
         self.progress_prediction_model = None
         self.scaler = StandardScaler()
         
-        # Load or initialize models
-        self._load_or_initialize_models()
-        
-        # Assign top-level keys for convenience
+        # Assign top-level keys for convenience (must be before model loading)
         self.exercises = self.data.get('exercises', [])
         self.workout_types = self.data.get('workout_types', {})
         self.muscle_groups = self.data.get('muscle_groups', {})
+        self.exercise_performance = ExerciseStats([exercise['name'] for exercise in self.exercises])
+        self.recent_exercises = UserRecentExercises(self.exercise_performance.ids, recent_path)
+        
+        # Load or initialize models
+        self._load_or_initialize_models()
     
     def _load_workout_data(self, data_file: str) -> Dict:
         """Load workout data from JSON file."""
@@ -124,6 +162,7 @@ class AIWorkoutPlanner:
     
     def _load_or_initialize_models(self):
         """Load existing ML models or initialize new ones."""
+        self._model_mtime = _model_file_mtime(self.model_file)
         try:
             with open(self.model_file, 'rb') as f:
                 models = pickle.load(f)
@@ -131,11 +170,26 @@ class AIWorkoutPlanner:
                 self.exercise_recommendation_model = models.get('exercise_recommendation_model')
                 self.progress_prediction_model = models.get('progress_prediction_model')
                 self.scaler = models.get('scaler', StandardScaler())
+                self.applied_feedback_ids = models.get('applied_feedback_ids', [])
                 logger.info("Loaded existing ML models")
         except FileNotFoundError:
             logger.info("No existing models found. Initializing new models.")
             self._initialize_models()
     
+    def refresh_models(self) -> bool:
+        """
+        Reload the models if another process saved newer ones since they
+        were last loaded or saved here.
+        
+        Returns:
+            bool: True if the models were reloaded
+        """
+        if _model_file_mtime(self.model_file) == self._model_mtime:
+            return False
+        self._load_or_initialize_models()
+        self._difficulty_cache.clear()
+        return True
+    
     def _initialize_models(self):
         """Initialize new ML models."""
         self.difficulty_model = RandomForestRegressor(n_estimators=100, random_state=42)
@@ -143,16 +197,25 @@ class AIWorkoutPlanner:
         self.progress_prediction_model = RandomForestRegressor(n_estimators=100, random_state=42)
         self.scaler = StandardScaler()
     
-    def _save_models(self):
-        """Save ML models to file."""
-        models = {
+    def _model_state(self) -> Dict:
+        """Learned state as saved to the model file."""
+        return {
             'difficulty_model': self.difficulty_model,
             'exercise_recommendation_model': self.exercise_recommendation_model,
             'progress_prediction_model': self.progress_prediction_model,
-            'scaler': self.scaler
+            'scaler': self.scaler,
+            'applied_feedback_ids': self.applied_feedback_ids
         }
-        with open(self.model_file, 'wb') as f:
+    
+    def _save_models(self, models: Optional[Dict] = None):
+        """Save ML models (the current ones by default) to file."""
+        models = models if models is not None else self._model_state()
+        # Write then rename, so a failed save never leaves a partial file
+        temp_file = f"{self.model_file}.{os.getpid()}.tmp"
+        with open(temp_file, 'wb') as f:
             pickle.dump(models, f)
+        os.replace(temp_file, self.model_file)
+        self._model_mtime = _model_file_mtime(self.model_file)
         logger.info("Models saved successfully")
     
     def set_user_preferences(self, preferences: Dict):
@@ -173,31 +236,88 @@ class AIWorkoutPlanner:
                 - performance_notes: str
                 - exercise_ratings: Dict[exercise_name, rating]
         """
-        feedback['workout_id'] = workout_id
         feedback['timestamp'] = datetime.now().isoformat()
-        self.user_history.append(feedback)
+        self.record_feedback_batch([(workout_id, feedback)])
+    
+    def record_feedback_batch(self, items: List[Tuple[str, Dict]]):
+        """
+        Record several feedback submissions, retraining the models once.
         
-        # Update exercise performance data
-        for exercise_name, rating in feedback.get('exercise_ratings', {}).items():
-            if exercise_name not in self.exercise_performance:
-                self.exercise_performance[exercise_name] = []
-            self.exercise_performance[exercise_name].append(rating)
+        The batch is applied all or nothing: its rows are appended to the
+        history for training and truncated again if training or saving
+        fails. New models are trained alongside the current ones and the
+        rating statistics are staged, and both are applied only once the
+        models have been saved, so a failure leaves the planner unchanged
+        and the batch can be retried. Submissions whose 'feedback_id' was
+        already applied are skipped, so redelivered feedback is learned once.
         
-        # Retrain models with new data
-        self._retrain_models()
+        Args:
+            items (List[Tuple[str, Dict]]): (workout_id, feedback) pairs in
+                submission order; a feedback 'timestamp' is kept if present
+        """
+        applied_ids = list(self.applied_feedback_ids)
+        applied = set(applied_ids)
+        entries = []
+        for workout_id, feedback in items:
+            feedback_id = feedback.get('feedback_id')
+            if feedback_id is not None and feedback_id in applied:
+                logger.info(f"Skipping feedback already applied: {feedback_id}")
+                continue
+            entry = dict(feedback, workout_id=workout_id)
+            entry.setdefault('timestamp', datetime.now().isoformat())
+            entries.append(entry)
+            if feedback_id is not None:
+                applied.add(feedback_id)
+                applied_ids.append(feedback_id)
+        if not entries:
+            return
         
-        logger.info(f"Workout feedback recorded: {feedback}")
+        # Retrain models with new data and save them, then switch to the new state
+        mark = self.user_history.mark()
+        self.user_history.extend(entries)
+        try:
+            models = self._model_state()
+            models.update(self._retrain_models(self.user_history) or {})
+            models['applied_feedback_ids'] = applied_ids[-MAX_APPLIED_FEEDBACK_IDS:]
+            self._save_models(models)
+        except Exception:
+            self.user_history.rollback(mark)
+            raise
+        for entry in entries:
+            # Update per-exercise rating statistics
+            for exercise_name, rating in entry.get('exercise_ratings', {}).items():
+                self.exercise_performance.update(exercise_name, rating)
+        self.difficulty_model = models['difficulty_model']
+        self.exercise_recommendation_model = models['exercise_recommendation_model']
+        self.progress_prediction_model = models['progress_prediction_model']
+        self.scaler = models['scaler']
+        self.applied_feedback_ids = models['applied_feedback_ids']
+        self._difficulty_cache.clear()
+        
+        logger.info(f"Workout feedback recorded: {len(entries)} submission(s)")
     
-    def _retrain_models(self):
-        """Retrain ML models with updated user data."""
-        if len(self.user_history) < 5:  # Need minimum data to train
-            return
+    @timed_stage('retraining')
+    def _retrain_models(self, history: HistoryStore) -> Optional[Dict]:
+        """
+        Train new ML models on `history`, leaving the current ones untouched.
+        
+        Returns:
+            Dict: The new models and scaler, keyed as in _model_state(), or
+                None if there is not enough data yet
+        """
+        if len(history) < 5:  # Need minimum data to train
+            return None
         
         # Prepare training data
-        X, y_difficulty, y_recommendation, y_progress = self._prepare_training_data()
+        X, y_difficulty, y_recommendation, y_progress = self._prepare_training_data(history)
         
         if len(X) < 10:  # Need more data
-            return
+            return None
+        
+        difficulty_model = clone(self.difficulty_model)
+        recommendation_model = clone(self.exercise_recommendation_model)
+        progress_model = clone(self.progress_prediction_model)
+        scaler = StandardScaler()
         
         # Split data
         X_train, X_test, y_d_train, y_d_test = train_test_split(X, y_difficulty, test_size=0.2, random_state=42)
@@ -205,52 +325,54 @@ class AIWorkoutPlanner:
         _, _, y_p_train, y_p_test = train_test_split(X, y_progress, test_size=0.2, random_state=42)
         
         # Scale features
-        X_train_scaled = self.scaler.fit_transform(X_train)
-        X_test_scaled = self.scaler.transform(X_test)
+        X_train_scaled = scaler.fit_transform(X_train)
+        X_test_scaled = scaler.transform(X_test)
         
         # Train models
-        self.difficulty_model.fit(X_train_scaled, y_d_train)
-        self.exercise_recommendation_model.fit(X_train_scaled, y_r_train)
-        self.progress_prediction_model.fit(X_train_scaled, y_p_train)
+        difficulty_model.fit(X_train_scaled, y_d_train)
+        recommendation_model.fit(X_train_scaled, y_r_train)
+        progress_model.fit(X_train_scaled, y_p_train)
         
         # Evaluate models
-        difficulty_score = self.difficulty_model.score(X_test_scaled, y_d_test)
-        recommendation_score = self.exercise_recommendation_model.score(X_test_scaled, y_r_test)
-        progress_score = self.progress_prediction_model.score(X_test_scaled, y_p_test)
+        difficulty_score = difficulty_model.score(X_test_scaled, y_d_test)
+        recommendation_score = recommendation_model.score(X_test_scaled, y_r_test)
+        progress_score = progress_model.score(X_test_scaled, y_p_test)
         
         logger.info(f"Model retraining completed - Scores: Difficulty={difficulty_score:.3f}, "
                    f"Recommendation={recommendation_score:.3f}, Progress={progress_score:.3f}")
         
-        # Save updated models
-        self._save_models()
+        return {
+            'difficulty_model': difficulty_model,
+            'exercise_recommendation_model': recommendation_model,
+            'progress_prediction_model': progress_model,
+            'scaler': scaler
+        }
     
-    def _prepare_training_data(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
-        """Prepare training data from user history."""
-        features = []
-        difficulty_targets = []
-        recommendation_targets = []
-        progress_targets = []
+    def _prepare_training_data(self, history: HistoryStore) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Prepare training data from a feedback history."""
+        columns = history.columns
+        difficulty = columns['difficulty_rating']
         
-        for i, feedback in enumerate(self.user_history):
-            # Extract features
-            feature_vector = self._extract_features(feedback)
-            features.append(feature_vector)
-            
-            # Extract targets
-            difficulty_targets.append(feedback.get('difficulty_rating', 5))
-            recommendation_targets.append(feedback.get('enjoyment_rating', 5))
-            
-            # Calculate progress (improvement over time)
-            if i > 0:
-                prev_difficulty = self.user_history[i-1].get('difficulty_rating', 5)
-                current_difficulty = feedback.get('difficulty_rating', 5)
-                progress = prev_difficulty - current_difficulty  # Lower difficulty = progress
-                progress_targets.append(progress)
-            else:
-                progress_targets.append(0)
-        
-        return (np.array(features), np.array(difficulty_targets), 
-                np.array(recommendation_targets), np.array(progress_targets))
+        # Per-feedback features followed by the (shared) preference features
+        preference_features = [
+            self.user_preferences.get('time_available', 60),
+            len(self.user_preferences.get('equipment', [])),
+            self._experience_level_to_numeric(self.user_preferences.get('experience_level', 'beginner')),
+            len(self.user_preferences.get('focus_areas', []))
+        ]
+        features = np.column_stack([
+            difficulty,
+            columns['enjoyment_rating'],
+            columns['completion_rate'],
+            columns['exercise_count'],
+            columns['exercise_rating_mean'],
+            np.tile(np.asarray(preference_features, dtype=float), (len(columns), 1))
+        ])
+        
+        # Progress is improvement over time: lower difficulty than the previous workout
+        progress_targets = np.concatenate(([0.0], difficulty[:-1] - difficulty[1:]))
+        
+        return (features, difficulty.copy(), columns['enjoyment_rating'].copy(), progress_targets)
     
     def _extract_features(self, feedback: Dict) -> List[float]:
         """Extract features from user feedback for ML training."""
@@ -272,15 +394,28 @@ class AIWorkoutPlanner:
         levels = {'beginner': 1, 'intermediate': 2, 'advanced': 3}
         return levels.get(level, 1)
     
+    def _model_ready(self, model, num_features: int) -> bool:
+        """Check that a model has been trained on features of the given width."""
+        return (model is not None and hasattr(model, 'n_features_in_') and
+                getattr(self.scaler, 'n_features_in_', None) == num_features)
+    
+    @timed_stage('difficulty_prediction')
     def predict_exercise_difficulty(self, exercise: Dict, user_context: Dict) -> float:
         """Predict difficulty rating for an exercise based on user context."""
-        if self.difficulty_model is None:
+        features = tuple(self._extract_exercise_features(exercise, user_context))
+        if not self._model_ready(self.difficulty_model, len(features)):
             return self._default_difficulty_prediction(exercise)
         
-        features = self._extract_exercise_features(exercise, user_context)
-        features_scaled = self.scaler.transform([features])
-        prediction = self.difficulty_model.predict(features_scaled)[0]
-        return max(1, min(10, prediction))  # Clamp between 1-10
+        # Predictions only change when the models are retrained, so identical
+        # feature vectors (common across a batch of workouts) are computed once
+        prediction = self._difficulty_cache.get(features)
+        if prediction is None:
+            features_scaled = self.scaler.transform([features])
+            prediction = max(1, min(10, self.difficulty_model.predict(features_scaled)[0]))  # Clamp between 1-10
+            if len(self._difficulty_cache) >= MAX_PREDICTION_CACHE:
+                self._difficulty_cache.clear()
+            self._difficulty_cache[features] = prediction
+        return prediction
     
     def _extract_exercise_features(self, exercise: Dict, user_context: Dict) -> List[float]:
         """Extract features for exercise difficulty prediction."""
@@ -304,52 +439,75 @@ class AIWorkoutPlanner:
         difficulty_map = {'beginner': 3, 'intermediate': 6, 'advanced': 8}
         return difficulty_map.get(exercise.get('difficulty', 'beginner'), 5)
     
-    def recommend_exercises(self, available_exercises: List[Dict], num_recommendations: int) -> List[Dict]:
-        """Recommend exercises based on user preferences and history."""
+    @timed_stage('recommendation')
+    def recommend_exercises(self, available_exercises: List[Dict], num_recommendations: int,
+                            preferences: Optional[Dict] = None,
+                            recent: Optional[RecentExercises] = None) -> List[Dict]:
+        """Recommend exercises based on user preferences and history, scoring down those in `recent`."""
         if not available_exercises:
             return []
+        preferences = preferences if preferences is not None else self.user_preferences
         
-        if self.exercise_recommendation_model is None or len(self.user_history) < 3:
+        features = np.array([self._extract_exercise_features(exercise, preferences)
+                             for exercise in available_exercises], dtype=float)
+        if (not self._model_ready(self.exercise_recommendation_model, features.shape[1]) or
+                len(self.user_history) < 3):
             # Use rule-based recommendation
-            return self._rule_based_exercise_recommendation(available_exercises, num_recommendations)
-        
-        # Use ML-based recommendation
-        exercise_scores = []
-        for exercise in available_exercises:
-            features = self._extract_exercise_features(exercise, self.user_preferences)
-            features_scaled = self.scaler.transform([features])
-            score = self.exercise_recommendation_model.predict(features_scaled)[0]
-            exercise_scores.append((exercise, score))
+            return self._rule_based_exercise_recommendation(available_exercises, num_recommendations, preferences,
+                                                            recent)
+        
+        # Use ML-based recommendation, scoring all candidates in one call
+        scores = self.exercise_recommendation_model.predict(self.scaler.transform(features))
+        recent_weight = recent.weight if recent is not None else lambda name: 1.0
+        exercise_scores = [
+            (exercise, score * self.exercise_performance.rating_factor(exercise['name']) *
+             recent_weight(exercise['name']))
+            for exercise, score in zip(available_exercises, scores)
+        ]
         
-        # Sort by score and return top recommendations
-        exercise_scores.sort(key=lambda x: x[1], reverse=True)
-        return [exercise for exercise, _ in exercise_scores[:num_recommendations]]
+        # Return the top recommendations without sorting every candidate
+        top_scores = heapq.nlargest(num_recommendations, exercise_scores, key=lambda x: x[1])
+        return [exercise for exercise, _ in top_scores]
     
-    def _rule_based_exercise_recommendation(self, available_exercises: List[Dict], num_recommendations: int) -> List[Dict]:
+    def _rule_based_exercise_recommendation(self, available_exercises: List[Dict], num_recommendations: int,
+                                            preferences: Optional[Dict] = None,
+                                            recent: Optional[RecentExercises] = None) -> List[Dict]:
         """Rule-based exercise recommendation when ML is not available."""
+        preferences = preferences if preferences is not None else self.user_preferences
+        rating_factor = self.exercise_performance.rating_factor
+        recent_weight = recent.weight if recent is not None else lambda name: 1.0
+        
+        def weight(exercise: Dict) -> float:
+            return rating_factor(exercise['name']) * recent_weight(exercise['name'])
+        
         # Consider user history and preferences
         recommended = []
         
-        # Prioritize exercises that match focus areas
-        focus_areas = self.user_preferences.get('focus_areas', [])
+        # Prioritize exercises that match focus areas, favouring the ones the user has rated
+        # well and has not done recently
+        focus_areas = preferences.get('focus_areas', [])
         if focus_areas:
             focus_exercises = [ex for ex in available_exercises 
                              if ex.get('muscle_group') in focus_areas or ex.get('bjj_focus') in focus_areas]
-            recommended.extend(focus_exercises[:num_recommendations//2])
+            recommended = weighted_sample(focus_exercises, [weight(ex) for ex in focus_exercises],
+                                          num_recommendations // 2)
         
         # Add variety from other exercises
-        remaining = [ex for ex in available_exercises if ex not in recommended]
-        recommended.extend(random.sample(remaining, min(num_recommendations - len(recommended), len(remaining))))
+        chosen = {id(ex) for ex in recommended}
+        remaining = [ex for ex in available_exercises if id(ex) not in chosen]
+        recommended.extend(weighted_sample(remaining, [weight(ex) for ex in remaining],
+                                           num_recommendations - len(recommended)))
         
-        return recommended[:num_recommendations]
+        return recommended
     
+    @timed_stage('progress_prediction')
     def predict_progress(self, current_workout: Dict) -> Dict:
         """Predict user progress based on current workout and history."""
-        if self.progress_prediction_model is None or len(self.user_history) < 5:
-            return self._default_progress_prediction()
-        
         # Extract features from current workout
         features = self._extract_workout_features(current_workout)
+        if not self._model_ready(self.progress_prediction_model, len(features)) or len(self.user_history) < 5:
+            return self._default_progress_prediction()
+        
         features_scaled = self.scaler.transform([features])
         
         # Predict progress
@@ -366,13 +524,14 @@ class AIWorkoutPlanner:
         total_exercises = len(workout.get('strength_exercises', [])) + \
                          len(workout.get('metcon_exercises', [])) + \
                          len(workout.get('accessory_exercises', []))
+        preferences = workout.get('user_preferences') or self.user_preferences
         
         return [
             total_exercises,
             workout.get('total_duration', 60),
-            len(self.user_preferences.get('equipment', [])),
-            self._experience_level_to_numeric(self.user_preferences.get('experience_level', 'beginner')),
-            len(self.user_preferences.get('focus_areas', []))
+            len(preferences.get('equipment', [])),
+            self._experience_level_to_numeric(preferences.get('experience_level', 'beginner')),
+            len(preferences.get('focus_areas', []))
         ]
     
     def _default_progress_prediction(self) -> Dict:
@@ -392,44 +551,60 @@ class AIWorkoutPlanner:
         else:
             return ['Consider adjusting workout difficulty', 'Focus on form and technique', 'Ensure adequate recovery']
     
-    def generate_workout(self) -> Dict:
-        """Generate a personalized workout using AI recommendations."""
-        if not self.user_preferences:
-            raise ValueError("User preferences must be set before generating workout")
-        
-        time_available = self.user_preferences.get('time_available', 60)
-        goal = self.user_preferences.get('goal', 'general_fitness')
-        equipment = self.user_preferences.get('equipment', ['bodyweight'])
-        experience_level = self.user_preferences.get('experience_level', 'beginner')
-        focus_areas = self.user_preferences.get('focus_areas', [])
+    def generate_workout(self, preferences: Optional[Dict] = None, user_id: Optional[str] = None) -> Dict:
+        """
+        Generate a personalized workout using AI recommendations.
         
-        # Calculate time allocation
-        strength_time = int(time_available * 0.4)
-        metcon_time = int(time_available * 0.4)
-        accessory_time = int(time_available * 0.2)
+        Args:
+            preferences (Dict): Preferences for this workout; defaults to the ones
+                set with set_user_preferences. Passing them explicitly leaves the
+                planner's shared state untouched, so concurrent calls are safe.
+            user_id (str): Athlete the workout is prescribed to. Exercises from
+                their last few workouts are scored down, and this workout is
+                added to their history. Leave unset for workouts nobody is
+                prescribed, such as batches, weekly plans and warm-up.
+        """
+        preferences = preferences if preferences is not None else self.user_preferences
+        if not preferences:
+            raise ValueError("User preferences must be set before generating workout")
         
-        # Generate sections using AI recommendations
-        strength_exercises = self._generate_ai_strength_section(
-            equipment, experience_level, focus_areas, strength_time
+        time_available = preferences.get('time_available', 60)
+        goal = preferences.get('goal', 'general_fitness')
+        equipment = preferences.get('equipment', ['bodyweight'])
+        experience_level = preferences.get('experience_level', 'beginner')
+        focus_areas = preferences.get('focus_areas', [])
+        recent = self.recent_exercises.get(user_id) if user_id is not None else None
+        
+        # Strength (40%) and accessory (20%) work is fitted to its share of the
+        # session; the metcon is a timed block that takes the time left over
+        strength_exercises, strength_seconds = self._generate_ai_strength_section(
+            equipment, experience_level, focus_areas, int(time_available * 60 * 0.4), preferences, recent
         )
         
-        metcon_exercises = self._generate_ai_metcon_section(
-            equipment, experience_level, focus_areas, metcon_time
+        accessory_exercises, accessory_seconds = self._generate_ai_accessory_section(
+            equipment, experience_level, focus_areas, int(time_available * 60 * 0.2), preferences, recent
         )
         
-        accessory_exercises = self._generate_ai_accessory_section(
-            equipment, experience_level, focus_areas, accessory_time
+        # Nothing is left for it when strength and accessory work overran
+        metcon_seconds = max(0, time_available * 60 - strength_seconds - accessory_seconds)
+        metcon_exercises = self._generate_ai_metcon_section(
+            equipment, experience_level, focus_areas, metcon_seconds // 60, preferences, recent
         )
         
         # Create workout
         workout = {
-            'id': f"workout_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
+            'id': f"workout_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}",
             'timestamp': datetime.now().isoformat(),
-            'user_preferences': self.user_preferences,
+            'user_preferences': preferences,
             'strength_exercises': strength_exercises,
             'metcon_exercises': metcon_exercises,
             'accessory_exercises': accessory_exercises,
             'total_duration': time_available,
+            'section_seconds': {
+                'strength': strength_seconds,
+                'metcon': metcon_seconds,
+                'accessory': accessory_seconds
+            },
             'ai_generated': True
         }
         
@@ -437,28 +612,37 @@ class AIWorkoutPlanner:
         progress_prediction = self.predict_progress(workout)
         workout['progress_prediction'] = progress_prediction
         
+        if user_id is not None:
+            self.recent_exercises.record_workout(user_id, workout)
         return workout
     
     def _generate_ai_strength_section(self, equipment: List[str], experience_level: str, 
-                                    focus_areas: List[str], available_time: int) -> List[Dict]:
-        """Generate strength exercises using AI recommendations."""
-        available_exercises = []
+                                    focus_areas: List[str], available_seconds: int,
+                                    preferences: Dict, recent: Optional[RecentExercises] = None) -> Tuple[List[Dict], int]:
+        """
+        Generate strength exercises using AI recommendations.
         
-        # Filter exercises
-        for exercise in self.exercises:
-            if (exercise.get('type') == 'strength' and
-                self._exercise_matches_criteria(exercise, equipment, experience_level)):
-                available_exercises.append(exercise)
+        Returns:
+            Tuple[List[Dict], int]: Exercises, and the section's length in seconds
+        """
+        available_exercises = self._candidate_pool('strength', equipment, experience_level)
         
-        # Use AI to recommend exercises
-        num_exercises = min(4, max(2, available_time // 8))
-        recommended_exercises = self.recommend_exercises(available_exercises, num_exercises)
+        # Rank exercises with the AI, then fit exercises and sets to the time available
+        ranked_exercises = self.recommend_exercises(available_exercises, MAX_CANDIDATES, preferences, recent)
+        
+        def plan(exercise: Dict) -> Tuple[int, int]:
+            predicted_difficulty = self.predict_exercise_difficulty(exercise, preferences)
+            sets, _ = self._ai_determine_sets_reps(exercise, predicted_difficulty)
+            rest_time = self._ai_determine_rest_time(exercise, predicted_difficulty)
+            return sets, exercise.get('time_per_set', DEFAULT_SET_SECONDS) + rest_time
+        
+        selected, seconds = fit_section(ranked_exercises, available_seconds, plan, max_exercises=4, min_exercises=2)
         
         exercises = []
-        for exercise in recommended_exercises:
-            # Predict difficulty and adjust sets/reps accordingly
-            predicted_difficulty = self.predict_exercise_difficulty(exercise, self.user_preferences)
-            sets, reps = self._ai_determine_sets_reps(exercise, predicted_difficulty)
+        for exercise, sets in selected:
+            # Predict difficulty and adjust reps accordingly
+            predicted_difficulty = self.predict_exercise_difficulty(exercise, preferences)
+            _, reps = self._ai_determine_sets_reps(exercise, predicted_difficulty)
             rest_time = self._ai_determine_rest_time(exercise, predicted_difficulty)
             
             exercises.append({
@@ -474,23 +658,17 @@ class AIWorkoutPlanner:
                 'notes': self._generate_ai_exercise_notes(exercise, sets, reps, predicted_difficulty)
             })
         
-        return exercises
+        return exercises, seconds
     
     def _generate_ai_metcon_section(self, equipment: List[str], experience_level: str, 
-                                  focus_areas: List[str], available_time: int) -> List[Dict]:
+                                  focus_areas: List[str], available_time: int,
+                                  preferences: Dict, recent: Optional[RecentExercises] = None) -> List[Dict]:
         """Generate metcon exercises using AI recommendations."""
-        available_exercises = []
-        
-        # Filter exercises
-        for exercise in self.exercises:
-            if (exercise.get('type') == 'conditioning' and
-                exercise.get('category') in ['metcon', 'explosive', 'functional'] and
-                self._exercise_matches_criteria(exercise, equipment, experience_level)):
-                available_exercises.append(exercise)
+        available_exercises = self._candidate_pool('metcon', equipment, experience_level)
         
         # Use AI to recommend exercises
         num_exercises = min(5, max(3, available_time // 5))
-        recommended_exercises = self.recommend_exercises(available_exercises, num_exercises)
+        recommended_exercises = self.recommend_exercises(available_exercises, num_exercises, preferences, recent)
         
         # Determine workout format based on user history
         formats = ['amrap', 'emom', 'fortime']
@@ -503,7 +681,7 @@ class AIWorkoutPlanner:
         
         exercises = []
         for exercise in recommended_exercises:
-            predicted_difficulty = self.predict_exercise_difficulty(exercise, self.user_preferences)
+            predicted_difficulty = self.predict_exercise_difficulty(exercise, preferences)
             reps = self._ai_determine_metcon_reps(exercise, predicted_difficulty)
             
             exercises.append({
@@ -522,25 +700,30 @@ class AIWorkoutPlanner:
         return exercises
     
     def _generate_ai_accessory_section(self, equipment: List[str], experience_level: str, 
-                                     focus_areas: List[str], available_time: int) -> List[Dict]:
-        """Generate accessory exercises using AI recommendations."""
-        available_exercises = []
+                                     focus_areas: List[str], available_seconds: int,
+                                     preferences: Dict, recent: Optional[RecentExercises] = None) -> Tuple[List[Dict], int]:
+        """
+        Generate accessory exercises using AI recommendations.
         
-        # Filter exercises
-        for exercise in self.exercises:
-            if (exercise.get('type') == 'accessory' and
-                exercise.get('category') in ['bodyweight', 'functional'] and
-                self._exercise_matches_criteria(exercise, equipment, experience_level)):
-                available_exercises.append(exercise)
+        Returns:
+            Tuple[List[Dict], int]: Exercises, and the section's length in seconds
+        """
+        available_exercises = self._candidate_pool('accessory', equipment, experience_level)
         
-        # Use AI to recommend exercises
-        num_exercises = min(2, max(1, available_time // 10))
-        recommended_exercises = self.recommend_exercises(available_exercises, num_exercises)
+        # Rank exercises with the AI, then fit exercises and sets to the time available
+        ranked_exercises = self.recommend_exercises(available_exercises, MAX_CANDIDATES, preferences, recent)
+        
+        def plan(exercise: Dict) -> Tuple[int, int]:
+            predicted_difficulty = self.predict_exercise_difficulty(exercise, preferences)
+            sets, _ = self._ai_determine_accessory_reps(exercise, predicted_difficulty)
+            return sets, exercise.get('time_per_set', DEFAULT_SET_SECONDS) + ACCESSORY_REST_SECONDS
+        
+        selected, seconds = fit_section(ranked_exercises, available_seconds, plan, max_exercises=2, min_exercises=1)
         
         exercises = []
-        for exercise in recommended_exercises:
-            predicted_difficulty = self.predict_exercise_difficulty(exercise, self.user_preferences)
-            sets, reps = self._ai_determine_accessory_reps(exercise, predicted_difficulty)
+        for exercise, sets in selected:
+            predicted_difficulty = self.predict_exercise_difficulty(exercise, preferences)
+            _, reps = self._ai_determine_accessory_reps(exercise, predicted_difficulty)
             
             exercises.append({
                 'name': exercise['name'],
@@ -556,7 +739,7 @@ class AIWorkoutPlanner:
                 'notes': f"AI-recommended BJJ accessory: {sets}x{reps}, focus on form"
             })
         
-        return exercises
+        return exercises, seconds
     
     def _ai_determine_sets_reps(self, exercise: Dict, predicted_difficulty: float) -> Tuple[int, int]:
         """Determine sets and reps using AI predictions."""
@@ -608,16 +791,54 @@ class AIWorkoutPlanner:
     
     def _analyze_format_preferences(self) -> Dict[str, float]:
         """Analyze user preferences for workout formats."""
-        format_scores = {'amrap': 0, 'emom': 0, 'fortime': 0}
+        total_enjoyment = self.user_history.aggregate('enjoyment_rating', 'sum')
         
-        for feedback in self.user_history:
-            enjoyment = feedback.get('enjoyment_rating', 5)
-            # This is a simplified analysis - in a real system, you'd track format per workout
-            format_scores['amrap'] += enjoyment * 0.33
-            format_scores['emom'] += enjoyment * 0.33
-            format_scores['fortime'] += enjoyment * 0.34
+        # This is a simplified analysis - in a real system, you'd track format per workout
+        return {
+            'amrap': total_enjoyment * 0.33,
+            'emom': total_enjoyment * 0.33,
+            'fortime': total_enjoyment * 0.34
+        }
+    
+    def warm_candidate_pools(self, preferences: Optional[Dict] = None):
+        """Precompute every section's candidate pool for `preferences`, e.g. before fanning out."""
+        preferences = preferences if preferences is not None else self.user_preferences
+        equipment = preferences.get('equipment', ['bodyweight'])
+        experience_level = preferences.get('experience_level', 'beginner')
+        for section in ('strength', 'metcon', 'accessory'):
+            self._candidate_pool(section, equipment, experience_level)
+    
+    def _candidate_pool(self, section: str, equipment: List[str], experience_level: str) -> List[Dict]:
+        """
+        Return the catalog exercises eligible for a workout section.
         
-        return format_scores
+        Pools are cached per (section, equipment, experience level) so repeated
+        and batched generation share the filtering work. Callers must not
+        mutate the returned list.
+        """
+        key = (section, frozenset(equipment), experience_level)
+        pool = self._candidate_pools.get(key)
+        if pool is None:
+            if len(self._candidate_pools) >= MAX_CANDIDATE_POOLS:
+                self._candidate_pools.clear()
+            with timed('catalog_filter'):
+                pool = [exercise for exercise in self.exercises
+                        if self._exercise_in_section(exercise, section) and
+                        self._exercise_matches_criteria(exercise, equipment, experience_level)]
+            self._candidate_pools[key] = pool
+        return pool
+    
+    def _exercise_in_section(self, exercise: Dict, section: str) -> bool:
+        """Check if an exercise belongs in a workout section."""
+        if section == 'strength':
+            return exercise.get('type') == 'strength'
+        if section == 'metcon':
+            return (exercise.get('type') == 'conditioning' and
+                    exercise.get('category') in ['metcon', 'explosive', 'functional'])
+        if section == 'accessory':
+            return (exercise.get('type') == 'accessory' and
+                    exercise.get('category') in ['bodyweight', 'functional'])
+        return False
     
     def _exercise_matches_criteria(self, exercise: Dict, equipment: List[str], experience_level: str) -> bool:
         """Check if exercise matches user criteria."""
@@ -635,15 +856,23 @@ class AIWorkoutPlanner:
         
         return exercise_level_index <= user_level_index
     
-    def save_workout(self, workout: Dict, filename: str = None):
-        """Save workout to file."""
-        if not filename:
-            filename = f"ai_workout_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    @timed_stage('save_workout')
+    def save_workout(self, workout: Dict, filename: str = None) -> str:
+        """
+        Save workout to a JSON file in the workout storage.
         
-        with open(filename, 'w') as f:
-            json.dump(workout, f, indent=2)
+        The file is written in the background; the returned path can be read
+        back immediately through the storage.
+        
+        Returns:
+            str: Path the workout is saved under
+        """
+        if not filename:
+            filename = f"ai_{workout['id']}.json"
         
-        logger.info(f"AI workout saved to {filename}")
+        path = self.storage.save(workout, filename)
+        logger.info(f"AI workout saved to {path}")
+        return path
     
     def get_user_insights(self) -> Dict:
         """Get AI-generated insights about user's training."""
@@ -654,9 +883,9 @@ class AIWorkoutPlanner:
             }
         
         # Analyze patterns
-        avg_difficulty = np.mean([f.get('difficulty_rating', 5) for f in self.user_history])
-        avg_enjoyment = np.mean([f.get('enjoyment_rating', 5) for f in self.user_history])
-        avg_completion = np.mean([f.get('completion_rate', 0.5) for f in self.user_history])
+        avg_difficulty = self.user_history.aggregate('difficulty_rating')
+        avg_enjoyment = self.user_history.aggregate('enjoyment_rating')
+        avg_completion = self.user_history.aggregate('completion_rate')
         
         insights = {
             'total_workouts': len(self.user_history),
@@ -669,22 +898,35 @@ class AIWorkoutPlanner:
         
         return insights
     
+    def get_training_rollups(self, period: str = 'week', start: Optional[float] = None,
+                             end: Optional[float] = None) -> Dict:
+        """
+        Get weekly or monthly difficulty/enjoyment/completion trends.
+        
+        Args:
+            period (str): 'week' or 'month'
+            start (float): Earliest bucket to include (epoch seconds)
+            end (float): Latest bucket start to include (epoch seconds)
+        """
+        return self.user_history.rollups.query(period, start, end)
+    
     def _analyze_trends(self) -> Dict:
-        """Analyze trends in user's training."""
-        if len(self.user_history) < 5:
+        """Analyze trends in user's training, comparing the latest week to the prior weeks."""
+        comparison = self.user_history.rollups.compare_recent('week')
+        if comparison is None:
             return {'message': 'Need more data for trend analysis'}
         
-        recent_feedback = self.user_history[-5:]
-        older_feedback = self.user_history[-10:-5] if len(self.user_history) >= 10 else self.user_history[:-5]
-        
-        recent_avg = np.mean([f.get('difficulty_rating', 5) for f in recent_feedback])
-        older_avg = np.mean([f.get('difficulty_rating', 5) for f in older_feedback])
+        recent, baseline = comparison
+        recent_avg = recent['avg_difficulty']
+        older_avg = baseline['avg_difficulty']
         
         difficulty_trend = 'improving' if recent_avg < older_avg else 'stable' if abs(recent_avg - older_avg) < 1 else 'declining'
         
         return {
             'difficulty_trend': difficulty_trend,
-            'progress_rate': (older_avg - recent_avg) / max(older_avg, 1)
+            'progress_rate': (older_avg - recent_avg) / max(older_avg, 1),
+            'enjoyment_change': recent['avg_enjoyment'] - baseline['avg_enjoyment'],
+            'completion_change': recent['avg_completion'] - baseline['avg_completion']
         }
     
     def _generate_insight_recommendations(self, avg_difficulty: float, avg_enjoyment: float, avg_completion: float) -> List[str]:
@@ -10,6 +10,7 @@ An intelligent workout generator that creates personalized workouts based on:
 - User feedback and learning
 """
 
+import copy
 import json
 import random
 import numpy as np
@@ -17,37 +18,68 @@ from datetime import datetime, timedelta
 from typing import List, Dict, Optional, Tuple
 import logging
 import pickle
+import uuid
 import os
 
+from exercise_stats import ExerciseStats
+from history_store import HistoryStore
+from metrics import timed, timed_stage
+from recent_exercises import DEFAULT_RECENT_PATH, RecentExercises, UserRecentExercises
+from time_budget import ACCESSORY_REST_SECONDS, DEFAULT_SET_SECONDS, MAX_CANDIDATES, fit_section
+from weighted_sampling import weighted_sample
+from workout_storage import default_storage
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Upper bound on cached (section, equipment, experience level) candidate pools
+MAX_CANDIDATE_POOLS = 1024
+
+# Most recent feedback IDs remembered so that redelivered feedback is skipped
+MAX_APPLIED_FEEDBACK_IDS = 10000
+
+
+def _model_file_mtime(path: str) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
 class SimpleAIWorkoutPlanner:
     """AI-powered workout planner with simplified machine learning capabilities."""
     
-    def __init__(self, data_file: str = 'workout_data.json', model_file: str = 'simple_ai_model.pkl'):
+    def __init__(self, data_file: str = 'workout_data.json', model_file: str = 'simple_ai_model.pkl',
+                 data: Optional[Dict] = None, recent_path: str = DEFAULT_RECENT_PATH):
         """
         Initialize the AI workout planner.
         
         Args:
             data_file (str): Path to workout data file
             model_file (str): Path to save/load AI model
+            data (Dict): Already-loaded workout data, e.g. a catalog shared with
+                other planners; data_file is not read when this is given
+            recent_path (str): SQLite file holding each user's recent exercises
         """
-        self.data = self._load_workout_data(data_file)
+        self.data = data if data is not None else self._load_workout_data(data_file)
         # Assign top-level keys for convenience (must be before model loading)
         self.exercises = self.data.get('exercises', [])
         self.workout_types = self.data.get('workout_types', {})
         self.muscle_groups = self.data.get('muscle_groups', {})
         self.model_file = model_file
         self.user_preferences = {}
-        self.user_history = []
-        self.exercise_performance = {}
+        self.user_history = HistoryStore()
+        self.exercise_performance = ExerciseStats([exercise['name'] for exercise in self.exercises])
+        self.recent_exercises = UserRecentExercises(self.exercise_performance.ids, recent_path)
         self.progress_tracker = {}
+        self._candidate_pools = {}
+        self.storage = default_storage()
         # Simple AI Models (no scikit-learn dependency)
         self.exercise_weights = {}
         self.difficulty_adjustments = {}
         self.user_patterns = {}
+        self.applied_feedback_ids = []
         # Load or initialize models
         self._load_or_initialize_models()
     
@@ -63,7 +95,8 @@ class SimpleAIWorkoutPlanner:
             logger.error(f"Error parsing workout data file: {e}")
             return self._create_default_data()
     
-    def _create_default_data(self) -> Dict:
+    @staticmethod
+    def _create_default_data() -> Dict:
         """Create default workout data structure."""
         return {
             "exercises": [
@@ -121,17 +154,32 @@ class SimpleAIWorkoutPlanner:
     
     def _load_or_initialize_models(self):
         """Load existing AI models or initialize new ones."""
+        self._model_mtime = _model_file_mtime(self.model_file)
         try:
             with open(self.model_file, 'rb') as f:
                 models = pickle.load(f)
                 self.exercise_weights = models.get('exercise_weights', {})
                 self.difficulty_adjustments = models.get('difficulty_adjustments', {})
                 self.user_patterns = models.get('user_patterns', {})
+                self.applied_feedback_ids = models.get('applied_feedback_ids', [])
                 logger.info("Loaded existing AI models")
         except FileNotFoundError:
             logger.info("No existing models found. Initializing new AI models.")
             self._initialize_models()
     
+    def refresh_models(self) -> bool:
+        """
+        Reload the models if another process saved newer ones since they
+        were last loaded or saved here.
+        
+        Returns:
+            bool: True if the models were reloaded
+        """
+        if _model_file_mtime(self.model_file) == self._model_mtime:
+            return False
+        self._load_or_initialize_models()
+        return True
+    
     def _initialize_models(self):
         """Initialize new AI models."""
         # Initialize exercise weights (preference scores)
@@ -157,15 +205,24 @@ class SimpleAIWorkoutPlanner:
             'enjoyment_threshold': 6.0
         }
     
-    def _save_models(self):
-        """Save AI models to file."""
-        models = {
+    def _model_state(self) -> Dict:
+        """Learned state as saved to the model file."""
+        return {
             'exercise_weights': self.exercise_weights,
             'difficulty_adjustments': self.difficulty_adjustments,
-            'user_patterns': self.user_patterns
+            'user_patterns': self.user_patterns,
+            'applied_feedback_ids': self.applied_feedback_ids
         }
-        with open(self.model_file, 'wb') as f:
+    
+    def _save_models(self, models: Optional[Dict] = None):
+        """Save AI models (the current ones by default) to file."""
+        models = models if models is not None else self._model_state()
+        # Write then rename, so processes reloading the file never see a partial one
+        temp_file = f"{self.model_file}.{os.getpid()}.tmp"
+        with open(temp_file, 'wb') as f:
             pickle.dump(models, f)
+        os.replace(temp_file, self.model_file)
+        self._model_mtime = _model_file_mtime(self.model_file)
         logger.info("AI models saved successfully")
     
     def set_user_preferences(self, preferences: Dict):
@@ -186,55 +243,96 @@ class SimpleAIWorkoutPlanner:
                 - performance_notes: str
                 - exercise_ratings: Dict[exercise_name, rating]
         """
-        feedback['workout_id'] = workout_id
         feedback['timestamp'] = datetime.now().isoformat()
-        self.user_history.append(feedback)
+        self.record_feedback_batch([(workout_id, feedback)])
+    
+    def record_feedback_batch(self, items: List[Tuple[str, Dict]]):
+        """
+        Record several feedback submissions, saving the learned state once.
         
-        # Update exercise performance data
-        for exercise_name, rating in feedback.get('exercise_ratings', {}).items():
-            if exercise_name not in self.exercise_performance:
-                self.exercise_performance[exercise_name] = []
-            self.exercise_performance[exercise_name].append(rating)
+        The batch is applied all or nothing: the new weights are learned on
+        a copy of the (catalog-sized) model state, and the new history rows
+        and rating statistics are staged. All of them are applied only once
+        the models have been saved, so a failure leaves the planner
+        unchanged and the batch can be retried. Submissions whose
+        'feedback_id' was already applied are skipped, so redelivered
+        feedback is learned once.
         
-        # Learn from feedback
-        self._learn_from_feedback(feedback)
+        Args:
+            items (List[Tuple[str, Dict]]): (workout_id, feedback) pairs in
+                submission order; a feedback 'timestamp' is kept if present
+        """
+        models = copy.deepcopy(self._model_state())
+        applied = set(models['applied_feedback_ids'])
+        entries = []
+        for workout_id, feedback in items:
+            feedback_id = feedback.get('feedback_id')
+            if feedback_id is not None and feedback_id in applied:
+                logger.info(f"Skipping feedback already applied: {feedback_id}")
+                continue
+            entry = dict(feedback, workout_id=workout_id)
+            entry.setdefault('timestamp', datetime.now().isoformat())
+            entries.append(entry)
+            
+            # Learn from feedback
+            self._learn_from_feedback(entry, models)
+            if feedback_id is not None:
+                applied.add(feedback_id)
+                models['applied_feedback_ids'].append(feedback_id)
+        if not entries:
+            return
+        
+        # Save updated models, then switch to the new state
+        models['applied_feedback_ids'] = models['applied_feedback_ids'][-MAX_APPLIED_FEEDBACK_IDS:]
+        self._save_models(models)
+        self.user_history.extend(entries)
+        for entry in entries:
+            # Update per-exercise rating statistics
+            for exercise_name, rating in entry.get('exercise_ratings', {}).items():
+                self.exercise_performance.update(exercise_name, rating)
+        self.exercise_weights = models['exercise_weights']
+        self.difficulty_adjustments = models['difficulty_adjustments']
+        self.user_patterns = models['user_patterns']
+        self.applied_feedback_ids = models['applied_feedback_ids']
+        
+        logger.info(f"Workout feedback recorded and learned: {len(entries)} submission(s)")
+    
+    @timed_stage('retraining')
+    def _learn_from_feedback(self, feedback: Dict, models: Dict):
+        """Learn from user feedback to improve future recommendations, updating `models` in place."""
+        user_patterns = models['user_patterns']
+        exercise_weights = models['exercise_weights']
         
-        logger.info(f"Workout feedback recorded and learned: {feedback}")
-    
-    def _learn_from_feedback(self, feedback: Dict):
-        """Learn from user feedback to improve future recommendations."""
         # Update exercise weights based on enjoyment
         enjoyment_rating = feedback.get('enjoyment_rating', 5)
         difficulty_rating = feedback.get('difficulty_rating', 5)
         completion_rate = feedback.get('completion_rate', 0.5)
         
         # Update user patterns
-        self.user_patterns['preferred_difficulty'] = (
-            self.user_patterns['preferred_difficulty'] * 0.7 + difficulty_rating * 0.3
+        user_patterns['preferred_difficulty'] = (
+            user_patterns['preferred_difficulty'] * 0.7 + difficulty_rating * 0.3
         )
-        self.user_patterns['completion_rate'] = (
-            self.user_patterns['completion_rate'] * 0.7 + completion_rate * 0.3
+        user_patterns['completion_rate'] = (
+            user_patterns['completion_rate'] * 0.7 + completion_rate * 0.3
         )
-        self.user_patterns['enjoyment_threshold'] = (
-            self.user_patterns['enjoyment_threshold'] * 0.7 + enjoyment_rating * 0.3
+        user_patterns['enjoyment_threshold'] = (
+            user_patterns['enjoyment_threshold'] * 0.7 + enjoyment_rating * 0.3
         )
         
         # Update exercise weights based on individual exercise ratings
         for exercise_name, rating in feedback.get('exercise_ratings', {}).items():
-            if exercise_name in self.exercise_weights:
+            if exercise_name in exercise_weights:
                 # Increase weight for exercises user enjoys
                 enjoyment_factor = (rating - 5) / 5.0  # -1 to 1
-                self.exercise_weights[exercise_name] += enjoyment_factor * 0.1
-                self.exercise_weights[exercise_name] = max(0.1, min(2.0, self.exercise_weights[exercise_name]))
+                exercise_weights[exercise_name] += enjoyment_factor * 0.1
+                exercise_weights[exercise_name] = max(0.1, min(2.0, exercise_weights[exercise_name]))
         
         # Update difficulty adjustments based on experience level
         experience_level = self.user_preferences.get('experience_level', 'intermediate')
         difficulty_adjustment = (difficulty_rating - 5) / 10.0  # -0.5 to 0.5
-        self.difficulty_adjustments[experience_level] += difficulty_adjustment * 0.1
-        
-        # Save updated models
-        self._save_models()
+        models['difficulty_adjustments'][experience_level] += difficulty_adjustment * 0.1
     
+    @timed_stage('difficulty_prediction')
     def predict_exercise_difficulty(self, exercise: Dict, user_context: Dict) -> float:
         """Predict difficulty rating for an exercise based on user context."""
         base_difficulty = self._difficulty_to_numeric(exercise.get('difficulty', 'beginner'))
@@ -256,22 +354,29 @@ class SimpleAIWorkoutPlanner:
         difficulties = {'beginner': 3, 'intermediate': 6, 'advanced': 8}
         return difficulties.get(difficulty, 5)
     
-    def recommend_exercises(self, available_exercises: List[Dict], num_recommendations: int) -> List[Dict]:
-        """Recommend exercises based on AI learning."""
+    @timed_stage('recommendation')
+    def recommend_exercises(self, available_exercises: List[Dict], num_recommendations: int,
+                            preferences: Optional[Dict] = None,
+                            recent: Optional[RecentExercises] = None) -> List[Dict]:
+        """
+        Recommend exercises based on AI learning.
+        
+        Exercises are drawn without replacement in proportion to their scores,
+        best-drawn first: high scorers are usually picked, but every eligible
+        exercise has a chance, which keeps workouts varied. Exercises in
+        `recent`, the athlete's recent history, are scored down.
+        """
         if not available_exercises:
             return []
+        preferences = preferences if preferences is not None else self.user_preferences
         
         # Calculate recommendation scores
-        exercise_scores = []
-        for exercise in available_exercises:
-            score = self._calculate_exercise_score(exercise)
-            exercise_scores.append((exercise, score))
+        scores = [self._calculate_exercise_score(exercise, preferences, recent) for exercise in available_exercises]
         
-        # Sort by score and return top recommendations
-        exercise_scores.sort(key=lambda x: x[1], reverse=True)
-        return [exercise for exercise, _ in exercise_scores[:num_recommendations]]
+        return weighted_sample(available_exercises, scores, num_recommendations)
     
-    def _calculate_exercise_score(self, exercise: Dict) -> float:
+    def _calculate_exercise_score(self, exercise: Dict, preferences: Dict,
+                                  recent: Optional[RecentExercises] = None) -> float:
         """Calculate AI recommendation score for an exercise."""
         base_score = 1.0
         
@@ -279,6 +384,13 @@ class SimpleAIWorkoutPlanner:
         exercise_weight = self.exercise_weights.get(exercise['name'], 1.0)
         base_score *= exercise_weight
         
+        # Recent per-exercise ratings
+        base_score *= self.exercise_performance.rating_factor(exercise['name'])
+        
+        # Steer away from exercises prescribed in the last few workouts
+        if recent is not None:
+            base_score *= recent.weight(exercise['name'])
+        
         # Equipment preference
         equipment = exercise.get('equipment', [])
         for eq in equipment:
@@ -286,26 +398,23 @@ class SimpleAIWorkoutPlanner:
                 base_score *= 1.2
         
         # Difficulty preference
-        predicted_difficulty = self.predict_exercise_difficulty(exercise, self.user_preferences)
+        predicted_difficulty = self.predict_exercise_difficulty(exercise, preferences)
         preferred_difficulty = self.user_patterns.get('preferred_difficulty', 5.0)
         difficulty_match = 1.0 - abs(predicted_difficulty - preferred_difficulty) / 10.0
         base_score *= (0.5 + difficulty_match * 0.5)
         
-        # Random factor for variety
-        base_score *= random.uniform(0.8, 1.2)
-        
         return base_score
     
+    @timed_stage('progress_prediction')
     def predict_progress(self, current_workout: Dict) -> Dict:
         """Predict user progress based on current workout and history."""
         if len(self.user_history) < 3:
             return self._default_progress_prediction()
         
         # Analyze recent performance
-        recent_feedback = self.user_history[-3:]
-        avg_difficulty = np.mean([f.get('difficulty_rating', 5) for f in recent_feedback])
-        avg_enjoyment = np.mean([f.get('enjoyment_rating', 5) for f in recent_feedback])
-        avg_completion = np.mean([f.get('completion_rate', 0.5) for f in recent_feedback])
+        avg_difficulty = self.user_history.aggregate('difficulty_rating', last=3)
+        avg_enjoyment = self.user_history.aggregate('enjoyment_rating', last=3)
+        avg_completion = self.user_history.aggregate('completion_rate', last=3)
         
         # Calculate progress score
         progress_score = 0.0
@@ -359,44 +468,60 @@ class SimpleAIWorkoutPlanner:
         
         return recommendations
     
-    def generate_workout(self) -> Dict:
-        """Generate a personalized workout using AI recommendations."""
-        if not self.user_preferences:
-            raise ValueError("User preferences must be set before generating workout")
-        
-        time_available = self.user_preferences.get('time_available', 60)
-        goal = self.user_preferences.get('goal', 'general_fitness')
-        equipment = self.user_preferences.get('equipment', ['bodyweight'])
-        experience_level = self.user_preferences.get('experience_level', 'beginner')
-        focus_areas = self.user_preferences.get('focus_areas', [])
+    def generate_workout(self, preferences: Optional[Dict] = None, user_id: Optional[str] = None) -> Dict:
+        """
+        Generate a personalized workout using AI recommendations.
         
-        # Calculate time allocation
-        strength_time = int(time_available * 0.4)
-        metcon_time = int(time_available * 0.4)
-        accessory_time = int(time_available * 0.2)
+        Args:
+            preferences (Dict): Preferences for this workout; defaults to the ones
+                set with set_user_preferences. Passing them explicitly leaves the
+                planner's shared state untouched, so concurrent calls are safe.
+            user_id (str): Athlete the workout is prescribed to. Exercises from
+                their last few workouts are scored down, and this workout is
+                added to their history. Leave unset for workouts nobody is
+                prescribed, such as batches, weekly plans and warm-up.
+        """
+        preferences = preferences if preferences is not None else self.user_preferences
+        if not preferences:
+            raise ValueError("User preferences must be set before generating workout")
         
-        # Generate sections using AI recommendations
-        strength_exercises = self._generate_ai_strength_section(
-            equipment, experience_level, focus_areas, strength_time
+        time_available = preferences.get('time_available', 60)
+        goal = preferences.get('goal', 'general_fitness')
+        equipment = preferences.get('equipment', ['bodyweight'])
+        experience_level = preferences.get('experience_level', 'beginner')
+        focus_areas = preferences.get('focus_areas', [])
+        recent = self.recent_exercises.get(user_id) if user_id is not None else None
+        
+        # Strength (40%) and accessory (20%) work is fitted to its share of the
+        # session; the metcon is a timed block that takes the time left over
+        strength_exercises, strength_seconds = self._generate_ai_strength_section(
+            equipment, experience_level, focus_areas, int(time_available * 60 * 0.4), preferences, recent
         )
         
-        metcon_exercises = self._generate_ai_metcon_section(
-            equipment, experience_level, focus_areas, metcon_time
+        accessory_exercises, accessory_seconds = self._generate_ai_accessory_section(
+            equipment, experience_level, focus_areas, int(time_available * 60 * 0.2), preferences, recent
         )
         
-        accessory_exercises = self._generate_ai_accessory_section(
-            equipment, experience_level, focus_areas, accessory_time
+        # Nothing is left for it when strength and accessory work overran
+        metcon_seconds = max(0, time_available * 60 - strength_seconds - accessory_seconds)
+        metcon_exercises = self._generate_ai_metcon_section(
+            equipment, experience_level, focus_areas, metcon_seconds // 60, preferences, recent
         )
         
         # Create workout
         workout = {
-            'id': f"ai_workout_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
+            'id': f"ai_workout_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}",
             'timestamp': datetime.now().isoformat(),
-            'user_preferences': self.user_preferences,
+            'user_preferences': preferences,
             'strength_exercises': strength_exercises,
             'metcon_exercises': metcon_exercises,
             'accessory_exercises': accessory_exercises,
             'total_duration': time_available,
+            'section_seconds': {
+                'strength': strength_seconds,
+                'metcon': metcon_seconds,
+                'accessory': accessory_seconds
+            },
             'ai_generated': True
         }
         
@@ -408,28 +533,37 @@ class SimpleAIWorkoutPlanner:
             logger.warning(f"Could not predict progress: {e}")
             workout['progress_prediction'] = self._default_progress_prediction()
         
+        if user_id is not None:
+            self.recent_exercises.record_workout(user_id, workout)
         return workout
     
     def _generate_ai_strength_section(self, equipment: List[str], experience_level: str, 
-                                    focus_areas: List[str], available_time: int) -> List[Dict]:
-        """Generate strength exercises using AI recommendations."""
-        available_exercises = []
+                                    focus_areas: List[str], available_seconds: int,
+                                    preferences: Dict, recent: Optional[RecentExercises] = None) -> Tuple[List[Dict], int]:
+        """
+        Generate strength exercises using AI recommendations.
         
-        # Filter exercises
-        for exercise in self.exercises:
-            if (exercise.get('type') == 'strength' and
-                self._exercise_matches_criteria(exercise, equipment, experience_level)):
-                available_exercises.append(exercise)
+        Returns:
+            Tuple[List[Dict], int]: Exercises, and the section's length in seconds
+        """
+        available_exercises = self._candidate_pool('strength', equipment, experience_level)
         
-        # Use AI to recommend exercises
-        num_exercises = min(4, max(2, available_time // 8))
-        recommended_exercises = self.recommend_exercises(available_exercises, num_exercises)
+        # Rank exercises with the AI, then fit exercises and sets to the time available
+        ranked_exercises = self.recommend_exercises(available_exercises, MAX_CANDIDATES, preferences, recent)
+        
+        def plan(exercise: Dict) -> Tuple[int, int]:
+            predicted_difficulty = self.predict_exercise_difficulty(exercise, preferences)
+            sets, _ = self._ai_determine_sets_reps(exercise, predicted_difficulty)
+            rest_time = self._ai_determine_rest_time(exercise, predicted_difficulty)
+            return sets, exercise.get('time_per_set', DEFAULT_SET_SECONDS) + rest_time
+        
+        selected, seconds = fit_section(ranked_exercises, available_seconds, plan, max_exercises=4, min_exercises=2)
         
         exercises = []
-        for exercise in recommended_exercises:
-            # Predict difficulty and adjust sets/reps accordingly
-            predicted_difficulty = self.predict_exercise_difficulty(exercise, self.user_preferences)
-            sets, reps = self._ai_determine_sets_reps(exercise, predicted_difficulty)
+        for exercise, sets in selected:
+            # Predict difficulty and adjust reps accordingly
+            predicted_difficulty = self.predict_exercise_difficulty(exercise, preferences)
+            _, reps = self._ai_determine_sets_reps(exercise, predicted_difficulty)
             rest_time = self._ai_determine_rest_time(exercise, predicted_difficulty)
             
             exercises.append({
@@ -445,23 +579,17 @@ class SimpleAIWorkoutPlanner:
                 'notes': self._generate_ai_exercise_notes(exercise, sets, reps, predicted_difficulty)
             })
         
-        return exercises
+        return exercises, seconds
     
     def _generate_ai_metcon_section(self, equipment: List[str], experience_level: str, 
-                                  focus_areas: List[str], available_time: int) -> List[Dict]:
+                                  focus_areas: List[str], available_time: int,
+                                  preferences: Dict, recent: Optional[RecentExercises] = None) -> List[Dict]:
         """Generate metcon exercises using AI recommendations."""
-        available_exercises = []
-        
-        # Filter exercises
-        for exercise in self.exercises:
-            if (exercise.get('type') == 'conditioning' and
-                exercise.get('category') in ['metcon', 'explosive', 'functional'] and
-                self._exercise_matches_criteria(exercise, equipment, experience_level)):
-                available_exercises.append(exercise)
+        available_exercises = self._candidate_pool('metcon', equipment, experience_level)
         
         # Use AI to recommend exercises
         num_exercises = min(5, max(3, available_time // 5))
-        recommended_exercises = self.recommend_exercises(available_exercises, num_exercises)
+        recommended_exercises = self.recommend_exercises(available_exercises, num_exercises, preferences, recent)
         
         # Determine workout format based on user history
         formats = ['amrap', 'emom', 'fortime']
@@ -474,7 +602,7 @@ class SimpleAIWorkoutPlanner:
         
         exercises = []
         for exercise in recommended_exercises:
-            predicted_difficulty = self.predict_exercise_difficulty(exercise, self.user_preferences)
+            predicted_difficulty = self.predict_exercise_difficulty(exercise, preferences)
             reps = self._ai_determine_metcon_reps(exercise, predicted_difficulty)
             
             exercises.append({
@@ -493,25 +621,30 @@ class SimpleAIWorkoutPlanner:
         return exercises
     
     def _generate_ai_accessory_section(self, equipment: List[str], experience_level: str, 
-                                     focus_areas: List[str], available_time: int) -> List[Dict]:
-        """Generate accessory exercises using AI recommendations."""
-        available_exercises = []
+                                     focus_areas: List[str], available_seconds: int,
+                                     preferences: Dict, recent: Optional[RecentExercises] = None) -> Tuple[List[Dict], int]:
+        """
+        Generate accessory exercises using AI recommendations.
         
-        # Filter exercises
-        for exercise in self.exercises:
-            if (exercise.get('type') == 'accessory' and
-                exercise.get('category') in ['bodyweight', 'functional'] and
-                self._exercise_matches_criteria(exercise, equipment, experience_level)):
-                available_exercises.append(exercise)
+        Returns:
+            Tuple[List[Dict], int]: Exercises, and the section's length in seconds
+        """
+        available_exercises = self._candidate_pool('accessory', equipment, experience_level)
         
-        # Use AI to recommend exercises
-        num_exercises = min(2, max(1, available_time // 10))
-        recommended_exercises = self.recommend_exercises(available_exercises, num_exercises)
+        # Rank exercises with the AI, then fit exercises and sets to the time available
+        ranked_exercises = self.recommend_exercises(available_exercises, MAX_CANDIDATES, preferences, recent)
+        
+        def plan(exercise: Dict) -> Tuple[int, int]:
+            predicted_difficulty = self.predict_exercise_difficulty(exercise, preferences)
+            sets, _ = self._ai_determine_accessory_reps(exercise, predicted_difficulty)
+            return sets, exercise.get('time_per_set', DEFAULT_SET_SECONDS) + ACCESSORY_REST_SECONDS
+        
+        selected, seconds = fit_section(ranked_exercises, available_seconds, plan, max_exercises=2, min_exercises=1)
         
         exercises = []
-        for exercise in recommended_exercises:
-            predicted_difficulty = self.predict_exercise_difficulty(exercise, self.user_preferences)
-            sets, reps = self._ai_determine_accessory_reps(exercise, predicted_difficulty)
+        for exercise, sets in selected:
+            predicted_difficulty = self.predict_exercise_difficulty(exercise, preferences)
+            _, reps = self._ai_determine_accessory_reps(exercise, predicted_difficulty)
             
             exercises.append({
                 'name': exercise['name'],
@@ -527,7 +660,7 @@ class SimpleAIWorkoutPlanner:
                 'notes': f"AI-recommended BJJ accessory: {sets}x{reps}, focus on form"
             })
         
-        return exercises
+        return exercises, seconds
     
     def _ai_determine_sets_reps(self, exercise: Dict, predicted_difficulty: float) -> Tuple[int, int]:
         """Determine sets and reps using AI predictions."""
@@ -579,16 +712,54 @@ class SimpleAIWorkoutPlanner:
     
     def _analyze_format_preferences(self) -> Dict[str, float]:
         """Analyze user preferences for workout formats."""
-        format_scores = {'amrap': 0, 'emom': 0, 'fortime': 0}
+        total_enjoyment = self.user_history.aggregate('enjoyment_rating', 'sum')
         
-        for feedback in self.user_history:
-            enjoyment = feedback.get('enjoyment_rating', 5)
-            # This is a simplified analysis - in a real system, you'd track format per workout
-            format_scores['amrap'] += enjoyment * 0.33
-            format_scores['emom'] += enjoyment * 0.33
-            format_scores['fortime'] += enjoyment * 0.34
+        # This is a simplified analysis - in a real system, you'd track format per workout
+        return {
+            'amrap': total_enjoyment * 0.33,
+            'emom': total_enjoyment * 0.33,
+            'fortime': total_enjoyment * 0.34
+        }
+    
+    def warm_candidate_pools(self, preferences: Optional[Dict] = None):
+        """Precompute every section's candidate pool for `preferences`, e.g. before fanning out."""
+        preferences = preferences if preferences is not None else self.user_preferences
+        equipment = preferences.get('equipment', ['bodyweight'])
+        experience_level = preferences.get('experience_level', 'beginner')
+        for section in ('strength', 'metcon', 'accessory'):
+            self._candidate_pool(section, equipment, experience_level)
+    
+    def _candidate_pool(self, section: str, equipment: List[str], experience_level: str) -> List[Dict]:
+        """
+        Return the catalog exercises eligible for a workout section.
         
-        return format_scores
+        Pools are cached per (section, equipment, experience level) so repeated
+        and batched generation share the filtering work. Callers must not
+        mutate the returned list.
+        """
+        key = (section, frozenset(equipment), experience_level)
+        pool = self._candidate_pools.get(key)
+        if pool is None:
+            if len(self._candidate_pools) >= MAX_CANDIDATE_POOLS:
+                self._candidate_pools.clear()
+            with timed('catalog_filter'):
+                pool = [exercise for exercise in self.exercises
+                        if self._exercise_in_section(exercise, section) and
+                        self._exercise_matches_criteria(exercise, equipment, experience_level)]
+            self._candidate_pools[key] = pool
+        return pool
+    
+    def _exercise_in_section(self, exercise: Dict, section: str) -> bool:
+        """Check if an exercise belongs in a workout section."""
+        if section == 'strength':
+            return exercise.get('type') == 'strength'
+        if section == 'metcon':
+            return (exercise.get('type') == 'conditioning' and
+                    exercise.get('category') in ['metcon', 'explosive', 'functional'])
+        if section == 'accessory':
+            return (exercise.get('type') == 'accessory' and
+                    exercise.get('category') in ['bodyweight', 'functional'])
+        return False
     
     def _exercise_matches_criteria(self, exercise: Dict, equipment: List[str], experience_level: str) -> bool:
         """Check if exercise matches user criteria."""
@@ -606,15 +777,23 @@ class SimpleAIWorkoutPlanner:
         
         return exercise_level_index <= user_level_index
     
-    def save_workout(self, workout: Dict, filename: str = None):
-        """Save workout to file."""
-        if not filename:
-            filename = f"ai_workout_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    @timed_stage('save_workout')
+    def save_workout(self, workout: Dict, filename: str = None) -> str:
+        """
+        Save workout to a JSON file in the workout storage.
         
-        with open(filename, 'w') as f:
-            json.dump(workout, f, indent=2)
+        The file is written in the background; the returned path can be read
+        back immediately through the storage.
         
-        logger.info(f"AI workout saved to {filename}")
+        Returns:
+            str: Path the workout is saved under
+        """
+        if not filename:
+            filename = f"{workout['id']}.json"
+        
+        path = self.storage.save(workout, filename)
+        logger.info(f"AI workout saved to {path}")
+        return path
     
     def get_user_insights(self) -> Dict:
         """Get AI-generated insights about user's training."""
@@ -625,9 +804,9 @@ class SimpleAIWorkoutPlanner:
             }
         
         # Analyze patterns
-        avg_difficulty = np.mean([f.get('difficulty_rating', 5) for f in self.user_history])
-        avg_enjoyment = np.mean([f.get('enjoyment_rating', 5) for f in self.user_history])
-        avg_completion = np.mean([f.get('completion_rate', 0.5) for f in self.user_history])
+        avg_difficulty = self.user_history.aggregate('difficulty_rating')
+        avg_enjoyment = self.user_history.aggregate('enjoyment_rating')
+        avg_completion = self.user_history.aggregate('completion_rate')
         
         insights = {
             'total_workouts': len(self.user_history),
@@ -640,22 +819,35 @@ class SimpleAIWorkoutPlanner:
         
         return insights
     
+    def get_training_rollups(self, period: str = 'week', start: Optional[float] = None,
+                             end: Optional[float] = None) -> Dict:
+        """
+        Get weekly or monthly difficulty/enjoyment/completion trends.
+        
+        Args:
+            period (str): 'week' or 'month'
+            start (float): Earliest bucket to include (epoch seconds)
+            end (float): Latest bucket start to include (epoch seconds)
+        """
+        return self.user_history.rollups.query(period, start, end)
+    
     def _analyze_trends(self) -> Dict:
-        """Analyze trends in user's training."""
-        if len(self.user_history) < 5:
+        """Analyze trends in user's training, comparing the latest week to the prior weeks."""
+        comparison = self.user_history.rollups.compare_recent('week')
+        if comparison is None:
             return {'message': 'Need more data for trend analysis'}
         
-        recent_feedback = self.user_history[-5:]
-        older_feedback = self.user_history[-10:-5] if len(self.user_history) >= 10 else self.user_history[:-5]
-        
-        recent_avg = np.mean([f.get('difficulty_rating', 5) for f in recent_feedback])
-        older_avg = np.mean([f.get('difficulty_rating', 5) for f in older_feedback])
+        recent, baseline = comparison
+        recent_avg = recent['avg_difficulty']
+        older_avg = baseline['avg_difficulty']
         
         difficulty_trend = 'improving' if recent_avg < older_avg else 'stable' if abs(recent_avg - older_avg) < 1 else 'declining'
         
         return {
             'difficulty_trend': difficulty_trend,
-            'progress_rate': (older_avg - recent_avg) / max(older_avg, 1)
+            'progress_rate': (older_avg - recent_avg) / max(older_avg, 1),
+            'enjoyment_change': recent['avg_enjoyment'] - baseline['avg_enjoyment'],
+            'completion_change': recent['avg_completion'] - baseline['avg_completion']
         }
     
     def _generate_insight_recommendations(self, avg_difficulty: float, avg_enjoyment: float, avg_completion: float) -> List[str]:
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+API Response Encoding
+
+Content negotiation for the JSON API. Clients pick an encoding with the
+Accept header (or ?format=json|columnar|msgpack):
+
+- application/json: the regular payload, encoded with orjson when it is
+  installed.
+- application/vnd.workout-planner.columnar+json: every list of objects
+  (e.g. a section's exercises) becomes {"columns", "rows", "constants"},
+  so keys are sent once per list instead of once per exercise, and values
+  shared by every row (ai_recommended, workout_format) are sent once.
+- application/msgpack: the columnar payload as MessagePack, when the
+  msgpack package is installed.
+
+Responses of any encoding are gzip-compressed for clients that accept it.
+Columnar lists can be expanded back with `from_columnar()`.
+"""
+
+from typing import Any, Dict, List
+import gzip
+import json
+
+from flask import Response, request
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+JSON_MIMETYPE = 'application/json'
+COLUMNAR_MIMETYPE = 'application/vnd.workout-planner.columnar+json'
+MSGPACK_MIMETYPE = 'application/msgpack'
+
+FORMATS = {'json': JSON_MIMETYPE, 'columnar': COLUMNAR_MIMETYPE, 'msgpack': MSGPACK_MIMETYPE}
+
+# Smaller bodies are not worth compressing
+MIN_COMPRESS_SIZE = 1024
+COMPRESS_LEVEL = 6
+
+
+_MISSING = object()
+
+
+def to_columnar(value: Any) -> Any:
+    """
+    Recursively convert lists of objects to {"columns", "rows", "constants"}.
+
+    Keys missing from some objects are sent as null in their rows.
+    """
+    if isinstance(value, dict):
+        return {key: to_columnar(item) for key, item in value.items()}
+    if not isinstance(value, list) or not any(isinstance(item, (dict, list)) for item in value):
+        return value
+    if len(value) < 2 or not all(isinstance(item, dict) for item in value):
+        return [to_columnar(item) for item in value]
+
+    columns = list(dict.fromkeys(key for item in value for key in item))
+    constants, varying, nested = {}, [], set()
+    for column in columns:
+        cells = [item.get(column, _MISSING) for item in value]
+        first = cells[0]
+        if isinstance(first, (dict, list)) or any(isinstance(cell, (dict, list)) for cell in cells):
+            nested.add(column)
+            varying.append(column)
+        elif first is not _MISSING and all(cell == first for cell in cells):
+            constants[column] = first
+        else:
+            varying.append(column)
+
+    rows = []
+    for item in value:
+        row = [item.get(column) for column in varying]
+        if nested:
+            row = [to_columnar(cell) if column in nested else cell for column, cell in zip(varying, row)]
+        rows.append(row)
+    table = {'columns': varying, 'rows': rows}
+    if constants:
+        table['constants'] = constants
+    return table
+
+
+def _is_table(value: Any) -> bool:
+    return isinstance(value, dict) and set(value) in ({'columns', 'rows'}, {'columns', 'rows', 'constants'})
+
+
+def from_columnar(value: Any) -> Any:
+    """Inverse of `to_columnar`."""
+    if _is_table(value):
+        constants = value.get('constants', {})
+        return [dict(constants, **{column: from_columnar(cell) for column, cell in zip(value['columns'], row)})
+                for row in value['rows']]
+    if isinstance(value, dict):
+        return {key: from_columnar(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [from_columnar(item) for item in value]
+    return value
+
+
+def dumps_json(payload: Any) -> bytes:
+    """Encode JSON with orjson if available, else compact stdlib JSON."""
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(payload, separators=(',', ':')).encode('utf-8')
+
+
+def available_mimetypes() -> List[str]:
+    mimetypes = [JSON_MIMETYPE, COLUMNAR_MIMETYPE]
+    if msgpack is not None:
+        mimetypes.append(MSGPACK_MIMETYPE)
+    return mimetypes
+
+
+def negotiate_mimetype() -> str:
+    """Response encoding for the current request (JSON unless asked otherwise)."""
+    available = available_mimetypes()
+    requested = FORMATS.get(request.args.get('format', '').lower())
+    if requested in available:
+        return requested
+    return request.accept_mimetypes.best_match(available, default=JSON_MIMETYPE)
+
+
+def encode(payload: Any, mimetype: str) -> bytes:
+    if mimetype == COLUMNAR_MIMETYPE:
+        return dumps_json(to_columnar(payload))
+    if mimetype == MSGPACK_MIMETYPE:
+        return msgpack.packb(to_columnar(payload), use_bin_type=True)
+    return dumps_json(payload)
+
+
+def api_response(payload: Dict, status: int = 200) -> Response:
+    """
+    Build an API response in the negotiated encoding, gzip-compressed if accepted.
+
+    Args:
+        payload (Dict): JSON-serializable response body
+        status (int): HTTP status code
+    """
+    mimetype = negotiate_mimetype()
+    body = encode(payload, mimetype)
+    response = Response(status=status, mimetype=mimetype)
+    if len(body) >= MIN_COMPRESS_SIZE and 'gzip' in request.headers.get('Accept-Encoding', ''):
+        body = gzip.compress(body, compresslevel=COMPRESS_LEVEL)
+        response.headers['Content-Encoding'] = 'gzip'
+    response.set_data(body)
+    response.headers['Vary'] = 'Accept, Accept-Encoding'
+    return response
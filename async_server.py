@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Async API Server
+
+An asyncio entry point for the JSON API of simple_ai_web_app, for
+deployments where slow clients would otherwise pin gunicorn's sync workers.
+Connections are served by aiohttp on one event loop, so a client that
+trickles its request or keeps an idle connection open costs a coroutine,
+not a worker. aiohttp parses HTTP/1.1 and rejects malformed requests
+(bad or conflicting Content-Length, invalid headers) with 400.
+
+- Workout generation runs on a process pool. Each worker holds its own
+  planner and reloads the models whenever the trainer saves new ones.
+  Each user's recent exercises are kept in a SQLite file all workers
+  share, so any worker can steer away from them.
+- Feedback goes through the durable FeedbackQueue. Its batches are applied
+  by a single trainer process, which owns the learned models and the
+  feedback history and also answers /api/insights.
+- SQLite writes (workout store, feedback queue) run in threads. Log records
+  are handed to a background listener thread, so the event loop never
+  blocks on I/O.
+
+Routes (same request and response bodies as the Flask app):
+    GET  /health, /ready
+    POST /api/workout          GET /api/workout/<id>
+    POST /api/feedback         GET /api/feedback/queue
+    GET  /api/insights
+
+Usage:
+    python async_server.py     (PORT, WEB_CONCURRENCY, FEEDBACK_QUEUE_PATH,
+                                WORKOUT_STORE_PATH, RECENT_EXERCISES_PATH
+                                as for the Flask app)
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import json
+import logging
+import logging.handlers
+import multiprocessing
+import os
+import queue
+import signal
+
+from aiohttp import web
+
+from ai_workout_planner_simple import SimpleAIWorkoutPlanner
+from api_encoding import JSON_MIMETYPE, dumps_json
+from feedback_queue import DEFAULT_QUEUE_PATH, FeedbackQueue
+from warmup import WARMUP_PREFERENCES
+from workout_store import DEFAULT_STORE_PATH, WorkoutStore
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+
+# Generations waiting for a worker, per worker, before new requests get 503
+MAX_PENDING_PER_WORKER = 16
+
+# Largest accepted request line or header, and request body
+MAX_HEADER_SIZE = 16 * 1024
+MAX_BODY_SIZE = 1024 * 1024
+
+# Seconds an idle keep-alive connection, or a request body still arriving, is kept
+KEEPALIVE_TIMEOUT = 15.0
+REQUEST_TIMEOUT = 30.0
+
+# Planner of the current pool process (workers and trainer)
+_planner: Optional[SimpleAIWorkoutPlanner] = None
+
+
+def _init_process(data_file: str, model_file: str):
+    """Pool initializer: load the catalog and models once per process."""
+    global _planner
+    _planner = SimpleAIWorkoutPlanner(data_file=data_file, model_file=model_file)
+
+
+def _warm() -> int:
+    for preferences in WARMUP_PREFERENCES:
+        _planner.warm_candidate_pools(preferences)
+        # No user, so nothing is recorded as recently prescribed
+        _planner.generate_workout(preferences)
+    return os.getpid()
+
+
+def _generate(preferences: Dict, user_id: Optional[str] = None) -> Dict:
+    # Pick up models saved by the trainer since this process last loaded them
+    _planner.refresh_models()
+    return _planner.generate_workout(preferences, user_id)
+
+
+def _train(items: List[Tuple[str, Dict]], preferences: Dict) -> int:
+    # Difficulty adjustments are learned for the latest requester's experience level
+    _planner.user_preferences = preferences
+    _planner.record_feedback_batch(items)
+    return len(items)
+
+
+def _insights() -> Dict:
+    return _planner.get_user_insights()
+
+
+class _TrainerClient:
+    """FeedbackQueue planner that applies batches in the trainer process."""
+
+    def __init__(self, server: 'AsyncWorkoutServer'):
+        self.server = server
+
+    def record_feedback_batch(self, items: List[Tuple[str, Dict]]):
+        # Called from the queue's consumer thread, which may block
+        self.server.trainer.submit(_train, items, self.server.last_preferences).result()
+
+
+class AsyncWorkoutServer:
+    """aiohttp server for the workout API."""
+
+    def __init__(self, data_file: str = 'workout_data.json', model_file: str = 'simple_ai_model.pkl',
+                 workers: int = DEFAULT_WORKERS, store_path: str = DEFAULT_STORE_PATH,
+                 queue_path: str = DEFAULT_QUEUE_PATH):
+        """
+        Args:
+            data_file (str): Exercise catalog file
+            model_file (str): Model file, written by the trainer process
+            workers (int): Generation processes
+            store_path (str): Workout store database
+            queue_path (str): Feedback queue database
+        """
+        self.workers = workers
+        # Spawned, not forked: the parent already runs threads
+        context = multiprocessing.get_context('spawn')
+        init = (data_file, model_file)
+        self.pool = ProcessPoolExecutor(workers, mp_context=context, initializer=_init_process, initargs=init)
+        self.trainer = ProcessPoolExecutor(1, mp_context=context, initializer=_init_process, initargs=init)
+        self.workout_store = WorkoutStore(store_path)
+        self.feedback_queue = FeedbackQueue(_TrainerClient(self), queue_path)
+        self.last_preferences: Dict = {}
+        self.ready = False
+        self.port: Optional[int] = None
+        self._runner: Optional[web.AppRunner] = None
+        self._pending = 0
+
+        self.app = web.Application(client_max_size=MAX_BODY_SIZE, middlewares=[_json_errors])
+        self.app.add_routes([
+            web.get('/health', self.health),
+            web.get('/ready', self.readiness),
+            web.post('/api/workout', self.generate_workout),
+            web.get('/api/workout/{workout_id}', self.get_workout),
+            web.post('/api/feedback', self.submit_feedback),
+            web.get('/api/feedback/queue', self.feedback_queue_stats),
+            web.get('/api/insights', self.get_insights),
+        ])
+
+    async def start(self, host: str = '0.0.0.0', port: int = 5003):
+        """Start the pools, warm every process and begin accepting connections."""
+        loop = asyncio.get_running_loop()
+        warmups = [loop.run_in_executor(self.pool, _warm) for _ in range(self.workers)]
+        warmups.append(loop.run_in_executor(self.trainer, _warm))
+        self._runner = web.AppRunner(self.app, handle_signals=False, access_log=None,
+                                     keepalive_timeout=KEEPALIVE_TIMEOUT,
+                                     max_line_size=MAX_HEADER_SIZE, max_field_size=MAX_HEADER_SIZE)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        self.port = self._runner.addresses[0][1]
+        await asyncio.gather(*warmups)
+        self.ready = True
+        logger.info(f"Async API server listening on {host}:{self.port} with {self.workers} workers")
+
+    async def close(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+        await asyncio.to_thread(self.feedback_queue.stop)
+        self.pool.shutdown(cancel_futures=True)
+        self.trainer.shutdown()
+
+    # Routes
+
+    async def health(self, request: web.Request) -> web.Response:
+        return _json_response(200, {'status': 'healthy', 'message': 'AI Workout Planner is running',
+                                     'timestamp': datetime.now().isoformat()})
+
+    async def readiness(self, request: web.Request) -> web.Response:
+        return _json_response(200 if self.ready else 503,
+                              {'status': 'ready' if self.ready else 'warming_up'})
+
+    async def generate_workout(self, request: web.Request) -> web.Response:
+        if self._pending >= self.workers * MAX_PENDING_PER_WORKER:
+            return _json_response(503, {'success': False, 'error': 'Server is busy, please retry shortly'})
+        self._pending += 1
+        try:
+            data = json.loads(await _read_body(request))
+            preferences = data.get('preferences', {})
+            if not preferences:
+                raise ValueError("User preferences must be set before generating workout")
+            self.last_preferences = preferences
+            workout = await asyncio.get_running_loop().run_in_executor(
+                self.pool, _generate, preferences, data.get('user_id'))
+            await asyncio.to_thread(self.workout_store.put, workout)
+            return _json_response(200, {'success': True, 'workout': workout})
+        except web.HTTPException:
+            raise
+        except Exception as e:
+            return _json_response(400, {'success': False, 'error': str(e)})
+        finally:
+            self._pending -= 1
+
+    async def get_workout(self, request: web.Request) -> web.Response:
+        workout_id = request.match_info['workout_id']
+        workout = await asyncio.to_thread(self.workout_store.get, workout_id)
+        if workout is None:
+            return _json_response(404, {'success': False, 'error': f"Workout {workout_id} not found"})
+        return _json_response(200, {'success': True, 'workout': workout})
+
+    async def submit_feedback(self, request: web.Request) -> web.Response:
+        try:
+            data = json.loads(await _read_body(request))
+            queued, idempotency_key = await asyncio.to_thread(
+                self.feedback_queue.submit, data.get('workout_id'), data.get('feedback', {}),
+                request.headers.get('Idempotency-Key') or data.get('idempotency_key')
+            )
+            return _json_response(202, {'success': True, 'status': 'queued' if queued else 'duplicate',
+                                        'idempotency_key': idempotency_key})
+        except web.HTTPException:
+            raise
+        except Exception as e:
+            return _json_response(400, {'success': False, 'error': str(e)})
+
+    async def feedback_queue_stats(self, request: web.Request) -> web.Response:
+        stats = await asyncio.to_thread(self.feedback_queue.stats)
+        return _json_response(200, {'success': True, 'queue': stats})
+
+    async def get_insights(self, request: web.Request) -> web.Response:
+        try:
+            insights = await asyncio.get_running_loop().run_in_executor(self.trainer, _insights)
+            return _json_response(200, {'success': True, 'insights': insights})
+        except Exception as e:
+            return _json_response(400, {'success': False, 'error': str(e)})
+
+
+async def _read_body(request: web.Request) -> bytes:
+    """Read the request body, giving up on a client that trickles it."""
+    try:
+        return await asyncio.wait_for(request.read(), REQUEST_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise web.HTTPRequestTimeout(reason="Request body not received in time")
+
+
+def _json_response(status: int, payload: Dict) -> web.Response:
+    headers = {'Retry-After': '1'} if status == 503 else None
+    return web.Response(status=status, body=dumps_json(payload), content_type=JSON_MIMETYPE, headers=headers)
+
+
+@web.middleware
+async def _json_errors(request: web.Request, handler) -> web.StreamResponse:
+    """Answer unknown routes, oversized bodies and other HTTP errors in the API's JSON shape."""
+    try:
+        return await handler(request)
+    except web.HTTPException as e:
+        if e.status < 400:
+            raise
+        return _json_response(e.status, {'success': False, 'error': e.reason})
+
+
+def _log_in_background() -> logging.handlers.QueueListener:
+    """Route root log records through a queue so handlers write off the event loop."""
+    root = logging.getLogger()
+    records = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(records, *root.handlers, respect_handler_level=True)
+    root.handlers = [logging.handlers.QueueHandler(records)]
+    listener.start()
+    return listener
+
+
+async def serve(host: str = '0.0.0.0', port: int = 5003, **options):
+    """Run the server until SIGINT or SIGTERM."""
+    server = AsyncWorkoutServer(**options)
+    await server.start(host, port)
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    try:
+        await stop.wait()
+    finally:
+        await server.close()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    listener = _log_in_background()
+    try:
+        asyncio.run(serve(
+            port=int(os.environ.get('PORT', 5003)),
+            store_path=os.environ.get('WORKOUT_STORE_PATH', DEFAULT_STORE_PATH),
+            queue_path=os.environ.get('FEEDBACK_QUEUE_PATH', DEFAULT_QUEUE_PATH)
+        ))
+    finally:
+        listener.stop()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Batch Workout Generation
+
+Generates workouts for many preference sets in one call. Requests share the
+planner's cached candidate pools and memoized predictions, so a batch costs
+far less than the same number of single requests. Results can be collected
+in a list or streamed as each workout completes.
+
+Workouts are generated one after another. Generation is pure Python, so
+threads only contend for the GIL, and a process pool spends more on
+start-up and pickling than a batch takes (benchmarks/bench_batch_generation.py).
+"""
+
+from typing import Dict, Iterator, List
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Largest number of preference sets accepted in one batch
+MAX_BATCH_SIZE = 100
+
+
+def validate_batch(preference_sets) -> List[Dict]:
+    """
+    Check a batch request body.
+
+    Args:
+        preference_sets: Sequence of preference dictionaries
+
+    Returns:
+        List[Dict]: The preference sets as a list
+
+    Raises:
+        ValueError: If the batch is empty, too large or has entries that
+            are not dicts or are empty (which the planners would otherwise
+            replace with their shared preferences)
+    """
+    if not isinstance(preference_sets, list) or not preference_sets:
+        raise ValueError("preferences must be a non-empty list")
+    if len(preference_sets) > MAX_BATCH_SIZE:
+        raise ValueError(f"Batch too large: {len(preference_sets)} (max {MAX_BATCH_SIZE})")
+    for index, preferences in enumerate(preference_sets):
+        if not isinstance(preferences, dict):
+            raise ValueError(f"preferences[{index}] must be an object")
+        if not preferences:
+            raise ValueError(f"preferences[{index}] must not be empty")
+    return preference_sets
+
+
+def _generate_one(planner, index: int, preferences: Dict, with_progress: bool = False) -> Dict:
+    """Generate one workout, capturing failures as a per-item result."""
+    try:
+        workout = planner.generate_workout(preferences)
+        result = {'index': index, 'success': True, 'workout': workout}
+        if with_progress:
+            result['progress_prediction'] = planner.predict_progress(workout)
+        return result
+    except Exception as e:
+        logger.error(f"Batch item {index} failed: {e}")
+        return {'index': index, 'success': False, 'error': str(e)}
+
+
+def iter_workouts(planner, preference_sets: List[Dict], with_progress: bool = False) -> Iterator[Dict]:
+    """
+    Generate workouts in request order, yielding each result as it completes.
+
+    Args:
+        planner: AIWorkoutPlanner or SimpleAIWorkoutPlanner instance
+        preference_sets (List[Dict]): One preference dictionary per workout
+        with_progress (bool): Also attach the planner's 'progress_prediction'
+
+    Yields:
+        Dict: {'index', 'success', 'workout'} or {'index', 'success', 'error'}
+    """
+    preference_sets = validate_batch(preference_sets)
+    for index, preferences in enumerate(preference_sets):
+        yield _generate_one(planner, index, preferences, with_progress)
+
+
+def generate_workouts(planner, preference_sets: List[Dict], with_progress: bool = False) -> List[Dict]:
+    """
+    Generate workouts and return them in request order.
+
+    Args:
+        planner: AIWorkoutPlanner or SimpleAIWorkoutPlanner instance
+        preference_sets (List[Dict]): One preference dictionary per workout
+        with_progress (bool): Also attach the planner's 'progress_prediction'
+
+    Returns:
+        List[Dict]: Per-item results ordered like `preference_sets`
+    """
+    return list(iter_workouts(planner, preference_sets, with_progress))
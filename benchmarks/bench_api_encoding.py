@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Benchmark: API response size and serialization time per encoding
+
+Encodes a single /api/workout response and a 20-workout batch response
+from the AI planner as stdlib JSON (what jsonify produced), fast JSON,
+columnar JSON and MessagePack (if installed), and reports bytes on the
+wire with and without gzip plus encode time.
+
+Usage:
+    python benchmarks/bench_api_encoding.py [batch_size]
+"""
+
+import gzip
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_workout_planner import AIWorkoutPlanner
+from api_encoding import (COLUMNAR_MIMETYPE, COMPRESS_LEVEL, JSON_MIMETYPE, MSGPACK_MIMETYPE,
+                          available_mimetypes, encode)
+
+PREFERENCES = [
+    {'time_available': minutes, 'goal': goal, 'experience_level': level,
+     'equipment': ['bodyweight', 'barbell', 'dumbbells', 'kettlebell', 'pull-up bar']}
+    for minutes in (45, 60) for goal in ('strength', 'conditioning', 'bjj_performance')
+    for level in ('intermediate', 'advanced')
+]
+
+
+def timed_us(func, repeat: int = 200) -> float:
+    """Best-of-5 mean time per call in microseconds."""
+    best = float('inf')
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            func()
+        best = min(best, (time.perf_counter() - start) / repeat)
+    return best * 1e6
+
+
+def report(label: str, payload: dict):
+    print(f"{label}")
+    print(f"  {'encoding':<18} {'bytes':>8} {'gzip':>8} {'encode us':>10}")
+    encoders = [('jsonify (stdlib)', lambda: json.dumps(payload, indent=None, sort_keys=True).encode())]
+    names = {JSON_MIMETYPE: 'json (fast)', COLUMNAR_MIMETYPE: 'columnar json', MSGPACK_MIMETYPE: 'msgpack'}
+    encoders += [(names[mimetype], lambda m=mimetype: encode(payload, m)) for mimetype in available_mimetypes()]
+    for name, encoder in encoders:
+        body = encoder()
+        print(f"  {name:<18} {len(body):8d} {len(gzip.compress(body, COMPRESS_LEVEL)):8d} {timed_us(encoder):10.1f}")
+
+
+def main():
+    batch_size = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    directory = tempfile.mkdtemp()
+    planner = AIWorkoutPlanner(data_file=os.path.join(directory, 'workout_data.json'),
+                               model_file=os.path.join(directory, 'model.pkl'))
+    workouts = [planner.generate_workout(PREFERENCES[i % len(PREFERENCES)]) for i in range(batch_size)]
+
+    report('Single workout (/api/workout)', {'success': True, 'workout': workouts[0]})
+    report(f"Batch of {batch_size} (/api/workouts/batch)", {
+        'success': True,
+        'results': [{'index': i, 'success': True, 'workout': w, 'progress_prediction': planner.predict_progress(w)}
+                    for i, w in enumerate(workouts)]
+    })
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Benchmark: requests/sec and latency, gunicorn sync workers vs async_server
+
+Starts simple_ai_web_app under gunicorn (gunicorn.conf.py, sync workers) and
+async_server.py with the same number of processes. Each is then loaded with
+concurrent clients posting /api/workout for a fixed time, twice: once with
+well-behaved clients, and once while extra slow clients hold connections
+open mid-upload (they send their headers and half of the body, then stall).
+Reports throughput and p50/p99 latency. Linux only; requires gunicorn.
+
+Usage:
+    python benchmarks/bench_async_server.py [workers] [clients] [seconds]
+"""
+
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SLOW_CLIENTS = 16
+
+BODY = json.dumps({'preferences': {'time_available': 45, 'goal': 'bjj_performance',
+                                   'equipment': ['bodyweight', 'kettlebell'],
+                                   'experience_level': 'intermediate'}}).encode()
+REQUEST = (f"POST /api/workout HTTP/1.1\r\nHost: bench\r\nContent-Type: application/json\r\n"
+           f"Connection: close\r\nContent-Length: {len(BODY)}\r\n\r\n").encode()
+
+
+async def client(port: int, deadline: float, latencies: list, errors: list):
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(REQUEST + BODY)
+            response = await reader.read()
+            writer.close()
+            if not response.startswith(b'HTTP/1.1 200'):
+                errors.append(response[:12])
+                continue
+        except OSError as e:
+            errors.append(e)
+            continue
+        latencies.append(time.perf_counter() - start)
+
+
+async def slow_client(port: int, deadline: float):
+    """Send the headers and half the body, then stall until the deadline."""
+    try:
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(REQUEST + BODY[:len(BODY) // 2])
+        await writer.drain()
+        await asyncio.sleep(deadline - time.perf_counter())
+        writer.close()
+    except OSError:
+        pass
+
+
+async def load(port: int, clients: int, seconds: float, slow: int) -> dict:
+    latencies, errors = [], []
+    deadline = time.perf_counter() + seconds
+    stallers = [asyncio.create_task(slow_client(port, deadline)) for _ in range(slow)]
+    await asyncio.sleep(0.2 if slow else 0)
+    started = time.perf_counter()
+    await asyncio.gather(*(client(port, deadline, latencies, errors) for _ in range(clients)))
+    elapsed = time.perf_counter() - started
+    await asyncio.gather(*stallers)
+    latencies.sort()
+    percentile = lambda p: latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000 if latencies else 0.0
+    return {'rps': len(latencies) / elapsed, 'p50': percentile(0.50), 'p99': percentile(0.99),
+            'errors': len(errors)}
+
+
+def start_server(command: list, directory: str, port: int, workers: int) -> subprocess.Popen:
+    env = dict(os.environ, PYTHONPATH=REPO, PORT=str(port), WEB_CONCURRENCY=str(workers),
+               WORKOUT_STORAGE_ROOT=os.path.join(directory, 'saved'),
+               JINJA_CACHE_DIR=os.path.join(directory, 'jinja'))
+    server = subprocess.Popen(command, cwd=directory, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    for _ in range(600):
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/ready", timeout=1)
+            return server
+        except OSError:
+            time.sleep(0.1)
+    server.terminate()
+    raise RuntimeError(f"{command} did not become ready")
+
+
+def main():
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    clients = int(sys.argv[2]) if len(sys.argv) > 2 else 32
+    seconds = float(sys.argv[3]) if len(sys.argv) > 3 else 5.0
+    servers = {
+        'gunicorn sync': [sys.executable, '-m', 'gunicorn', '-c', os.path.join(REPO, 'gunicorn.conf.py'),
+                          'simple_ai_web_app:create_app()'],
+        'async_server': [sys.executable, os.path.join(REPO, 'async_server.py')]
+    }
+
+    print(f"POST /api/workout, {workers} worker processes, {clients} clients, {seconds:.0f}s per run")
+    print(f"  {'server':<15} {'slow clients':>12} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for offset, (name, command) in enumerate(servers.items()):
+        directory = tempfile.mkdtemp()
+        port = 8620 + offset
+        server = start_server(command, directory, port, workers)
+        try:
+            for slow in (0, SLOW_CLIENTS):
+                result = asyncio.run(load(port, clients, seconds, slow))
+                print(f"  {name:<15} {slow:>12} {result['rps']:8.0f} {result['p50']:8.1f} "
+                      f"{result['p99']:8.1f} {result['errors']:>7}")
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == '__main__':
+    main()
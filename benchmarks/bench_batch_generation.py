@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Benchmark: batch generation on threads, processes and a plain loop
+
+Generates the same batch of workouts (every weekly-plan day type at every
+level) with a plain loop, with thread pools of several sizes sharing one
+planner, and with a process pool whose workers each load their own planner.
+The process pool is timed with and without its start-up. Uses the simple
+AI planner's built-in catalog and a model file in a temporary directory.
+
+Usage:
+    python benchmarks/bench_batch_generation.py [batch size]
+"""
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import logging
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_workout_planner_simple import SimpleAIWorkoutPlanner
+from weekly_planning import daily_preferences
+
+BASE_PREFERENCES = {'time_available': 60, 'goal': 'bjj_performance',
+                    'equipment': ['bodyweight', 'dumbbells', 'kettlebell', 'barbell', 'bench', 'rack']}
+
+ROUNDS = 5
+
+_planner = None
+
+
+def _init_process(data_file: str, model_file: str, recent_path: str):
+    global _planner
+    logging.disable(logging.WARNING)
+    _planner = SimpleAIWorkoutPlanner(data_file=data_file, model_file=model_file, recent_path=recent_path)
+
+
+def _generate(preferences):
+    return _planner.generate_workout(preferences)
+
+
+def best_ms(func) -> float:
+    best = float('inf')
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 28
+    logging.disable(logging.WARNING)
+    directory = tempfile.mkdtemp()
+    files = (os.path.join(directory, 'missing.json'), os.path.join(directory, 'model.pkl'),
+             os.path.join(directory, 'recent.db'))
+    _init_process(*files)
+    planner = _planner
+
+    batch = []
+    while len(batch) < size:
+        for level in ('beginner', 'intermediate', 'advanced'):
+            batch.extend(daily_preferences({**BASE_PREFERENCES, 'experience_level': level}).values())
+    batch = batch[:size]
+    for preferences in batch:
+        planner.warm_candidate_pools(preferences)
+
+    print(f"{size} workouts, {os.cpu_count()} CPU(s), best of {ROUNDS}:")
+    loop = best_ms(lambda: [planner.generate_workout(preferences) for preferences in batch])
+    print(f"  {'plain loop':<32} {loop:8.2f} ms")
+    for workers in (2, 4, 7):
+        with ThreadPoolExecutor(workers) as executor:
+            elapsed = best_ms(lambda: list(executor.map(planner.generate_workout, batch)))
+        print(f"  {f'{workers} threads':<32} {elapsed:8.2f} ms  ({loop / elapsed:.2f}x)")
+
+    context = multiprocessing.get_context('spawn')
+    for workers in (2, 4):
+        start = time.perf_counter()
+        with ProcessPoolExecutor(workers, mp_context=context, initializer=_init_process,
+                                 initargs=files) as executor:
+            list(executor.map(_generate, batch))
+            cold = (time.perf_counter() - start) * 1000
+            warm = best_ms(lambda: list(executor.map(_generate, batch)))
+        print(f"  {f'{workers} processes, started':<32} {warm:8.2f} ms  ({loop / warm:.2f}x)")
+        print(f"  {f'{workers} processes, incl. start-up':<32} {cold:8.2f} ms  ({loop / cold:.2f}x)")
+
+
+if __name__ == '__main__':
+    main()
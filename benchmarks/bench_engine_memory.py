@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Benchmark: resident memory of separate engine deployments vs one registry
+
+Writes a synthetic catalog, then measures the RSS of a process that loads
+and exercises a single engine (once per engine, as in the three separate
+deployments) and of one process hosting all three through EngineRegistry.
+Linux only (reads /proc/self/status).
+
+Usage:
+    python benchmarks/bench_engine_memory.py [num_exercises]
+"""
+
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = """
+import sys
+sys.path.insert(0, {repo!r})
+import logging
+logging.disable(logging.WARNING)
+from engine_registry import EngineRegistry
+registry = EngineRegistry('workout_data.json')
+preferences = {{'time_available': 45, 'goal': 'bjj_performance', 'experience_level': 'advanced',
+               'equipment': ['bodyweight', 'barbell', 'dumbbells', 'kettlebell']}}
+for name in {engines!r}:
+    registry.get(name).generate_workout(preferences)
+with open('/proc/self/status') as f:
+    print(next(int(line.split()[1]) for line in f if line.startswith('VmRSS')))
+"""
+
+ENGINES = ['rule_based', 'simple_ai', 'ml']
+
+
+def make_catalog(directory: str, num_exercises: int):
+    """Write a synthetic catalog usable by every engine."""
+    rng = random.Random(42)
+    kinds = [('strength', 'compound', 'hip_power'), ('conditioning', 'metcon', 'explosive_power'),
+             ('accessory', 'bodyweight', 'core_strength')]
+    exercises = []
+    for i in range(num_exercises):
+        kind, category, focus = kinds[i % len(kinds)]
+        exercises.append({
+            'name': f"Exercise {i}", 'type': kind, 'category': category, 'bjj_focus': focus,
+            'muscle_group': rng.choice(['legs', 'back', 'chest', 'core', 'full_body']),
+            'equipment': rng.sample(['bodyweight', 'barbell', 'dumbbells', 'kettlebell'], 2),
+            'difficulty': rng.choice(['beginner', 'intermediate', 'advanced']),
+            'time_per_set': 60
+        })
+    template = {'description': 'Synthetic', 'rest_between_sets': 60, 'rest_between_exercises': 90,
+                'focus': ['strength', 'conditioning', 'accessory'], 'duration_range': [30, 90]}
+    workout_types = {name: dict(template) for name in ('bjj_performance', 'strength', 'metcon', 'endurance')}
+    with open(os.path.join(directory, 'workout_data.json'), 'w') as f:
+        json.dump({'exercises': exercises, 'workout_types': workout_types, 'muscle_groups': {}}, f)
+
+
+def rss_mb(directory: str, engines: list) -> float:
+    output = subprocess.run([sys.executable, '-c', CHILD.format(repo=REPO, engines=engines)],
+                            cwd=directory, capture_output=True, text=True, check=True).stdout
+    return int(output.split()[-1]) / 1024
+
+
+def main():
+    num_exercises = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    directory = tempfile.mkdtemp()
+    make_catalog(directory, num_exercises)
+
+    print(f"Resident memory, {num_exercises} exercises:")
+    separate = 0.0
+    for engine in ENGINES:
+        rss = rss_mb(directory, [engine])
+        separate += rss
+        print(f"  {engine:<28} {rss:7.1f} MB")
+    print(f"  {'three deployments, total':<28} {separate:7.1f} MB")
+    print(f"  {'one registry process':<28} {rss_mb(directory, ENGINES):7.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark: columnar history store vs. list-of-dicts history
+
+Times user insights and ML training-data preparation over a synthetic
+feedback history (1M rows by default) using the original per-entry
+`.get(...)` walks and the HistoryStore column operations.
+
+Usage:
+    python benchmarks/bench_history_store.py [num_rows]
+"""
+
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_workout_planner import AIWorkoutPlanner
+from history_store import HistoryStore
+
+
+def make_history(num_rows: int) -> list:
+    """Create synthetic feedback entries, one every 10 minutes."""
+    rng = np.random.default_rng(42)
+    start = datetime(2020, 1, 1)
+    difficulty = rng.integers(1, 11, num_rows)
+    enjoyment = rng.integers(1, 11, num_rows)
+    completion = rng.random(num_rows).round(2)
+    return [
+        {
+            'workout_id': f"ai_workout_{i}",
+            'timestamp': (start + timedelta(minutes=10 * i)).isoformat(),
+            'difficulty_rating': int(difficulty[i]),
+            'enjoyment_rating': int(enjoyment[i]),
+            'completion_rate': float(completion[i]),
+            'exercise_ratings': {'Burpees': int(enjoyment[i]), 'Planks': 6}
+        }
+        for i in range(num_rows)
+    ]
+
+
+def legacy_insights(history: list) -> tuple:
+    """Averages as computed before the columnar store."""
+    return (np.mean([f.get('difficulty_rating', 5) for f in history]),
+            np.mean([f.get('enjoyment_rating', 5) for f in history]),
+            np.mean([f.get('completion_rate', 0.5) for f in history]))
+
+
+def legacy_training_data(planner: AIWorkoutPlanner, history: list) -> tuple:
+    """Training-data preparation as implemented before the columnar store."""
+    features, difficulty_targets, recommendation_targets, progress_targets = [], [], [], []
+    for i, feedback in enumerate(history):
+        features.append(planner._extract_features(feedback))
+        difficulty_targets.append(feedback.get('difficulty_rating', 5))
+        recommendation_targets.append(feedback.get('enjoyment_rating', 5))
+        if i > 0:
+            progress_targets.append(history[i - 1].get('difficulty_rating', 5) - feedback.get('difficulty_rating', 5))
+        else:
+            progress_targets.append(0)
+    return (np.array(features), np.array(difficulty_targets),
+            np.array(recommendation_targets), np.array(progress_targets))
+
+
+def timed(label: str, func, repeat: int = 3):
+    """Run func `repeat` times and print the best wall-clock time."""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    print(f"  {label:<32} {best * 1000:10.1f} ms")
+    return result
+
+
+def main():
+    num_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    print(f"Building {num_rows:,} feedback rows...")
+    history = make_history(num_rows)
+
+    start = time.perf_counter()
+    store = HistoryStore(history)
+    print(f"  HistoryStore load: {time.perf_counter() - start:.2f} s")
+
+    planner = AIWorkoutPlanner(model_file=os.path.join(tempfile.mkdtemp(), 'ai_model.pkl'))
+    planner.set_user_preferences({'time_available': 45, 'equipment': ['bodyweight'],
+                                  'experience_level': 'intermediate', 'focus_areas': []})
+
+    print("\nInsights (average difficulty / enjoyment / completion)")
+    legacy = timed('list of dicts', lambda: legacy_insights(history))
+    columnar = timed('columnar', lambda: (store.aggregate('difficulty_rating'),
+                                          store.aggregate('enjoyment_rating'),
+                                          store.aggregate('completion_rate')))
+    assert np.allclose(legacy, columnar)
+
+    print("\nTraining-data preparation")
+    legacy = timed('list of dicts', lambda: legacy_training_data(planner, history), repeat=1)
+    columnar = timed('columnar', lambda: planner._prepare_training_data(store))
+    assert all(np.allclose(a, b) for a, b in zip(legacy, columnar))
+
+    print("\nRange scan (one month)")
+    month_start = datetime(2020, 6, 1).timestamp()
+    month_end = datetime(2020, 7, 1).timestamp()
+    timed('list of dicts', lambda: [f for f in history
+                                    if month_start <= datetime.fromisoformat(f['timestamp']).timestamp() <= month_end])
+    timed('columnar', lambda: store.scan(month_start, month_end))
+
+
+if __name__ == '__main__':
+    main()
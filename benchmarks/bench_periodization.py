@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Benchmark: incremental vs full regeneration of a periodized plan
+
+Times generating a whole mesocycle, then applying single-day changes
+(a preference override, and feedback on a hard session) with incremental
+regeneration, against regenerating the whole cycle for each change. Uses
+the simple AI planner's built-in catalog and a model file in a temporary
+directory.
+
+Usage:
+    python benchmarks/bench_periodization.py [weeks]
+"""
+
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_workout_planner_simple import SimpleAIWorkoutPlanner
+from periodization import MesocyclePlan
+
+PREFERENCES = {'time_available': 60, 'goal': 'bjj_performance', 'experience_level': 'intermediate',
+               'equipment': ['bodyweight', 'dumbbells', 'kettlebell', 'barbell', 'bench', 'rack']}
+
+ROUNDS = 20
+
+
+def timed_ms(func) -> float:
+    start = time.perf_counter()
+    func()
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    weeks = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    logging.disable(logging.WARNING)
+    directory = tempfile.mkdtemp()
+    planner = SimpleAIWorkoutPlanner(data_file=os.path.join(directory, 'missing.json'),
+                                     model_file=os.path.join(directory, 'model.pkl'))
+
+    plan = MesocyclePlan(PREFERENCES, weeks=weeks)
+    full = min(timed_ms(lambda: MesocyclePlan(PREFERENCES, weeks=weeks).generate(planner)) for _ in range(5))
+    plan.generate(planner)
+    print(f"{weeks}-week plan, {len(plan.days)} days:")
+    print(f"  {'whole cycle':<42} {full:8.2f} ms")
+
+    days = list(plan.schedule)
+    changes = {
+        'override one day, regenerate affected': lambda n: plan.update_day(
+            1 + n % weeks, days[n % len(days)], preferences={'time_available': 30 + n}),
+        'hard-session feedback, regenerate affected': lambda n: plan.update_day(
+            1 + n % weeks, days[n % len(days)], feedback={'difficulty_rating': 9 - n % 2 * 4})
+    }
+    for name, change in changes.items():
+        regenerated, elapsed = 0, 0.0
+        for n in range(ROUNDS):
+            start = time.perf_counter()
+            change(n)
+            regenerated += len(plan.generate(planner))
+            round_trip = MesocyclePlan.from_dict(plan.to_dict())
+            elapsed += time.perf_counter() - start
+        assert not round_trip.stale_days()
+        print(f"  {name:<42} {elapsed / ROUNDS * 1000:8.2f} ms  ({regenerated / ROUNDS:.1f} days regenerated)")
+
+
+if __name__ == '__main__':
+    main()
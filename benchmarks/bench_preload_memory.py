@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Benchmark: resident memory per gunicorn worker, with and without preloading
+
+Starts simple_ai_web_app under gunicorn with 8 workers three times: without
+a config (each worker imports the app and loads its own catalog and models),
+with --preload alone, and with gunicorn.conf.py, which preloads them in the
+master and freezes them before forking. Each worker serves a few workouts, then
+its RSS, PSS and USS (private pages) are read from /proc. Linux only;
+requires gunicorn.
+
+Usage:
+    python benchmarks/bench_preload_memory.py [num_exercises]
+"""
+
+import json
+import os
+import pickle
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORKERS = 8
+REQUESTS_PER_WORKER = 20
+
+
+def make_catalog(directory: str, num_exercises: int):
+    """Write a synthetic exercise catalog and matching model file."""
+    rng = random.Random(42)
+    sections = [('strength', 'compound'), ('conditioning', 'metcon'), ('accessory', 'bodyweight')]
+    exercises = []
+    for i in range(num_exercises):
+        kind, category = sections[i % len(sections)]
+        exercises.append({
+            'name': f"Exercise {i}", 'type': kind, 'category': category,
+            'muscle_group': rng.choice(['legs', 'back', 'chest', 'core', 'full_body']),
+            'equipment': rng.sample(['bodyweight', 'barbell', 'dumbbells', 'kettlebell'], 2),
+            'difficulty': rng.choice(['beginner', 'intermediate', 'advanced']),
+            'time_per_set': 60, 'bjj_focus': 'hip_power'
+        })
+    with open(os.path.join(directory, 'workout_data.json'), 'w') as f:
+        json.dump({'exercises': exercises, 'workout_types': {}, 'muscle_groups': {}}, f)
+    with open(os.path.join(directory, 'simple_ai_model.pkl'), 'wb') as f:
+        pickle.dump({'exercise_weights': {e['name']: 1.0 for e in exercises},
+                     'difficulty_adjustments': {'beginner': 0.0, 'intermediate': 0.0, 'advanced': 0.0},
+                     'user_patterns': {'preferred_equipment': {}, 'preferred_difficulty': 5.0,
+                                       'completion_rate': 0.8, 'enjoyment_threshold': 6.0}}, f)
+
+
+def memory_kb(pid: int) -> dict:
+    """RSS, PSS and USS of a process from /proc/<pid>/smaps_rollup."""
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                fields[parts[0].rstrip(':')] = int(parts[1])
+    return {'rss': fields['Rss'], 'pss': fields['Pss'],
+            'uss': fields['Private_Clean'] + fields['Private_Dirty']}
+
+
+def run(directory: str, config: str, port: int, *options: str) -> list:
+    """Boot gunicorn, exercise every worker, and return per-worker memory."""
+    env = dict(os.environ, PYTHONPATH=REPO, WORKOUT_STORAGE_ROOT=os.path.join(directory, 'saved'),
+               JINJA_CACHE_DIR=os.path.join(directory, 'jinja'))
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', config, '--chdir', directory,
+         '-w', str(WORKERS), '-b', f"127.0.0.1:{port}", *options, 'simple_ai_web_app:create_app()'],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        url = f"http://127.0.0.1:{port}"
+        for _ in range(600):
+            try:
+                urllib.request.urlopen(f"{url}/health", timeout=1)
+                break
+            except OSError:
+                time.sleep(0.1)
+        body = json.dumps({'preferences': {'time_available': 45, 'goal': 'bjj_performance',
+                                           'equipment': ['bodyweight', 'kettlebell'],
+                                           'experience_level': 'intermediate'}}).encode()
+        for _ in range(WORKERS * REQUESTS_PER_WORKER):
+            request = urllib.request.Request(f"{url}/api/workout", data=body,
+                                             headers={'Content-Type': 'application/json'})
+            urllib.request.urlopen(request, timeout=30).read()
+        with open(f"/proc/{server.pid}/task/{server.pid}/children") as f:
+            workers = [int(pid) for pid in f.read().split()]
+        return [memory_kb(pid) for pid in workers]
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def report(label: str, workers: list):
+    mean = lambda key: sum(w[key] for w in workers) / len(workers) / 1024
+    total_pss = sum(w['pss'] for w in workers) / 1024
+    print(f"  {label:<28} {len(workers):>3} workers  RSS {mean('rss'):7.1f} MB  "
+          f"PSS {mean('pss'):7.1f} MB  USS {mean('uss'):7.1f} MB  (total PSS {total_pss:7.1f} MB)")
+
+
+def main():
+    num_exercises = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    directory = tempfile.mkdtemp()
+    make_catalog(directory, num_exercises)
+    no_config = os.path.join(directory, 'no_preload.conf.py')
+    open(no_config, 'w').close()
+
+    print(f"Per-worker memory, {num_exercises} exercises, {WORKERS} workers:")
+    report('per-worker load', run(directory, no_config, 8611))
+    report('preload only', run(directory, no_config, 8612, '--preload'))
+    report('preload + gc.freeze', run(directory, os.path.join(REPO, 'gunicorn.conf.py'), 8613))
+
+
+if __name__ == '__main__':
+    main()
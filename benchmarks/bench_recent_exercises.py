@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Benchmark: recent-exercise filter cost and day-to-day repetition
+
+Times RecentExercises.weight per candidate against the rest of an
+exercise's score, and compares how many exercises a workout shares with the
+previous day's workout, for planners with and without the history. Uses the
+planner's built-in catalog, and a model file and recent-exercise store in a
+temporary directory.
+
+Usage:
+    python benchmarks/bench_recent_exercises.py [days]
+"""
+
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_workout_planner_simple import SimpleAIWorkoutPlanner
+from recent_exercises import RECENT_WEIGHT, RecentExercises
+
+PREFERENCES = {'time_available': 45, 'goal': 'bjj_performance', 'experience_level': 'advanced',
+               'equipment': ['bodyweight', 'dumbbells', 'kettlebell', 'barbell', 'bench', 'rack',
+                             'pull-up bar', 'box', 'medicine_ball', 'assault_bike']}
+
+SECTIONS = ('strength_exercises', 'metcon_exercises', 'accessory_exercises')
+
+
+def timed_ns(func, items) -> float:
+    """Best-of-5 mean time per item in nanoseconds."""
+    best = float('inf')
+    for _ in range(5):
+        start = time.perf_counter()
+        for item in items:
+            func(item)
+        best = min(best, (time.perf_counter() - start) / len(items))
+    return best * 1e9
+
+
+def repeats_per_day(planner, days: int, user_id=None) -> float:
+    """Mean number of exercises shared with the previous day's workout (no history without a user)."""
+    previous, shared = set(), 0
+    for _ in range(days):
+        workout = planner.generate_workout(PREFERENCES, user_id)
+        names = {exercise['name'] for section in SECTIONS for exercise in workout[section]}
+        shared += len(names & previous)
+        previous = names
+    return shared / (days - 1)
+
+
+def main():
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    logging.disable(logging.WARNING)
+    directory = tempfile.mkdtemp()
+
+    def planner():
+        return SimpleAIWorkoutPlanner(data_file=os.path.join(directory, 'missing.json'),
+                                      model_file=os.path.join(directory, 'model.pkl'),
+                                      recent_path=os.path.join(directory, 'recent.db'))
+
+    filtered = planner()
+    unfiltered = planner()
+
+    names = [exercise['name'] for exercise in filtered.exercises] * 1000
+    recent = RecentExercises(filtered.exercise_performance.ids)
+    recent.record(names[:24])
+    print("Per-candidate cost:")
+    print(f"  recency weight lookup   {timed_ns(recent.weight, names):8.0f} ns")
+    exercises = filtered.exercises * 20
+    score = lambda exercise: filtered._calculate_exercise_score(exercise, PREFERENCES, recent)
+    print(f"  full exercise score     {timed_ns(score, exercises):8.0f} ns")
+    workout = filtered.generate_workout(PREFERENCES)
+    store = lambda user_id: filtered.recent_exercises.record_workout(user_id, workout)
+    print(f"  store update, per workout {timed_ns(store, ['bench'] * 200) / 1000:6.0f} us")
+
+    print(f"\nExercises shared with the previous day's workout ({days} days, "
+          f"{len(filtered.exercises)}-exercise catalog, recent weight {RECENT_WEIGHT}):")
+    print(f"  without history         {repeats_per_day(unfiltered, days):8.2f}")
+    print(f"  with history            {repeats_per_day(filtered, days, 'athlete'):8.2f}")
+
+
+if __name__ == '__main__':
+    main()
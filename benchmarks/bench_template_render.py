@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Benchmark: template compile and render times with and without caching
+
+For ai_workout_result.html, workout_result.html and ai_insights.html,
+measures the first load in a fresh worker (compiling from source vs. loading
+from the bytecode cache) and steady-state render time (plain rendering vs.
+cached exercise fragments).
+
+Usage:
+    python benchmarks/bench_template_render.py [renders]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask, render_template
+
+from static_assets import configure_static_assets
+from template_cache import FragmentCache, configure_template_caching, install_fragment_cache
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'templates')
+
+
+def sample_contexts() -> dict:
+    """Representative context for each benchmarked template."""
+    def exercise(i: int, **extra) -> dict:
+        return dict({'name': f"Exercise {i % 12}", 'muscle_group': 'legs', 'sets': 4, 'reps': 8,
+                     'rest_time': 90, 'difficulty': 'intermediate', 'bjj_focus': 'hip_power',
+                     'notes': 'Drive through the heels', 'predicted_difficulty': 6.5}, **extra)
+
+    ai_workout = {
+        'id': 'workout_20250701_180000_abc123',
+        'total_duration': 60,
+        'user_preferences': {'goal': 'bjj_performance', 'experience_level': 'intermediate',
+                             'equipment': ['barbell', 'kettlebell']},
+        'strength_exercises': [exercise(i) for i in range(6)],
+        'metcon_exercises': [exercise(i + 6, time='12 min') for i in range(5)],
+        'accessory_exercises': [exercise(i + 11) for i in range(3)]
+    }
+    section = lambda name, n, **extra: {'name': name, 'description': name, 'estimated_duration': 20,
+                                        'exercises': [exercise(i, **extra) for i in range(n)]}
+    workout = {
+        'workout_type': 'metcon', 'goal': 'bjj_performance', 'estimated_duration': 60,
+        'experience_level': 'intermediate',
+        'strength': section('Strength', 6),
+        'metcon': section('Metcon', 5, workout_format='AMRAP'),
+        'accessory': section('Accessory', 2)
+    }
+    insights = {
+        'total_workouts': 42, 'average_difficulty': 6.2, 'average_enjoyment': 7.4,
+        'average_completion_rate': 0.86,
+        'trends': {'difficulty_trend': 'improving', 'progress_rate': 0.4},
+        'recommendations': ['Add a rest day', 'Increase metcon volume']
+    }
+    return {
+        'ai_workout_result.html': {'workout': ai_workout},
+        'workout_result.html': {'workout': workout, 'filename': 'workout_20250701.json'},
+        'ai_insights.html': {'insights': insights}
+    }
+
+
+def make_app(cache_dir: str = None) -> Flask:
+    """Build a fresh app, optionally with bytecode and fragment caching."""
+    app = Flask(__name__, template_folder=TEMPLATE_DIR)
+    configure_static_assets(app, os.path.join(os.path.dirname(TEMPLATE_DIR), 'static'))
+    if cache_dir:
+        configure_template_caching(app, cache_dir)
+    else:
+        # Templates need cached_fragment() either way; a zero-size cache renders every fragment
+        install_fragment_cache(app.jinja_env, FragmentCache(maxsize=0))
+    return app
+
+
+def first_load_ms(name: str, cache_dir: str = None) -> float:
+    """Time loading a template in a fresh worker."""
+    app = make_app(cache_dir)
+    start = time.perf_counter()
+    app.jinja_env.get_template(name)
+    return (time.perf_counter() - start) * 1000
+
+
+def render_ms(app: Flask, name: str, context: dict, renders: int) -> float:
+    """Average steady-state render time."""
+    with app.test_request_context():
+        render_template(name, **context)  # warm up
+        start = time.perf_counter()
+        for _ in range(renders):
+            render_template(name, **context)
+    return (time.perf_counter() - start) * 1000 / renders
+
+
+def main():
+    renders = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    cache_dir = tempfile.mkdtemp()
+    contexts = sample_contexts()
+
+    # Populate the bytecode cache as a first worker would
+    for name in contexts:
+        first_load_ms(name, cache_dir)
+        first_load_ms('partials/ai_exercise.html', cache_dir)
+        first_load_ms('partials/workout_exercise.html', cache_dir)
+
+    plain, cached = make_app(), make_app(cache_dir)
+    print(f"{'template':<26} {'compile':>9} {'bytecode':>9} {'render':>9} {'fragments':>10}  (ms)")
+    for name, context in contexts.items():
+        print(f"{name:<26} {first_load_ms(name):9.2f} {first_load_ms(name, cache_dir):9.2f} "
+              f"{render_ms(plain, name, context, renders):9.3f} {render_ms(cached, name, context, renders):10.3f}")
+
+
+if __name__ == '__main__':
+    main()
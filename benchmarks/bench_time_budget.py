@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Benchmark: time-budget fitting speed and accuracy
+
+Times fit_time_budget on sections of 12 candidates (what the planners pass
+it) and on much larger candidate lists. Then, on a large synthetic catalog,
+it compares the strength section's length with the time it was given, for
+the fixed-count rule (min(4, max(2, minutes // 8)) exercises at their
+preferred sets) and for fit_section.
+
+Usage:
+    python benchmarks/bench_time_budget.py [num_exercises]
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from time_budget import MAX_CANDIDATES, TRANSITION_SECONDS, fit_section, fit_time_budget, set_options
+
+SESSION_MINUTES = (20, 30, 45, 60, 75, 90)
+
+
+def timed_us(func, repeat: int = 200) -> float:
+    """Best-of-5 mean time per call in microseconds."""
+    best = float('inf')
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            func()
+        best = min(best, (time.perf_counter() - start) / repeat)
+    return best * 1e6
+
+
+def plan(exercise):
+    return exercise['preferred_sets'], exercise['time_per_set'] + exercise['rest']
+
+
+def main():
+    num_exercises = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    rng = random.Random(42)
+    catalog = [{'name': f"Exercise {i}", 'time_per_set': rng.choice([45, 60, 90, 120, 150]),
+                'rest': rng.choice([60, 90, 120]), 'preferred_sets': rng.choice([3, 4])}
+               for i in range(num_exercises)]
+
+    print("Solver time per section (60-minute session, 24-minute strength budget):")
+    for candidates in (MAX_CANDIDATES, 50, 200):
+        groups = [[TRANSITION_SECONDS + sets * (e['time_per_set'] + e['rest'])
+                   for sets in set_options(e['preferred_sets'])] for e in catalog[:candidates]]
+        print(f"  {candidates:4d} candidates, up to 4 picked: {timed_us(lambda: fit_time_budget(groups, 1440, 4)):8.1f} us")
+
+    print(f"\nStrength section length vs budget, {num_exercises}-exercise catalog, 200 sessions per length:")
+    print(f"  {'minutes':>7} {'budget s':>9} {'fixed count: mean error':>24} {'overruns':>9} "
+          f"{'fitted: mean error':>19} {'overruns':>9}")
+    for minutes in SESSION_MINUTES:
+        budget = int(minutes * 60 * 0.4)
+        fixed_error, fixed_over, fitted_error, fitted_over = 0, 0, 0, 0
+        for _ in range(200):
+            ranked = rng.sample(catalog, MAX_CANDIDATES)
+            count = min(4, max(2, int(minutes * 0.4) // 8))
+            fixed = sum(TRANSITION_SECONDS + e['preferred_sets'] * (e['time_per_set'] + e['rest'])
+                        for e in ranked[:count])
+            _, fitted = fit_section(ranked, budget, plan, max_exercises=4, min_exercises=2)
+            fixed_error += abs(fixed - budget)
+            fixed_over += fixed > budget
+            fitted_error += abs(fitted - budget)
+            fitted_over += fitted > budget
+        print(f"  {minutes:7d} {budget:9d} {fixed_error / 200:22.0f} s {fixed_over:9d} "
+              f"{fitted_error / 200:17.0f} s {fitted_over:9d}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Benchmark: weighted sampling vs jitter-and-sort exercise selection
+
+Compares picking k recommendations from n scored exercises the old way
+(multiply each score by random.uniform(0.8, 1.2), sort all of them, take the
+top k) with weighted_sample. It also shows how often the lowest-scored
+quarter of the pool gets picked under each method, as a measure of variety.
+
+Usage:
+    python benchmarks/bench_weighted_sampling.py
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from weighted_sampling import weighted_sample
+
+K = 12
+
+
+def jitter_and_sort(items, scores, k):
+    jittered = [(item, score * random.uniform(0.8, 1.2)) for item, score in zip(items, scores)]
+    jittered.sort(key=lambda x: x[1], reverse=True)
+    return [item for item, _ in jittered[:k]]
+
+
+def timed_us(func, repeat: int) -> float:
+    """Best-of-5 mean time per call in microseconds."""
+    best = float('inf')
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            func()
+        best = min(best, (time.perf_counter() - start) / repeat)
+    return best * 1e6
+
+
+def main():
+    rng = random.Random(42)
+    print(f"Selecting {K} of n scored exercises:")
+    print(f"  {'n':>6} {'jitter+sort us':>15} {'weighted us':>12} {'bottom-quarter share (sort / weighted)':>40}")
+    for n in (50, 500, 5000, 50000):
+        items = list(range(n))
+        scores = [rng.uniform(0.5, 2.0) for _ in items]
+        repeat = max(5, 20000 // n)
+        old = timed_us(lambda: jitter_and_sort(items, scores, K), repeat)
+        new = timed_us(lambda: weighted_sample(items, scores, K), repeat)
+
+        cutoff = sorted(scores)[n // 4]
+        bottom = lambda picks: sum(scores[i] < cutoff for i in picks) / len(picks)
+        trials = 200
+        old_share = sum(bottom(jitter_and_sort(items, scores, K)) for _ in range(trials)) / trials
+        new_share = sum(bottom(weighted_sample(items, scores, K)) for _ in range(trials)) / trials
+        print(f"  {n:6d} {old:15.1f} {new:12.1f} {old_share:26.1%} / {new_share:.1%}")
+
+
+if __name__ == '__main__':
+    main()
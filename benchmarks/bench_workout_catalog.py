@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Benchmark: saved workouts listing with the metadata catalog
+
+Writes synthetic saved workout files (100k by default), then times the
+original directory scan that parses every file against catalog page queries.
+
+Usage:
+    python benchmarks/bench_workout_catalog.py [num_workouts]
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from workout_catalog import WorkoutCatalog
+
+WORKOUT_TYPES = ('strength', 'cardio', 'hiit', 'full_body')
+GOALS = ('strength', 'general_fitness', 'bjj_performance')
+
+
+def legacy_listing() -> list:
+    """Listing as implemented before the catalog."""
+    workouts = []
+    for filename in os.listdir('.'):
+        if filename.startswith('workout_') and filename.endswith('.json'):
+            with open(filename, 'r') as f:
+                workout_data = json.load(f)
+                workouts.append({
+                    'filename': filename,
+                    'date': workout_data.get('date', 'Unknown'),
+                    'workout_type': workout_data.get('workout_type', 'Unknown'),
+                    'goal': workout_data.get('goal', 'Unknown'),
+                    'duration': workout_data.get('estimated_duration', 0)
+                })
+    workouts.sort(key=lambda x: x['date'], reverse=True)
+    return workouts[:20]
+
+
+def timed(label: str, func, repeat: int = 3):
+    """Run func `repeat` times and print the best wall-clock time."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    print(f"  {label:<36} {best * 1000:10.1f} ms")
+
+
+def main():
+    num_workouts = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    os.chdir(tempfile.mkdtemp())
+    catalog = WorkoutCatalog('catalog.db')
+    print(f"Writing {num_workouts:,} saved workouts...")
+    for i in range(num_workouts):
+        workout = {
+            'date': f"{2020 + i % 5}-{1 + i % 12:02d}-{1 + i % 28:02d} {i % 24:02d}:{i % 60:02d}",
+            'workout_type': WORKOUT_TYPES[i % len(WORKOUT_TYPES)],
+            'goal': GOALS[i % len(GOALS)],
+            'estimated_duration': 30 + i % 60,
+            'strength': {'exercises': [{'name': 'Back Squat', 'sets': 5, 'reps': '5'}] * 3}
+        }
+        filename = f"workout_{i:07d}.json"
+        with open(filename, 'w') as f:
+            json.dump(workout, f)
+        catalog.add(filename, workout)
+
+    print("\nFirst page of saved workouts (20 rows)")
+    timed('directory scan + parse', legacy_listing, repeat=1)
+    timed('catalog, newest first', lambda: catalog.list())
+    timed('catalog, page 2000', lambda: catalog.list(page=2000))
+    timed('catalog, filtered by type and goal', lambda: catalog.list(workout_type='hiit', goal='strength'))
+    timed('catalog, sorted by goal', lambda: catalog.list(sort='goal'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Planner Engine Registry
+
+Lets one process host the rule-based WorkoutPlanner, SimpleAIWorkoutPlanner
+and the scikit-learn AIWorkoutPlanner, with each request choosing one. The
+exercise catalog is loaded once and the same read-only copy is handed to
+every engine, so a process holds one catalog rather than one per engine.
+Without a data file, the engines share a built-in catalog that all of them
+accept.
+Each engine keeps its own models and candidate pools, because the engines
+define workout sections differently. An engine is built the first time it
+is used.
+"""
+
+from typing import Callable, Dict, List, Optional, Tuple
+import json
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+ENGINE_RULE_BASED = 'rule_based'
+ENGINE_SIMPLE_AI = 'simple_ai'
+ENGINE_ML = 'ml'
+
+DEFAULT_ENGINE = os.environ.get('DEFAULT_PLANNER_ENGINE', ENGINE_SIMPLE_AI)
+
+# Request header naming the engine (also accepted as ?engine= or a body field)
+ENGINE_HEADER = 'X-Planner-Engine'
+
+
+def _rule_based(data_file: str, data: Optional[Dict], model_dir: str):
+    from workout_planner import WorkoutPlanner
+    return WorkoutPlanner(data_file, data=data)
+
+
+def _simple_ai(data_file: str, data: Optional[Dict], model_dir: str):
+    from ai_workout_planner_simple import SimpleAIWorkoutPlanner
+    return SimpleAIWorkoutPlanner(data_file, os.path.join(model_dir, 'simple_ai_model.pkl'), data=data)
+
+
+def _ml(data_file: str, data: Optional[Dict], model_dir: str):
+    # Imported on first use: scikit-learn and pandas are only needed for this engine
+    from ai_workout_planner import AIWorkoutPlanner
+    return AIWorkoutPlanner(data_file, os.path.join(model_dir, 'ai_model.pkl'), data=data)
+
+
+# Engine name -> factory(data_file, shared data, model directory)
+ENGINE_FACTORIES: Dict[str, Callable] = {
+    ENGINE_RULE_BASED: _rule_based,
+    ENGINE_SIMPLE_AI: _simple_ai,
+    ENGINE_ML: _ml
+}
+
+
+def default_catalog() -> Dict:
+    """
+    Built-in workout data every engine accepts: the AI planners' flat
+    exercise list, with the rule-based planner's workout templates added to
+    the workout types.
+    """
+    from ai_workout_planner_simple import SimpleAIWorkoutPlanner
+    from workout_planner import WorkoutPlanner
+    data = SimpleAIWorkoutPlanner._create_default_data()
+    data['workout_types'].update(WorkoutPlanner._create_default_data()['workout_types'])
+    return data
+
+
+def load_catalog(data_file: str) -> Dict:
+    """
+    Load the workout data shared by all engines.
+
+    The exercise list becomes a tuple, so an engine cannot add to or reorder
+    the copy the others see.
+
+    Returns:
+        Dict: Workout data, or default_catalog() if the file is missing or
+            unreadable
+    """
+    try:
+        with open(data_file, 'r') as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Shared catalog {data_file} not loaded ({e}); engines share the built-in catalog")
+        data = default_catalog()
+    if isinstance(data.get('exercises'), list):
+        data['exercises'] = tuple(data['exercises'])
+    return data
+
+
+class EngineRegistry:
+    """Builds planner engines on demand around one shared catalog."""
+
+    def __init__(self, data_file: str = 'workout_data.json', model_dir: str = '.',
+                 default: str = DEFAULT_ENGINE, factories: Optional[Dict[str, Callable]] = None):
+        """
+        Args:
+            data_file (str): Workout data file, read once for all engines
+            model_dir (str): Directory holding each engine's model file
+            default (str): Engine used when a request names none
+            factories (Dict[str, Callable]): Engine name -> factory; defaults to
+                ENGINE_FACTORIES
+
+        Raises:
+            ValueError: If the default engine is not registered
+        """
+        self.data_file = data_file
+        self.model_dir = model_dir
+        self.factories = dict(factories or ENGINE_FACTORIES)
+        if default not in self.factories:
+            raise ValueError(f"Unknown default engine: {default!r}")
+        self.default = default
+        self.data = load_catalog(data_file)
+        self._engines: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def names(self) -> List[str]:
+        return list(self.factories)
+
+    def loaded(self) -> List[str]:
+        return list(self._engines)
+
+    def get(self, name: Optional[str] = None):
+        """
+        Return an engine, building it on first use.
+
+        Raises:
+            ValueError: If no engine has that name
+        """
+        name = name or self.default
+        engine = self._engines.get(name)
+        if engine is not None:
+            return engine
+        if name not in self.factories:
+            raise ValueError(f"Unknown engine: {name!r} (expected one of {', '.join(self.factories)})")
+        with self._lock:
+            if name not in self._engines:
+                logger.info(f"Loading planner engine {name}")
+                self._engines[name] = self.factories[name](self.data_file, self.data, self.model_dir)
+            return self._engines[name]
+
+    def select(self, request, body: Optional[Dict] = None) -> Tuple[str, object]:
+        """
+        Pick the engine for a request from ?engine=, the X-Planner-Engine
+        header or an 'engine' body field, in that order.
+
+        Returns:
+            Tuple[str, object]: (engine name, engine)
+
+        Raises:
+            ValueError: If the requested engine does not exist
+        """
+        name = (request.args.get('engine') or request.headers.get(ENGINE_HEADER) or
+                (body or {}).get('engine') or self.default)
+        return name, self.get(name)
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Multi-Engine Workout Planner API
+
+One Flask app serving the workout API for all planner engines: rule-based,
+simple AI and scikit-learn. Requests choose an engine with ?engine=, the
+X-Planner-Engine header or an 'engine' field in the JSON body. All engines
+share one catalog (see engine_registry), so a single deployment replaces
+the three separate ones.
+"""
+
+from flask import Flask, request, jsonify
+from api_encoding import api_response
+from engine_registry import EngineRegistry
+from feedback_queue import DEFAULT_QUEUE_PATH, FeedbackQueue
+from metrics import install_metrics
+from workout_store import DEFAULT_STORE_PATH, WorkoutStore
+import os
+import threading
+from datetime import datetime
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+app = Flask(__name__)
+install_metrics(app)
+
+registry = EngineRegistry(os.environ.get('WORKOUT_DATA_PATH', 'workout_data.json'),
+                          model_dir=os.environ.get('MODEL_DIR', '.'))
+
+# Generated workouts are stored server-side, keyed by workout ID
+workout_store = WorkoutStore(os.environ.get('WORKOUT_STORE_PATH', DEFAULT_STORE_PATH))
+
+# One feedback queue per learning engine, e.g. feedback_queue_simple_ai.db
+feedback_queues = {}
+feedback_queues_lock = threading.Lock()
+
+
+def feedback_queue_for(name: str, engine) -> FeedbackQueue:
+    """Return the feedback queue applying batches to `engine`."""
+    if not hasattr(engine, 'record_feedback_batch'):
+        raise ValueError(f"Engine {name} does not learn from feedback")
+    with feedback_queues_lock:
+        if name not in feedback_queues:
+            base, ext = os.path.splitext(os.environ.get('FEEDBACK_QUEUE_PATH', DEFAULT_QUEUE_PATH))
+            feedback_queues[name] = FeedbackQueue(engine, f"{base}_{name}{ext}")
+        return feedback_queues[name]
+
+
+@app.route('/health')
+def health_check():
+    """Health check endpoint for deployment monitoring."""
+    return jsonify({
+        'status': 'healthy',
+        'message': 'AI Workout Planner is running',
+        'timestamp': datetime.now().isoformat()
+    })
+
+@app.route('/api/engines')
+def api_list_engines():
+    """API endpoint listing the available and loaded engines."""
+    return jsonify({
+        'success': True,
+        'engines': registry.names(),
+        'default': registry.default,
+        'loaded': registry.loaded()
+    })
+
+@app.route('/api/workout', methods=['POST'])
+def api_generate_workout():
+    """API endpoint for generating workouts with the selected engine."""
+    try:
+        data = request.get_json() or {}
+        name, engine = registry.select(request, data)
+
+        workout = engine.generate_workout(data.get('preferences', {}))
+        workout['engine'] = name
+        workout_store.put(workout)
+
+        return api_response({
+            'success': True,
+            'workout': workout
+        })
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
+@app.route('/api/workout/<workout_id>')
+def api_get_workout(workout_id):
+    """API endpoint for fetching a previously generated workout."""
+    workout = workout_store.get(workout_id)
+    if workout is None:
+        return jsonify({
+            'success': False,
+            'error': f"Workout {workout_id} not found"
+        }), 404
+
+    return api_response({
+        'success': True,
+        'workout': workout
+    })
+
+@app.route('/api/feedback', methods=['POST'])
+def api_submit_feedback():
+    """API endpoint for submitting feedback to the engine that generated the workout."""
+    try:
+        data = request.get_json()
+        workout_id = data.get('workout_id')
+        # Feedback goes to the workout's own engine unless the request names one
+        stored = workout_store.get(workout_id) or {}
+        name, engine = registry.select(request, {'engine': data.get('engine') or stored.get('engine')})
+        idempotency_key = request.headers.get('Idempotency-Key') or data.get('idempotency_key')
+
+        queued, idempotency_key = feedback_queue_for(name, engine).submit(
+            workout_id, data.get('feedback', {}), idempotency_key
+        )
+
+        return jsonify({
+            'success': True,
+            'engine': name,
+            'status': 'queued' if queued else 'duplicate',
+            'idempotency_key': idempotency_key
+        }), 202
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
+@app.route('/api/insights')
+def api_get_insights():
+    """API endpoint for getting user insights from the selected engine."""
+    try:
+        name, engine = registry.select(request)
+        if not hasattr(engine, 'get_user_insights'):
+            raise ValueError(f"Engine {name} does not provide insights")
+
+        return jsonify({
+            'success': True,
+            'engine': name,
+            'insights': engine.get_user_insights()
+        })
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
+if __name__ == '__main__':
+    # Load every engine up front rather than on its first request
+    for engine_name in registry.names():
+        registry.get(engine_name)
+
+    port = int(os.environ.get('PORT', 5004))
+    app.run(debug=False, host='0.0.0.0', port=port)
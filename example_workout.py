@@ -7,6 +7,7 @@ to generate personalized workouts.
 """
 
 from workout_planner import WorkoutPlanner
+from weekly_planning import generate_weekly_plan
 import json
 
 def main():
@@ -102,8 +103,8 @@ def main():
     
     for i, workout in enumerate(workouts, 1):
         filename = f"example_workout_{i}.json"
-        planner.save_workout(workout, filename)
-        print(f"   Saved {filename}")
+        path = planner.save_workout(workout, filename)
+        print(f"   Saved {path}")
     
     print("\n🎉 All examples completed!")
     print("Check the generated JSON files for the complete workout data.")
@@ -125,43 +126,25 @@ def generate_weekly_plan():
     equipment_input = input("Equipment: ").strip()
     equipment = [eq.strip() for eq in equipment_input.split(',') if eq.strip()]
     
-    # Define weekly schedule
-    weekly_schedule = {
-        'Monday': {'type': 'full_body', 'focus': None},
-        'Tuesday': {'type': 'cardio', 'focus': None},
-        'Wednesday': {'type': 'upper_body', 'focus': ['chest', 'back', 'shoulders']},
-        'Thursday': {'type': 'cardio', 'focus': None},
-        'Friday': {'type': 'lower_body', 'focus': ['legs', 'core']},
-        'Saturday': {'type': 'hiit', 'focus': None},
-        'Sunday': {'type': 'core', 'focus': ['core']}
+    base_preferences = {
+        'time_available': time_per_day,
+        'goal': goal,
+        'equipment': equipment,
+        'experience_level': experience_level
     }
     
-    weekly_workouts = {}
-    
-    for day, schedule in weekly_schedule.items():
-        print(f"\n🏋️  Generating {day}'s workout...")
-        
-        preferences = {
-            'time_available': time_per_day,
-            'goal': goal,
-            'equipment': equipment,
-            'experience_level': experience_level,
-            'workout_type': schedule['type'],
-            'focus_areas': schedule['focus']
-        }
-        
-        planner.set_user_preferences(preferences)
-        workout = planner.generate_workout()
-        
-        weekly_workouts[day] = workout
+    # Generate all seven days, then print them in calendar order
+    print("\n🏋️  Generating your week...")
+    weekly_workouts = generate_weekly_plan(planner, base_preferences)
+    for day, workout in weekly_workouts.items():
+        print(f"\n📆 {day}")
         planner.print_workout(workout)
     
     # Save weekly plan
     weekly_filename = f"weekly_plan_{datetime.now().strftime('%Y%m%d')}.json"
-    with open(weekly_filename, 'w') as f:
-        json.dump(weekly_workouts, f, indent=2)
+    weekly_path = planner.storage.save(weekly_workouts, weekly_filename)
     
-    print(f"\n💾 Weekly plan saved to {weekly_filename}")
+    print(f"\n💾 Weekly plan saved to {weekly_path}")
 
 if __name__ == "__main__":
     from datetime import datetime
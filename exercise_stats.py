@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Exercise Statistics
+
+Streaming per-exercise rating statistics. Each catalog exercise gets a fixed
+slot in a set of NumPy arrays (count, mean, variance via Welford's method,
+exponentially weighted mean, last-seen time), so memory is bounded by the
+catalog size rather than by how many ratings have been recorded.
+"""
+
+from datetime import datetime
+from typing import Dict, List, Optional
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+NEUTRAL_RATING = 5.0
+
+# Largest score adjustment from a well-established rating history (+/- 20%)
+MAX_RATING_INFLUENCE = 0.2
+
+# Number of ratings after which an exercise's history is fully trusted
+CONFIDENT_RATING_COUNT = 5
+
+
+class ExerciseStats:
+    """Constant-size rating accumulators aligned with catalog exercise IDs."""
+
+    def __init__(self, exercise_names: List[str], ewma_alpha: float = 0.3):
+        """
+        Initialize empty accumulators.
+
+        Args:
+            exercise_names (List[str]): Catalog exercise names; position is the exercise ID
+            ewma_alpha (float): Weight of the newest rating in the moving average
+        """
+        self.ids = {}
+        for name in exercise_names:
+            self.ids.setdefault(name, len(self.ids))
+        size = len(self.ids)
+        self.ewma_alpha = ewma_alpha
+        self.count = np.zeros(size, dtype=np.int64)
+        self.mean = np.zeros(size)
+        self._m2 = np.zeros(size)
+        self.ewma = np.full(size, NEUTRAL_RATING)
+        self.last_seen = np.zeros(size)
+
+    def __contains__(self, name: str) -> bool:
+        index = self.ids.get(name)
+        return index is not None and self.count[index] > 0
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(self.count))
+
+    @property
+    def variance(self) -> np.ndarray:
+        """Sample variance per exercise (0 until two ratings exist)."""
+        return np.divide(self._m2, self.count - 1, out=np.zeros_like(self._m2), where=self.count > 1)
+
+    def update(self, name: str, rating: float, timestamp: Optional[float] = None) -> bool:
+        """
+        Fold one rating into an exercise's accumulators.
+
+        Ratings for names outside the catalog are ignored so that the state
+        stays bounded.
+
+        Returns:
+            bool: True if the rating was recorded
+        """
+        index = self.ids.get(name)
+        if index is None:
+            logger.debug(f"Ignoring rating for unknown exercise: {name}")
+            return False
+
+        rating = float(rating)
+        self.count[index] += 1
+        delta = rating - self.mean[index]
+        self.mean[index] += delta / self.count[index]
+        self._m2[index] += delta * (rating - self.mean[index])
+        if self.count[index] == 1:
+            self.ewma[index] = rating
+        else:
+            self.ewma[index] += self.ewma_alpha * (rating - self.ewma[index])
+        self.last_seen[index] = timestamp if timestamp is not None else datetime.now().timestamp()
+        return True
+
+    def rating_factor(self, name: str) -> float:
+        """
+        Score multiplier from an exercise's recent ratings.
+
+        Ranges from 0.8 to 1.2, scaled by how many ratings have been seen;
+        exercises without ratings score a neutral 1.0.
+        """
+        index = self.ids.get(name)
+        if index is None or not self.count[index]:
+            return 1.0
+        confidence = min(1.0, self.count[index] / CONFIDENT_RATING_COUNT)
+        preference = (self.ewma[index] - NEUTRAL_RATING) / NEUTRAL_RATING  # -1 to 1
+        return 1.0 + MAX_RATING_INFLUENCE * confidence * preference
+
+    def get(self, name: str) -> Optional[Dict]:
+        """Return the statistics for one exercise, or None if it has no ratings."""
+        if name not in self:
+            return None
+        index = self.ids[name]
+        return {
+            'count': int(self.count[index]),
+            'mean': float(self.mean[index]),
+            'variance': float(self.variance[index]),
+            'ewma': float(self.ewma[index]),
+            'last_seen': datetime.fromtimestamp(self.last_seen[index]).isoformat()
+        }
@@ -0,0 +1,412 @@
+#!/usr/bin/env python3
+"""
+Feedback Queue
+
+Durable, idempotent ingestion of workout feedback. Submissions are written
+to a local SQLite queue keyed by an idempotency key and acknowledged
+immediately; a background consumer drains the queue in micro-batches and
+hands each batch to the planner, so retried submissions are applied once
+and the models learn once per batch rather than once per request.
+
+Several processes (e.g. gunicorn workers) may share one queue file. All of
+them accept submissions, but only one consumes them: the holder of a lease
+kept in the queue database, which it renews as it runs. Another process
+takes over once the lease lapses or is released, so the models are learned
+by a single planner. Before each batch the consumer reloads the planner's
+models if another process saved newer ones, so a new consumer continues
+from its predecessor's saved state. The other processes reload the models
+as they are saved, so every worker generates from what was learned.
+
+Each batch is also claimed inside a write transaction before it is
+applied, so a submission is never applied by two consumers. Submissions
+carry their idempotency key as 'feedback_id', which the planners remember
+alongside their saved state. A batch redelivered after a crash is
+therefore skipped. Submissions that keep failing are moved to a
+dead-letter state after MAX_ATTEMPTS so they cannot hold up the rest of
+the queue.
+"""
+
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE_PATH = 'feedback_queue.db'
+DEFAULT_BATCH_SIZE = 32
+
+# Seconds the consumer waits for more feedback before draining a partial batch
+DEFAULT_LINGER = 0.5
+
+# Processed entries are kept this long so that late retries are still deduplicated
+IDEMPOTENCY_WINDOW = 24 * 3600
+
+# Admission-control slot each batch is applied under
+RETRAINING_SLOT = 'retraining'
+
+# Attempts before a submission is dead-lettered, and seconds between them
+MAX_ATTEMPTS = 5
+RETRY_DELAY = 5.0
+
+# Claims older than this are assumed to belong to a consumer that died
+CLAIM_TIMEOUT = 300.0
+
+# Seconds the consumer lease lasts unless renewed
+LEASE_TIMEOUT = 60.0
+
+NUMERIC_FIELDS = ('difficulty_rating', 'enjoyment_rating', 'completion_rate')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS feedback_queue (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    idempotency_key TEXT NOT NULL UNIQUE,
+    workout_id TEXT,
+    payload TEXT NOT NULL,
+    enqueued_at REAL NOT NULL,
+    processed_at REAL,
+    claimed_by TEXT,
+    claimed_at REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    failed_at REAL,
+    last_error TEXT
+);
+CREATE INDEX IF NOT EXISTS feedback_queue_pending ON feedback_queue (processed_at, id);
+CREATE TABLE IF NOT EXISTS feedback_consumer (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    consumer_id TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+"""
+
+# Columns added after the first release, for queue files created before them
+MIGRATIONS = {
+    'claimed_by': 'TEXT',
+    'claimed_at': 'REAL',
+    'attempts': 'INTEGER NOT NULL DEFAULT 0',
+    'failed_at': 'REAL',
+    'last_error': 'TEXT'
+}
+
+# Pending: neither applied nor dead-lettered
+PENDING = 'processed_at IS NULL AND failed_at IS NULL'
+
+
+def validate_feedback(feedback: Dict) -> Dict:
+    """
+    Check a feedback payload before it is queued.
+
+    Feedback is applied after the request has been acknowledged, so malformed
+    ratings are rejected here rather than failing a batch later.
+
+    Raises:
+        ValueError: If the payload or any rating is not well formed
+    """
+    if not isinstance(feedback, dict):
+        raise ValueError("feedback must be an object")
+    feedback = dict(feedback)
+    for field in NUMERIC_FIELDS:
+        if field in feedback:
+            feedback[field] = float(feedback[field])
+    ratings = feedback.get('exercise_ratings', {})
+    if not isinstance(ratings, dict):
+        raise ValueError("exercise_ratings must be an object")
+    feedback['exercise_ratings'] = {name: float(rating) for name, rating in ratings.items()}
+    return feedback
+
+
+def derive_idempotency_key(workout_id: str, feedback: Dict) -> str:
+    """Key a submission by its content when the client does not supply one."""
+    canonical = json.dumps({'workout_id': workout_id, 'feedback': feedback}, sort_keys=True)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class FeedbackQueue:
+    """SQLite-backed feedback queue with a micro-batching consumer thread."""
+
+    def __init__(self, planner, path: str = DEFAULT_QUEUE_PATH,
+                 batch_size: int = DEFAULT_BATCH_SIZE, linger: float = DEFAULT_LINGER,
+                 admission=None):
+        """
+        Initialize the queue. The database and consumer start on first use.
+
+        Args:
+            planner: Planner exposing record_feedback_batch()
+            path (str): SQLite database file
+            batch_size (int): Maximum submissions applied per batch
+            linger (float): Seconds to wait for a batch to fill
+            admission (AdmissionController): If given, each batch waits for a
+                'retraining' slot, so request handling is admitted first
+        """
+        self.planner = planner
+        self.path = path
+        self.batch_size = batch_size
+        self.linger = linger
+        self.admission = admission
+        self._conn = None
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._consumer = None
+        self.consumer_id = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.metrics = {
+            'accepted': 0,
+            'duplicates': 0,
+            'processed': 0,
+            'failed_batches': 0,
+            'dead_lettered': 0,
+            'batches': 0,
+            'last_batch_size': 0,
+            'last_batch_lag_seconds': 0.0,
+            'max_lag_seconds': 0.0
+        }
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+            self._conn.execute('PRAGMA busy_timeout=5000')
+            self._conn.executescript(SCHEMA)
+            columns = {row[1] for row in self._conn.execute('PRAGMA table_info(feedback_queue)')}
+            for column, definition in MIGRATIONS.items():
+                if column not in columns:
+                    self._conn.execute(f'ALTER TABLE feedback_queue ADD COLUMN {column} {definition}')
+        return self._conn
+
+    def start(self):
+        """Start the background consumer if it is not already running."""
+        with self._lock:
+            self._connection()
+            if self._consumer is None or not self._consumer.is_alive():
+                self._stopping.clear()
+                self._consumer = threading.Thread(target=self._run, name='feedback-consumer', daemon=True)
+                self._consumer.start()
+                self._wakeup.set()  # drain anything left from a previous run
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stop the consumer after its current batch; pending entries stay queued."""
+        self._stopping.set()
+        self._wakeup.set()
+        if self._consumer is not None:
+            self._consumer.join(timeout)
+            self._consumer = None
+        self.release_lease()
+
+    def acquire_lease(self) -> bool:
+        """
+        Take or renew the consumer lease.
+
+        Returns:
+            bool: True if this queue is now the consumer of the queue file
+        """
+        now = time.time()
+        with self._lock:
+            cursor = self._connection().execute(
+                'INSERT INTO feedback_consumer (id, consumer_id, expires_at) VALUES (1, ?, ?) '
+                'ON CONFLICT (id) DO UPDATE SET consumer_id = excluded.consumer_id, expires_at = excluded.expires_at '
+                'WHERE consumer_id = excluded.consumer_id OR expires_at <= ?',
+                (self.consumer_id, now + LEASE_TIMEOUT, now)
+            )
+            return cursor.rowcount == 1
+
+    def release_lease(self):
+        """Give up the consumer lease, if held, so another process can take over at once."""
+        if self._conn is None:
+            return
+        with self._lock:
+            self._conn.execute('UPDATE feedback_consumer SET expires_at = 0 WHERE consumer_id = ?',
+                               (self.consumer_id,))
+
+    def _refresh_planner(self):
+        """Reload the planner's models if another process saved newer ones."""
+        refresh = getattr(self.planner, 'refresh_models', None)
+        if refresh is not None:
+            refresh()
+
+    def submit(self, workout_id: str, feedback: Dict, idempotency_key: Optional[str] = None) -> Tuple[bool, str]:
+        """
+        Durably enqueue one feedback submission.
+
+        Args:
+            workout_id (str): ID of the completed workout
+            feedback (Dict): Feedback payload as accepted by the planner
+            idempotency_key (str): Client-supplied key; derived from the
+                content when omitted
+
+        Returns:
+            Tuple[bool, str]: (True if newly queued, idempotency key)
+
+        Raises:
+            ValueError: If the feedback is malformed
+        """
+        feedback = validate_feedback(feedback)
+        key = idempotency_key or derive_idempotency_key(workout_id, feedback)
+        now = time.time()
+        payload = dict(feedback, timestamp=datetime.fromtimestamp(now).isoformat(), feedback_id=key)
+        self.start()
+        with self._lock:
+            cursor = self._connection().execute(
+                'INSERT OR IGNORE INTO feedback_queue (idempotency_key, workout_id, payload, enqueued_at) '
+                'VALUES (?, ?, ?, ?)',
+                (key, workout_id, json.dumps(payload), now)
+            )
+            accepted = cursor.rowcount == 1
+            self.metrics['accepted' if accepted else 'duplicates'] += 1
+        if accepted:
+            self._wakeup.set()
+        else:
+            logger.info(f"Duplicate feedback ignored: {key}")
+        return accepted, key
+
+    def _claim(self) -> List[tuple]:
+        """
+        Claim up to one batch of pending submissions for this consumer.
+
+        Selecting and marking the rows happens in one write transaction, so
+        consumers sharing the queue file never claim the same row. Rows whose
+        last attempt failed wait RETRY_DELAY; claims older than CLAIM_TIMEOUT
+        are taken over.
+        """
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                rows = conn.execute(
+                    f'SELECT id, workout_id, payload, enqueued_at, attempts FROM feedback_queue '
+                    f'WHERE {PENDING} AND (claimed_at IS NULL OR '
+                    f'(claimed_by IS NULL AND claimed_at <= ?) OR claimed_at <= ?) ORDER BY id LIMIT ?',
+                    (now - RETRY_DELAY, now - CLAIM_TIMEOUT, self.batch_size)
+                ).fetchall()
+                conn.executemany(
+                    'UPDATE feedback_queue SET claimed_by = ?, claimed_at = ?, attempts = attempts + 1 WHERE id = ?',
+                    [(self.consumer_id, now, row[0]) for row in rows]
+                )
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+        return rows
+
+    def _apply(self, items: List[Tuple[str, Dict]]):
+        self._refresh_planner()
+        if self.admission is not None:
+            with self.admission.slot(RETRAINING_SLOT):
+                self.planner.record_feedback_batch(items)
+        else:
+            self.planner.record_feedback_batch(items)
+
+    def _release(self, row: tuple, error: Exception):
+        """Return a failed submission to the queue, or dead-letter it after MAX_ATTEMPTS."""
+        attempts = row[4] + 1
+        with self._lock:
+            if attempts >= MAX_ATTEMPTS:
+                self._connection().execute(
+                    'UPDATE feedback_queue SET failed_at = ?, claimed_by = NULL, last_error = ? WHERE id = ?',
+                    (time.time(), str(error), row[0])
+                )
+                self.metrics['dead_lettered'] += 1
+                logger.error(f"Feedback {row[0]} dead-lettered after {attempts} attempts: {error}")
+            else:
+                self._connection().execute(
+                    'UPDATE feedback_queue SET claimed_by = NULL, last_error = ? WHERE id = ?',
+                    (str(error), row[0])
+                )
+
+    def drain(self) -> int:
+        """
+        Claim and apply up to one batch of pending feedback.
+
+        Nothing is claimed unless this queue holds (or can take) the
+        consumer lease. The planner applies a batch all or nothing. If the batch fails, its
+        submissions are applied one at a time so that a bad one cannot take
+        the others down with it; those that still fail are released for a
+        later retry.
+
+        Returns:
+            int: Number of submissions claimed (applied or released)
+        """
+        if not self.acquire_lease():
+            return 0
+        rows = self._claim()
+        if not rows:
+            return 0
+
+        items = [(workout_id, json.loads(payload)) for _, workout_id, payload, _, _ in rows]
+        try:
+            self._apply(items)
+            applied = rows
+        except Exception as e:
+            self.metrics['failed_batches'] += 1
+            logger.error(f"Error applying feedback batch: {e}")
+            applied = []
+            for row, item in zip(rows, items):
+                try:
+                    self._apply([item])
+                    applied.append(row)
+                except Exception as item_error:
+                    self._release(row, item_error)
+            self._wakeup.set()
+
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.executemany('UPDATE feedback_queue SET processed_at = ?, claimed_by = NULL WHERE id = ?',
+                             [(now, row[0]) for row in applied])
+            conn.execute('DELETE FROM feedback_queue WHERE processed_at < ?', (now - IDEMPOTENCY_WINDOW,))
+            if applied:
+                lag = now - min(row[3] for row in applied)
+                self.metrics['processed'] += len(applied)
+                self.metrics['batches'] += 1
+                self.metrics['last_batch_size'] = len(applied)
+                self.metrics['last_batch_lag_seconds'] = lag
+                self.metrics['max_lag_seconds'] = max(self.metrics['max_lag_seconds'], lag)
+        return len(rows)
+
+    def _run(self):
+        """Consumer loop: wait for feedback, let a batch fill, then drain."""
+        while not self._stopping.is_set():
+            # Also poll, so released submissions are retried without new feedback
+            woken = self._wakeup.wait(timeout=1.0)
+            if not self.acquire_lease():
+                # Another process consumes; pick up the models it saves
+                self._wakeup.clear()
+                self._refresh_planner()
+                continue
+            if not woken and not self.depth():
+                continue
+            self._wakeup.clear()
+            if self.depth() < self.batch_size:
+                self._stopping.wait(self.linger)
+            while self.drain() == self.batch_size:
+                pass
+
+    def depth(self) -> int:
+        """Number of submissions waiting to be applied."""
+        with self._lock:
+            return self._connection().execute(
+                f'SELECT COUNT(*) FROM feedback_queue WHERE {PENDING}'
+            ).fetchone()[0]
+
+    def stats(self) -> Dict:
+        """Return queue depth, processing lag and throughput counters."""
+        with self._lock:
+            conn = self._connection()
+            depth, oldest = conn.execute(
+                f'SELECT COUNT(*), MIN(enqueued_at) FROM feedback_queue WHERE {PENDING}'
+            ).fetchone()
+            dead_letters = conn.execute(
+                'SELECT COUNT(*) FROM feedback_queue WHERE failed_at IS NOT NULL'
+            ).fetchone()[0]
+            stats = dict(self.metrics)
+        stats['queue_depth'] = depth
+        stats['dead_letters'] = dead_letters
+        stats['oldest_pending_age_seconds'] = time.time() - oldest if oldest is not None else 0.0
+        return stats
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Gunicorn Configuration
+
+Loads the app, exercise catalog and models once in the master
+(preload_app) and forks workers from it, so every worker shares those pages
+copy-on-write instead of holding its own heap copy.
+
+Objects the master built are frozen into the GC's permanent generation
+before each fork. Collections in the workers then never walk them, and so
+never write to the pages they live on. Following the gc.freeze()
+recommendation, automatic collection stays off in the master and is
+re-enabled in each worker.
+
+Gunicorn reads ./gunicorn.conf.py automatically; settings can be overridden
+with PORT, WEB_CONCURRENCY and GUNICORN_PRELOAD=0.
+"""
+
+import gc
+import multiprocessing
+import os
+import random
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', min(2 * multiprocessing.cpu_count() + 1, 8)))
+wsgi_app = 'simple_ai_web_app:create_app()'
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') != '0'
+
+if preload_app:
+    # Nothing allocated while preloading is collected in the master
+    gc.disable()
+
+
+def pre_fork(server, worker):
+    if preload_app:
+        gc.freeze()
+
+
+def post_fork(server, worker):
+    if preload_app:
+        gc.enable()
+    # Forked workers would otherwise share the master's random sequence
+    random.seed()
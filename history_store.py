@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+"""
+Workout History Store
+
+Append-only store for workout feedback entries, kept in timestamp order.
+Alongside the raw feedback dicts (used for display), the numeric fields are
+held in a NumPy structured array so analytics run as vectorized column
+operations and range scans are binary searches over the timestamp column.
+"""
+
+import csv
+import json
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+import logging
+
+import numpy as np
+
+from training_rollups import ROLLUP_FIELDS, TrainingRollups
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+# Column layout; numeric feedback fields keep their feedback dict key names
+HISTORY_DTYPE = np.dtype([
+    ('timestamp', 'f8'),            # epoch seconds
+    ('workout', 'i4'),              # code into HistoryStore.workout_ids
+    ('difficulty_rating', 'f8'),
+    ('enjoyment_rating', 'f8'),
+    ('completion_rate', 'f8'),
+    ('exercise_count', 'i2'),
+    ('exercise_rating_mean', 'f8')
+])
+
+# Values used when a feedback entry omits a field (matches the planners' .get defaults)
+FIELD_DEFAULTS = {
+    'difficulty_rating': 5,
+    'enjoyment_rating': 5,
+    'completion_rate': 0.5
+}
+
+INITIAL_CAPACITY = 64
+
+
+def _to_epoch(value) -> float:
+    """Convert an ISO timestamp string, datetime or number to epoch seconds."""
+    if value is None:
+        return datetime.now().timestamp()
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, datetime):
+        return value.timestamp()
+    return datetime.fromisoformat(value).timestamp()
+
+
+def _parse_bound(value: Optional[str], end: bool = False) -> Optional[float]:
+    """Parse a date or datetime query bound; date-only end bounds are inclusive."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"Invalid date: {value!r} (expected YYYY-MM-DD or ISO timestamp)")
+    if end and len(value) == 10:
+        parsed += timedelta(days=1) - timedelta(microseconds=1)
+    return parsed.timestamp()
+
+
+def parse_history_filters(args) -> Dict:
+    """
+    Build history filters from request query arguments.
+
+    Args:
+        args: Mapping with optional 'start', 'end' (ISO dates) and 'min_rating'
+
+    Returns:
+        Dict: Keyword arguments for HistoryStore.page / iter_entries
+    """
+    filters = {
+        'start': _parse_bound(args.get('start')),
+        'end': _parse_bound(args.get('end'), end=True),
+        'min_rating': None
+    }
+    if args.get('min_rating'):
+        try:
+            filters['min_rating'] = float(args.get('min_rating'))
+        except ValueError:
+            raise ValueError(f"Invalid min_rating: {args.get('min_rating')!r}")
+    return filters
+
+
+class HistoryStore:
+    """
+    Feedback history ordered by timestamp, with columnar numeric fields.
+
+    Behaves like the list it replaces (len, iteration, indexing, slicing and
+    append) so existing code keeps working, and adds range scans, cursor
+    pagination, vectorized aggregations and export. Weekly and monthly
+    rollups are kept up to date as entries are added.
+    """
+
+    def __init__(self, entries: Optional[List[Dict]] = None):
+        """
+        Initialize the store.
+
+        Args:
+            entries (List[Dict]): Optional existing feedback entries to load
+        """
+        self._entries = []
+        self._data = np.zeros(INITIAL_CAPACITY, dtype=HISTORY_DTYPE)
+        # Contiguous copy of the timestamp column used as the search index
+        self._timestamps = np.zeros(INITIAL_CAPACITY)
+        # Insertion number of each row; with the timestamp it keys page cursors
+        self._sequence = np.zeros(INITIAL_CAPACITY, dtype=np.int64)
+        self._next_sequence = 0
+        self._size = 0
+        self.workout_ids = []
+        self._workout_codes = {}
+        self.rollups = TrainingRollups()
+        self.extend(entries or [])
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self) -> Iterator[Dict]:
+        return iter(self._entries)
+
+    def __getitem__(self, index):
+        return self._entries[index]
+
+    @property
+    def columns(self) -> np.ndarray:
+        """Read-only structured array view of all rows, oldest first."""
+        view = self._data[:self._size]
+        view.flags.writeable = False
+        return view
+
+    def column(self, name: str) -> np.ndarray:
+        """Read-only view of a single column."""
+        return self.columns[name]
+
+    def _workout_code(self, workout_id) -> int:
+        """Intern a workout id and return its integer code."""
+        key = str(workout_id)
+        code = self._workout_codes.get(key)
+        if code is None:
+            code = len(self.workout_ids)
+            self._workout_codes[key] = code
+            self.workout_ids.append(key)
+        return code
+
+    def _row(self, entry: Dict) -> tuple:
+        """Build a column row from a feedback entry."""
+        exercise_ratings = entry.get('exercise_ratings') or {}
+        return (
+            _to_epoch(entry.get('timestamp')),
+            self._workout_code(entry.get('workout_id')),
+            entry.get('difficulty_rating', FIELD_DEFAULTS['difficulty_rating']),
+            entry.get('enjoyment_rating', FIELD_DEFAULTS['enjoyment_rating']),
+            entry.get('completion_rate', FIELD_DEFAULTS['completion_rate']),
+            len(exercise_ratings),
+            sum(exercise_ratings.values()) / len(exercise_ratings) if exercise_ratings else 5
+        )
+
+    def _reserve(self, size: int):
+        """Grow the column buffer (doubling) to hold at least `size` rows."""
+        if size <= len(self._data):
+            return
+        capacity = len(self._data)
+        while capacity < size:
+            capacity *= 2
+        grown = np.zeros(capacity, dtype=HISTORY_DTYPE)
+        grown[:self._size] = self._data[:self._size]
+        self._data = grown
+        timestamps = np.zeros(capacity)
+        timestamps[:self._size] = self._timestamps[:self._size]
+        self._timestamps = timestamps
+        sequence = np.zeros(capacity, dtype=np.int64)
+        sequence[:self._size] = self._sequence[:self._size]
+        self._sequence = sequence
+
+    def append(self, entry: Dict):
+        """Add a feedback entry, keeping the store in timestamp order."""
+        row = self._row(entry)
+        self._reserve(self._size + 1)
+        if not self._size or row[0] >= self._timestamps[self._size - 1]:
+            position = self._size
+            self._entries.append(entry)
+        else:
+            # Late arrivals (e.g. imported history) are inserted in place
+            position = int(np.searchsorted(self._timestamps[:self._size], row[0], side='right'))
+            self._data[position + 1:self._size + 1] = self._data[position:self._size]
+            self._timestamps[position + 1:self._size + 1] = self._timestamps[position:self._size]
+            self._sequence[position + 1:self._size + 1] = self._sequence[position:self._size]
+            self._entries.insert(position, entry)
+        self._data[position] = row
+        self._timestamps[position] = row[0]
+        self._sequence[position] = self._next_sequence
+        self._next_sequence += 1
+        self._size += 1
+        self._add_to_rollups(self._data[position])
+
+    def _add_to_rollups(self, row: np.void):
+        """Fold a column row into the weekly/monthly rollups."""
+        self.rollups.add(float(row['timestamp']), {field: float(row[field]) for field in ROLLUP_FIELDS})
+
+    def mark(self) -> int:
+        """Marker to pass to rollback(), e.g. before adding a batch that may fail."""
+        return self._next_sequence
+
+    def rollback(self, mark: int):
+        """
+        Remove every entry added since mark() returned `mark`.
+
+        Entries appended at the end are truncated in time proportional to
+        their number; late arrivals inserted among older rows need one
+        compacting pass over the columns.
+        """
+        kept = self._sequence[:self._size] < mark
+        removed = np.flatnonzero(~kept)
+        if not len(removed):
+            return
+        for position in removed:
+            row = self._data[position]
+            self.rollups.remove(float(row['timestamp']), {field: float(row[field]) for field in ROLLUP_FIELDS})
+        size = self._size - len(removed)
+        if removed[0] == size:
+            del self._entries[size:]
+        else:
+            self._entries = [entry for entry, keep in zip(self._entries, kept) if keep]
+            self._data[:size] = self._data[:self._size][kept]
+            self._timestamps[:size] = self._timestamps[:self._size][kept]
+            self._sequence[:size] = self._sequence[:self._size][kept]
+        self._size = size
+        self._next_sequence = mark
+
+    def extend(self, entries: List[Dict]):
+        """Add many feedback entries."""
+        entries = list(entries)
+        rows = np.array([self._row(entry) for entry in entries], dtype=HISTORY_DTYPE)
+        if len(rows) and np.all(np.diff(rows['timestamp']) >= 0) and (
+                not self._size or rows['timestamp'][0] >= self._timestamps[self._size - 1]):
+            self._reserve(self._size + len(rows))
+            self._data[self._size:self._size + len(rows)] = rows
+            self._timestamps[self._size:self._size + len(rows)] = rows['timestamp']
+            self._sequence[self._size:self._size + len(rows)] = np.arange(
+                self._next_sequence, self._next_sequence + len(rows))
+            self._next_sequence += len(rows)
+            self._entries.extend(entries)
+            self._size += len(rows)
+            for row in rows:
+                self._add_to_rollups(row)
+        else:
+            for entry in entries:
+                self.append(entry)
+
+    def _range(self, start: Optional[float], end: Optional[float]) -> Tuple[int, int]:
+        """Return the [lo, hi) row positions covering the timestamp range."""
+        timestamps = self._timestamps[:self._size]
+        lo = int(np.searchsorted(timestamps, start, side='left')) if start is not None else 0
+        hi = int(np.searchsorted(timestamps, end, side='right')) if end is not None else self._size
+        return lo, hi
+
+    def scan(self, start: Optional[float] = None, end: Optional[float] = None) -> np.ndarray:
+        """Return the column rows within a timestamp range (epoch seconds, inclusive)."""
+        lo, hi = self._range(start, end)
+        return self.columns[lo:hi]
+
+    def aggregate(self, field: str, func: str = 'mean', start: Optional[float] = None,
+                  end: Optional[float] = None, last: Optional[int] = None) -> float:
+        """
+        Aggregate a numeric column over a time range or the most recent rows.
+
+        Args:
+            field (str): Column name, e.g. 'difficulty_rating'
+            func (str): One of 'mean', 'sum', 'min', 'max', 'std'
+            start (float): Earliest timestamp (epoch seconds), inclusive
+            end (float): Latest timestamp (epoch seconds), inclusive
+            last (int): Only aggregate the newest `last` rows of the range
+        """
+        values = self.scan(start, end)[field]
+        if last is not None:
+            values = values[-last:] if last else values[:0]
+        if not len(values):
+            return 0.0
+        return float(getattr(np, func)(values, dtype=np.float64))
+
+    def summary(self) -> Dict:
+        """Return aggregate statistics over the whole history."""
+        return {
+            'count': self._size,
+            'avg_difficulty': self.aggregate('difficulty_rating'),
+            'avg_enjoyment': self.aggregate('enjoyment_rating'),
+            'avg_completion': self.aggregate('completion_rate')
+        }
+
+    def iter_entries(self, start: Optional[float] = None, end: Optional[float] = None,
+                     min_rating: Optional[float] = None, newest_first: bool = True) -> Iterator[Dict]:
+        """
+        Lazily iterate entries within a time range.
+
+        Args:
+            start (float): Earliest timestamp (epoch seconds), inclusive
+            end (float): Latest timestamp (epoch seconds), inclusive
+            min_rating (float): Minimum enjoyment rating
+            newest_first (bool): Iterate from newest to oldest
+        """
+        lo, hi = self._range(start, end)
+        positions = np.arange(lo, hi)
+        if min_rating is not None:
+            positions = positions[self._data['enjoyment_rating'][lo:hi] >= min_rating]
+        if newest_first:
+            positions = positions[::-1]
+        for position in positions:
+            yield self._entries[position]
+
+    def page(self, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE,
+             start: Optional[float] = None, end: Optional[float] = None,
+             min_rating: Optional[float] = None) -> Tuple[List[Dict], Optional[str]]:
+        """
+        Return one page of entries, newest first.
+
+        The cursor is an opaque marker returned by the previous page. It names
+        the last entry returned by its timestamp and insertion number, not its
+        position, so entries added meanwhile (including late arrivals inserted
+        among older ones) neither repeat nor skip entries on later pages.
+
+        Returns:
+            Tuple[List[Dict], Optional[str]]: Entries and the cursor for the next page
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        lo, hi = self._range(start, end)
+        if cursor:
+            hi = min(hi, self._cursor_position(cursor))
+
+        # Walk backwards from the cursor in chunks so a page costs O(limit)
+        # rather than O(history) even when a rating filter is applied
+        selected = []
+        chunk = max(limit * 4, 256)
+        while hi > lo and len(selected) < limit:
+            chunk_lo = max(lo, hi - chunk)
+            positions = np.arange(hi - 1, chunk_lo - 1, -1)
+            if min_rating is not None:
+                positions = positions[self._data['enjoyment_rating'][positions] >= min_rating]
+            selected.extend(positions[:limit - len(selected)].tolist())
+            hi = chunk_lo
+
+        next_cursor = None
+        if len(selected) == limit and selected[-1] > lo:
+            last = selected[-1]
+            next_cursor = f"{float(self._timestamps[last])!r}:{int(self._sequence[last])}"
+        return [self._entries[position] for position in selected], next_cursor
+
+    def _cursor_position(self, cursor: str) -> int:
+        """Position of the entry a page cursor names, i.e. the end of the next page."""
+        try:
+            timestamp, sequence = cursor.split(':')
+            timestamp, sequence = float(timestamp), int(sequence)
+        except ValueError:
+            raise ValueError(f"Invalid cursor: {cursor!r}")
+        # Rows with equal timestamps are in insertion order
+        timestamps = self._timestamps[:self._size]
+        tied_lo = int(np.searchsorted(timestamps, timestamp, side='left'))
+        tied_hi = int(np.searchsorted(timestamps, timestamp, side='right'))
+        return tied_lo + int(np.searchsorted(self._sequence[tied_lo:tied_hi], sequence, side='left'))
+
+    def iter_ndjson(self, **filters) -> Iterator[str]:
+        """Yield matching entries as newline-delimited JSON."""
+        for entry in self.iter_entries(**filters):
+            yield json.dumps(entry, default=str) + '\n'
+
+    def export(self, path: str, start: Optional[float] = None, end: Optional[float] = None):
+        """
+        Export the numeric columns for a time range.
+
+        Writes CSV when `path` ends in .csv, otherwise a NumPy .npz archive
+        holding the structured rows and the workout id table.
+        """
+        rows = self.scan(start, end)
+        if path.endswith('.csv'):
+            workout_ids = np.asarray(self.workout_ids, dtype=object)
+            with open(path, 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(['timestamp', 'workout_id'] + list(HISTORY_DTYPE.names[2:]))
+                for row, workout_id in zip(rows.tolist(), workout_ids[rows['workout']]):
+                    writer.writerow([datetime.fromtimestamp(row[0]).isoformat(), workout_id] + list(row[2:]))
+        else:
+            np.savez(path, rows=rows, workout_ids=np.asarray(self.workout_ids))
+        logger.info(f"Exported {len(rows)} history rows to {path}")
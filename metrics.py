@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Metrics
+
+In-process request and stage metrics, exposed at /metrics in the Prometheus
+text exposition format so a local collector can scrape them.
+
+- http_requests_total / http_request_errors_total: counts per route
+- http_request_duration_seconds: latency histogram per route
+- stage_duration_seconds: latency histogram per internal stage
+  (catalog filtering, recommendation, predictions, retraining, saving)
+
+Recording an observation is a bucket search and two additions under a lock,
+so instrumentation stays cheap enough for per-exercise hot paths.
+"""
+
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+from typing import Dict, List, Optional, Tuple
+import threading
+import time
+
+from flask import Response, g, request
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Request latency bucket upper bounds, in seconds
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Internal stages run from microseconds (cached predictions) to seconds (retraining)
+STAGE_BUCKETS = (0.00001, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram with a sum and count."""
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        # Callers hold the registry lock
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """(le, cumulative count) pairs, ending with +Inf."""
+        total, rows = 0, []
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            rows.append(('+Inf' if bound == float('inf') else repr(bound), total))
+        return rows
+
+
+class MetricsRegistry:
+    """Thread-safe store of the request and stage metrics."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._requests: Dict[Tuple[str, str, int], int] = {}
+        self._errors: Dict[Tuple[str, str], int] = {}
+        self._request_latency: Dict[Tuple[str, str], Histogram] = {}
+        self._stage_latency: Dict[str, Histogram] = {}
+
+    def observe_request(self, route: str, method: str, status: int, seconds: float):
+        with self._lock:
+            key = (route, method, status)
+            self._requests[key] = self._requests.get(key, 0) + 1
+            if status >= 400:
+                self._errors[(route, method)] = self._errors.get((route, method), 0) + 1
+            histogram = self._request_latency.get((route, method))
+            if histogram is None:
+                histogram = self._request_latency[(route, method)] = Histogram(REQUEST_BUCKETS)
+            histogram.observe(seconds)
+
+    def observe_stage(self, stage: str, seconds: float):
+        with self._lock:
+            histogram = self._stage_latency.get(stage)
+            if histogram is None:
+                histogram = self._stage_latency[stage] = Histogram(STAGE_BUCKETS)
+            histogram.observe(seconds)
+
+    def reset(self):
+        with self._lock:
+            self._requests.clear()
+            self._errors.clear()
+            self._request_latency.clear()
+            self._stage_latency.clear()
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        with self._lock:
+            lines = ['# HELP http_requests_total Requests handled, by route, method and status.',
+                     '# TYPE http_requests_total counter']
+            for (route, method, status), count in sorted(self._requests.items()):
+                lines.append(f'http_requests_total{_labels(route=route, method=method, status=status)} {count}')
+
+            lines += ['# HELP http_request_errors_total Requests answered with a 4xx or 5xx status.',
+                      '# TYPE http_request_errors_total counter']
+            for (route, method), count in sorted(self._errors.items()):
+                lines.append(f'http_request_errors_total{_labels(route=route, method=method)} {count}')
+
+            lines += ['# HELP http_request_duration_seconds Time to build each response.',
+                      '# TYPE http_request_duration_seconds histogram']
+            for (route, method), histogram in sorted(self._request_latency.items()):
+                lines += _histogram_lines('http_request_duration_seconds', histogram,
+                                          route=route, method=method)
+
+            lines += ['# HELP stage_duration_seconds Time spent in internal planner stages.',
+                      '# TYPE stage_duration_seconds histogram']
+            for stage, histogram in sorted(self._stage_latency.items()):
+                lines += _histogram_lines('stage_duration_seconds', histogram, stage=stage)
+        return '\n'.join(lines) + '\n'
+
+
+def _labels(**labels) -> str:
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+               for value in labels.values())
+    return '{' + ','.join(f'{name}="{value}"' for name, value in zip(labels, escaped)) + '}'
+
+
+def _histogram_lines(name: str, histogram: Histogram, **labels) -> List[str]:
+    lines = [f'{name}_bucket{_labels(**labels, le=le)} {count}' for le, count in histogram.cumulative()]
+    lines.append(f'{name}_sum{_labels(**labels)} {histogram.sum}')
+    lines.append(f'{name}_count{_labels(**labels)} {histogram.count}')
+    return lines
+
+
+# Process-wide registry shared by the planners and the web app
+REGISTRY = MetricsRegistry()
+
+
+@contextmanager
+def timed(stage: str, registry: Optional[MetricsRegistry] = None):
+    """
+    Record the duration of a block as a stage observation.
+
+    Args:
+        stage (str): Stage name, e.g. 'recommendation'
+        registry (MetricsRegistry): Registry to record into (defaults to REGISTRY)
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        (registry or REGISTRY).observe_stage(stage, time.perf_counter() - start)
+
+
+def timed_stage(stage: str):
+    """Decorator form of `timed` for planner methods."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                REGISTRY.observe_stage(stage, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def install_metrics(app, registry: Optional[MetricsRegistry] = None) -> MetricsRegistry:
+    """
+    Time every request of a Flask app and serve the metrics at /metrics.
+
+    Requests are labelled by their URL rule (e.g. /workout/<workout_id>) so
+    the number of series stays bounded. Streaming responses are timed until
+    the response starts.
+
+    Returns:
+        MetricsRegistry: The registry the app records into
+    """
+    registry = registry or REGISTRY
+
+    @app.before_request
+    def _start_timer():
+        g.metrics_start = time.perf_counter()
+
+    @app.after_request
+    def _record_request(response):
+        start = g.pop('metrics_start', None)
+        if start is not None:
+            route = request.url_rule.rule if request.url_rule else 'unmatched'
+            registry.observe_request(route, request.method, response.status_code,
+                                     time.perf_counter() - start)
+        return response
+
+    @app.teardown_request
+    def _record_failure(error):
+        # Unhandled exceptions skip after_request; count them as 500s
+        start = g.pop('metrics_start', None)
+        if start is not None and error is not None:
+            route = request.url_rule.rule if request.url_rule else 'unmatched'
+            registry.observe_request(route, request.method, 500, time.perf_counter() - start)
+
+    @app.route('/metrics')
+    def metrics():
+        return Response(registry.render(), content_type=CONTENT_TYPE)
+
+    return registry
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Periodization
+
+Block-periodized training plans. A plan is a mesocycle of several weeks.
+Each week follows the weekly schedule, and volume rises from week to week
+before a deload week ends the block. Each day gets a load target, its
+session length in minutes. The target comes from the week's volume and the
+athlete's readiness. Readiness moves with feedback on earlier days and
+fades back to normal over the following days.
+
+Every day remembers the preferences its workout was generated from. When
+one day's preferences or feedback change, readiness is recomputed forward
+from that day only until it matches the stored values again. Then only the
+days whose preferences actually changed are regenerated, not the whole
+cycle.
+"""
+
+from typing import Dict, List, Optional, Tuple
+import logging
+import uuid
+
+from batch_generation import iter_workouts
+from weekly_planning import WEEKLY_SCHEDULE, daily_preferences
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PLAN_STORE_PATH = 'plans.db'
+
+# Days a plan is kept after it was last changed
+PLAN_RETENTION_DAYS = 365
+
+DEFAULT_WEEKS = 4
+MAX_WEEKS = 12
+
+# Relative training volume per week of a block: three build weeks and a deload
+VOLUME_PROGRESSION = (1.0, 1.1, 1.2, 0.7)
+
+# Extra volume for each block after the first
+BLOCK_VOLUME_STEP = 0.05
+
+# Readiness change from one day's feedback, and the share of it carried to the next day
+HARD_SESSION_ADJUSTMENT = -0.1
+EASY_SESSION_ADJUSTMENT = 0.05
+READINESS_CARRY = 0.5
+MIN_READINESS = 0.7
+MAX_READINESS = 1.2
+
+# Readiness is rounded so that the effect of feedback dies out after a few days
+READINESS_DECIMALS = 3
+
+MIN_SESSION_MINUTES = 15
+MAX_SESSION_MINUTES = 120
+
+
+def week_volume(week: int) -> float:
+    """Relative volume of a week (0-based) within the block progression."""
+    block, position = divmod(week, len(VOLUME_PROGRESSION))
+    return VOLUME_PROGRESSION[position] * (1 + BLOCK_VOLUME_STEP * block)
+
+
+def feedback_adjustment(feedback: Optional[Dict]) -> float:
+    """
+    Readiness change implied by feedback on a completed day.
+
+    Args:
+        feedback (Dict): difficulty_rating (1-10) and completion_rate (0.0-1.0)
+
+    Returns:
+        float: HARD_SESSION_ADJUSTMENT, EASY_SESSION_ADJUSTMENT or 0.0
+    """
+    if not feedback:
+        return 0.0
+    difficulty = feedback.get('difficulty_rating', 5)
+    completion = feedback.get('completion_rate', 1.0)
+    if difficulty >= 8 or completion < 0.8:
+        return HARD_SESSION_ADJUSTMENT
+    if difficulty <= 4 and completion >= 0.95:
+        return EASY_SESSION_ADJUSTMENT
+    return 0.0
+
+
+class MesocyclePlan:
+    """A multi-week training block that regenerates only the days affected by a change."""
+
+    def __init__(self, base_preferences: Dict, weeks: int = DEFAULT_WEEKS, schedule: Optional[Dict] = None,
+                 plan_id: Optional[str] = None):
+        """
+        Initialize a plan. No workouts are generated until generate() is called.
+
+        Args:
+            base_preferences (Dict): time_available, goal, equipment, experience_level
+            weeks (int): Number of weeks in the cycle
+            schedule (Dict): Day -> {'type', 'focus'} (defaults to WEEKLY_SCHEDULE)
+            plan_id (str): ID to store the plan under (generated if omitted)
+
+        Raises:
+            ValueError: If weeks is out of range
+        """
+        if not 1 <= weeks <= MAX_WEEKS:
+            raise ValueError(f"weeks must be between 1 and {MAX_WEEKS}, got {weeks}")
+        self.id = plan_id or f"plan_{uuid.uuid4().hex[:12]}"
+        # Bumped on every stored change, for conditional puts
+        self.version = 0
+        self.base_preferences = dict(base_preferences)
+        self.schedule = schedule or WEEKLY_SCHEDULE
+        self.weeks = weeks
+        week_days = daily_preferences(self.base_preferences, self.schedule)
+        self.days = [
+            {'week': week + 1, 'day': day, 'overrides': {}, 'feedback': None, 'readiness': None,
+             'preferences': None, 'defaults': preferences, 'workout': None, 'generated_from': None}
+            for week in range(weeks) for day, preferences in week_days.items()
+        ]
+        self._refresh_targets(0)
+
+    def index(self, week: int, day: str) -> int:
+        """
+        Position of a day in the cycle.
+
+        Raises:
+            ValueError: If the week or day is not in the plan
+        """
+        if not 1 <= week <= self.weeks or day not in self.schedule:
+            raise ValueError(f"No {day} in week {week} of this plan")
+        return (week - 1) * len(self.schedule) + list(self.schedule).index(day)
+
+    def _target_preferences(self, index: int, readiness: float) -> Dict:
+        """Preferences for a day: its defaults and overrides, with the session length as load target."""
+        slot = self.days[index]
+        preferences = dict(slot['defaults'], **slot['overrides'])
+        minutes = preferences.get('time_available', 60) * week_volume(index // len(self.schedule)) * readiness
+        preferences['time_available'] = max(MIN_SESSION_MINUTES, min(MAX_SESSION_MINUTES, round(minutes)))
+        return preferences
+
+    def _refresh_targets(self, start: int):
+        """
+        Recompute readiness and load targets from day `start` onward.
+
+        Stops at the first later day whose readiness is unchanged, since
+        nothing after it can have changed either.
+        """
+        # Every day after the first follows the same recurrence from its
+        # predecessor's stored readiness, whether or not it starts the pass
+        readiness = self.days[start - 1]['readiness'] if start > 0 else 1.0
+        for index in range(start, len(self.days)):
+            slot = self.days[index]
+            if index > 0:
+                readiness = 1 + (readiness - 1) * READINESS_CARRY + feedback_adjustment(self.days[index - 1]['feedback'])
+            readiness = round(max(MIN_READINESS, min(MAX_READINESS, readiness)), READINESS_DECIMALS)
+            if index > start and readiness == slot['readiness']:
+                break
+            slot['readiness'] = readiness
+            slot['preferences'] = self._target_preferences(index, readiness)
+
+    def stale_days(self) -> List[Tuple[int, str]]:
+        """(week, day) of every day whose workout is missing or was generated from other preferences."""
+        return [(slot['week'], slot['day']) for slot in self.days if slot['preferences'] != slot['generated_from']]
+
+    def update_day(self, week: int, day: str, preferences: Optional[Dict] = None,
+                   feedback: Optional[Dict] = None) -> List[Tuple[int, str]]:
+        """
+        Change one day's preferences and/or record feedback on it.
+
+        Args:
+            week (int): Week number, starting at 1
+            day (str): Day name from the schedule
+            preferences (Dict): Overrides for this day, e.g. time_available
+                or equipment; merged into earlier overrides
+            feedback (Dict): difficulty_rating and completion_rate for the
+                completed day; affects the following days' load targets
+
+        Returns:
+            List[Tuple[int, str]]: Days that now need regenerating
+
+        Raises:
+            ValueError: If the week or day is not in the plan
+        """
+        index = self.index(week, day)
+        slot = self.days[index]
+        if preferences:
+            slot['overrides'].update(preferences)
+        if feedback is not None:
+            slot['feedback'] = dict(feedback)
+        slot['preferences'] = self._target_preferences(index, slot['readiness'])
+        if index + 1 < len(self.days):
+            self._refresh_targets(index + 1)
+        return self.stale_days()
+
+    def generate(self, planner) -> List[Tuple[int, str]]:
+        """
+        Generate workouts for every stale day.
+
+        Args:
+            planner: Any workout planner accepting generate_workout(preferences)
+
+        Returns:
+            List[Tuple[int, str]]: Days that were regenerated
+
+        Raises:
+            ValueError: If any day fails to generate; days that succeeded keep
+                their new workouts
+        """
+        stale = [index for index, slot in enumerate(self.days) if slot['preferences'] != slot['generated_from']]
+        if not stale:
+            return []
+        preference_sets = [self.days[index]['preferences'] for index in stale]
+        errors = []
+        for result in iter_workouts(planner, preference_sets):
+            slot = self.days[stale[result['index']]]
+            if result['success']:
+                slot['workout'] = result['workout']
+                slot['generated_from'] = preference_sets[result['index']]
+            else:
+                errors.append(f"Week {slot['week']} {slot['day']}: {result['error']}")
+        if errors:
+            raise ValueError('; '.join(errors))
+        logger.info(f"Regenerated {len(stale)} of {len(self.days)} days of plan {self.id}")
+        return [(self.days[index]['week'], self.days[index]['day']) for index in stale]
+
+    def to_dict(self) -> Dict:
+        """JSON-serializable form, keyed by 'id' for storing in a WorkoutStore."""
+        return {
+            'id': self.id,
+            'version': self.version,
+            'base_preferences': self.base_preferences,
+            'schedule': self.schedule,
+            'weeks': self.weeks,
+            'days': self.days
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'MesocyclePlan':
+        """
+        Rebuild a plan saved with to_dict().
+
+        `data` itself is left untouched, so it can come straight from a
+        store's cache. Workouts are shared rather than copied; the plan
+        replaces them but never modifies them.
+        """
+        plan = cls.__new__(cls)
+        plan.id = data['id']
+        plan.version = data.get('version', 0)
+        plan.base_preferences = data['base_preferences']
+        plan.schedule = data['schedule']
+        plan.weeks = data['weeks']
+        plan.days = [dict(slot, overrides=dict(slot['overrides'])) for slot in data['days']]
+        return plan
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Request Profiling
+
+Opt-in cProfile capture of workout generation and feedback processing.
+A request is profiled when it carries the admin token in the X-Profile-Token
+header, or when it is picked at random at PROFILE_SAMPLE_RATE; background
+feedback batches are sampled at the same rate. Each profile is stored under
+its request id as a .prof dump (for pstats/snakeviz) plus a JSON summary of
+per-stage timings and the most expensive functions.
+
+When neither PROFILE_TOKEN nor PROFILE_SAMPLE_RATE is set nothing is
+installed: no request hooks, no planner wrappers, no endpoints.
+"""
+
+from typing import Dict, List, Optional
+import cProfile
+import hmac
+import json
+import logging
+import os
+import pstats
+import random
+import re
+import tempfile
+import threading
+import time
+import uuid
+
+from flask import abort, g, jsonify, request, send_file
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = 'X-Profile-Token'
+PROFILE_ID_HEADER = 'X-Profile-Id'
+
+DEFAULT_PROFILE_DIR = os.path.join(tempfile.gettempdir(), 'ai_workout_planner_profiles')
+
+# Oldest profiles are deleted beyond this many
+DEFAULT_MAX_PROFILES = 200
+
+# Planner entry points run under the profiler
+PROFILED_METHODS = ('generate_workout', 'record_feedback_batch')
+
+# Functions reported as stages, named like the /metrics stages
+STAGE_FUNCTIONS = {
+    '_candidate_pool': 'catalog_filter',
+    'recommend_exercises': 'recommendation',
+    'predict_exercise_difficulty': 'difficulty_prediction',
+    'predict_progress': 'progress_prediction',
+    '_retrain_models': 'retraining',
+    '_learn_from_feedback': 'retraining',
+    'save_workout': 'save_workout'
+}
+
+# Number of functions listed in each summary, by cumulative time
+TOP_FUNCTIONS = 25
+
+PROFILE_ID_PATTERN = re.compile(r'^[A-Za-z0-9_.-]{1,64}$')
+
+
+class RequestProfiler:
+    """Captures and stores profiles of selected planner calls."""
+
+    def __init__(self, directory: str = DEFAULT_PROFILE_DIR, sample_rate: float = 0.0,
+                 token: Optional[str] = None, max_profiles: int = DEFAULT_MAX_PROFILES):
+        """
+        Args:
+            directory (str): Where profiles are stored
+            sample_rate (float): Fraction of requests and feedback batches to profile
+            token (str): Admin token that forces profiling via PROFILE_HEADER
+            max_profiles (int): Number of profiles kept on disk
+        """
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.token = token
+        self.max_profiles = max_profiles
+        self._local = threading.local()
+        # cProfile supports one active profiler per process on newer Pythons
+        self._profiling = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.token) or self.sample_rate > 0
+
+    def is_admin(self, headers) -> bool:
+        supplied = headers.get(PROFILE_HEADER)
+        return bool(self.token and supplied and hmac.compare_digest(supplied, self.token))
+
+    def should_profile(self, headers) -> bool:
+        """Decide whether a request is profiled."""
+        return self.is_admin(headers) or random.random() < self.sample_rate
+
+    def begin(self, profile_id: str, **details):
+        """Start a profiling session for the calls made on this thread."""
+        self._local.session = {'id': profile_id, 'profile': cProfile.Profile(),
+                               'calls': [], 'details': details}
+
+    def end(self) -> Optional[str]:
+        """
+        Finish this thread's session, storing it if anything was profiled.
+
+        Returns:
+            str: The stored profile id, or None
+        """
+        session = getattr(self._local, 'session', None)
+        self._local.session = None
+        if not session or not session['calls']:
+            return None
+        self._store(session)
+        return session['id']
+
+    def instrument(self, planner, methods=PROFILED_METHODS):
+        """Route a planner's entry points through the profiler."""
+        for name in methods:
+            method = getattr(planner, name, None)
+            if method is not None:
+                setattr(planner, name, self._wrap(name, method))
+
+    def _wrap(self, name: str, method):
+        def profiled(*args, **kwargs):
+            session = getattr(self._local, 'session', None)
+            if session is None:
+                if random.random() >= self.sample_rate:
+                    return method(*args, **kwargs)
+                # Sampled background call, e.g. a feedback batch from the queue
+                self.begin(f"{name}-{uuid.uuid4().hex[:12]}", source=name)
+                try:
+                    return self._run(name, method, args, kwargs)
+                finally:
+                    self.end()
+            return self._run(name, method, args, kwargs)
+        return profiled
+
+    def _run(self, name: str, method, args, kwargs):
+        session = self._local.session
+        if getattr(self._local, 'active', False) or not self._profiling.acquire(blocking=False):
+            # Nested entry point, or another thread is profiling
+            return method(*args, **kwargs)
+        self._local.active = True
+        start = time.perf_counter()
+        try:
+            return session['profile'].runcall(method, *args, **kwargs)
+        finally:
+            session['calls'].append({'method': name, 'seconds': time.perf_counter() - start})
+            self._local.active = False
+            self._profiling.release()
+
+    def _store(self, session: Dict):
+        profile_id = session['id']
+        stats = pstats.Stats(session['profile'])
+
+        stages, functions = {}, []
+        for (filename, line, function), (_, calls, total, cumulative, _) in stats.stats.items():
+            stage = STAGE_FUNCTIONS.get(function)
+            if stage:
+                entry = stages.setdefault(stage, {'calls': 0, 'seconds': 0.0})
+                entry['calls'] += calls
+                entry['seconds'] += cumulative
+            functions.append({'function': f"{os.path.basename(filename)}:{line}({function})",
+                              'calls': calls, 'total_seconds': total, 'cumulative_seconds': cumulative})
+        functions.sort(key=lambda f: f['cumulative_seconds'], reverse=True)
+
+        summary = dict(session['details'], id=profile_id, created_at=time.time(),
+                       calls=session['calls'], stages=stages,
+                       top_functions=functions[:TOP_FUNCTIONS])
+        stats.dump_stats(os.path.join(self.directory, f"{profile_id}.prof"))
+        with open(os.path.join(self.directory, f"{profile_id}.json"), 'w') as f:
+            json.dump(summary, f, indent=2)
+        logger.info(f"Stored profile {profile_id}")
+        self._prune()
+
+    def _prune(self):
+        summaries = sorted((entry for entry in os.scandir(self.directory) if entry.name.endswith('.json')),
+                           key=lambda entry: entry.stat().st_mtime)
+        for entry in summaries[:max(0, len(summaries) - self.max_profiles)]:
+            for path in (entry.path, entry.path[:-len('.json')] + '.prof'):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    def list(self) -> List[Dict]:
+        """Stored profiles, newest first, without their function tables."""
+        profiles = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.json'):
+                summary = self.get(entry.name[:-len('.json')])
+                if summary:
+                    summary.pop('top_functions', None)
+                    profiles.append(summary)
+        return sorted(profiles, key=lambda p: p['created_at'], reverse=True)
+
+    def get(self, profile_id: str) -> Optional[Dict]:
+        path = self.path_for(profile_id, '.json')
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def path_for(self, profile_id: str, suffix: str = '.prof') -> Optional[str]:
+        """Path of a stored profile file, or None for a malformed id."""
+        if not PROFILE_ID_PATTERN.match(profile_id or ''):
+            return None
+        return os.path.join(self.directory, profile_id + suffix)
+
+
+def profiler_from_env() -> Optional[RequestProfiler]:
+    """Build a profiler from PROFILE_TOKEN / PROFILE_SAMPLE_RATE / PROFILE_DIR, or None if disabled."""
+    token = os.environ.get('PROFILE_TOKEN') or None
+    sample_rate = float(os.environ.get('PROFILE_SAMPLE_RATE', 0) or 0)
+    if not token and sample_rate <= 0:
+        return None
+    return RequestProfiler(os.environ.get('PROFILE_DIR', DEFAULT_PROFILE_DIR), sample_rate, token)
+
+
+def install_profiling(app, planner, profiler: Optional[RequestProfiler] = None) -> Optional[RequestProfiler]:
+    """
+    Profile selected requests of a Flask app and serve the stored profiles.
+
+    Adds GET /api/profiles, /api/profiles/<id> and /api/profiles/<id>/download;
+    they require the admin token when one is configured. Profiled responses
+    carry their id in the X-Profile-Id header.
+
+    Args:
+        app: Flask application
+        planner: Planner whose entry points are profiled (may be None)
+        profiler (RequestProfiler): Defaults to profiler_from_env()
+
+    Returns:
+        RequestProfiler: The installed profiler, or None if profiling is disabled
+    """
+    profiler = profiler or profiler_from_env()
+    if profiler is None or not profiler.enabled:
+        return None
+    if planner is not None:
+        profiler.instrument(planner)
+
+    def require_admin():
+        if profiler.token and not profiler.is_admin(request.headers):
+            abort(403)
+
+    @app.before_request
+    def _begin_profile():
+        if profiler.should_profile(request.headers):
+            request_id = request.headers.get('X-Request-ID', '')
+            if not PROFILE_ID_PATTERN.match(request_id):
+                request_id = uuid.uuid4().hex
+            profiler.begin(request_id, method=request.method, path=request.path)
+            g.profiling = True
+
+    @app.after_request
+    def _end_profile(response):
+        if g.pop('profiling', False):
+            profile_id = profiler.end()
+            if profile_id:
+                response.headers[PROFILE_ID_HEADER] = profile_id
+        return response
+
+    @app.teardown_request
+    def _discard_profile(error):
+        if g.pop('profiling', False):
+            profiler.end()
+
+    @app.route('/api/profiles')
+    def api_list_profiles():
+        require_admin()
+        return jsonify({'success': True, 'profiles': profiler.list()})
+
+    @app.route('/api/profiles/<profile_id>')
+    def api_get_profile(profile_id):
+        require_admin()
+        summary = profiler.get(profile_id)
+        if summary is None:
+            return jsonify({'success': False, 'error': 'Profile not found'}), 404
+        return jsonify({'success': True, 'profile': summary})
+
+    @app.route('/api/profiles/<profile_id>/download')
+    def api_download_profile(profile_id):
+        require_admin()
+        path = profiler.path_for(profile_id)
+        if not path or not os.path.exists(path):
+            return jsonify({'success': False, 'error': 'Profile not found'}), 404
+        return send_file(path, mimetype='application/octet-stream',
+                         as_attachment=True, download_name=f"{profile_id}.prof")
+
+    logger.info(f"Request profiling enabled (sample rate {profiler.sample_rate})")
+    return profiler
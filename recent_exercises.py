@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Recent Exercises
+
+Remembers which exercises were prescribed in each user's last few
+workouts, so the planners can favour exercises the athlete has not just
+done. The most recent exercise IDs are kept in a fixed-size ring. A table
+with one byte per catalog exercise counts how often each ID is in the ring.
+Checking whether a candidate is recent is a single index lookup, and
+recording an exercise overwrites one ring slot.
+
+Each user's ring is stored as a row in its own SQLite file, apart from the
+learned models. It is loaded when a workout is generated for the user and
+written back, in one transaction, when the workout is recorded. Every
+process sees the same histories, and they survive restarts. Users with no
+workout for RECENT_RETENTION_DAYS are forgotten.
+
+Configuration (environment):
+    RECENT_EXERCISES_PATH         Database file (default: recent_exercises.db)
+"""
+
+from typing import Dict, Iterable, List, Optional
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Exercise IDs remembered (roughly the last three workouts)
+RECENT_CAPACITY = 24
+
+# Score multiplier for recently prescribed exercises
+RECENT_WEIGHT = 0.25
+
+# Ring occupancy per ID is stored in a byte
+MAX_CAPACITY = 255
+
+DEFAULT_RECENT_PATH = os.environ.get('RECENT_EXERCISES_PATH', 'recent_exercises.db')
+
+# Days a user's history is kept after their last prescribed workout
+RECENT_RETENTION_DAYS = 30
+
+# Seconds between retention passes
+PRUNE_INTERVAL = 3600
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS recent_exercises (
+    user_id TEXT PRIMARY KEY,
+    names TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS recent_exercises_updated_at ON recent_exercises (updated_at);
+"""
+
+_EMPTY = -1
+
+
+class RecentExercises:
+    """Fixed-size ring of recently prescribed exercise IDs with O(1) membership."""
+
+    def __init__(self, ids: Dict[str, int], capacity: int = RECENT_CAPACITY):
+        """
+        Initialize an empty history.
+
+        Args:
+            ids (Dict[str, int]): Exercise name -> catalog exercise ID
+            capacity (int): Number of exercise IDs remembered (capped at half
+                the catalog)
+
+        Raises:
+            ValueError: If capacity is not between 1 and MAX_CAPACITY
+        """
+        if not 1 <= capacity <= MAX_CAPACITY:
+            raise ValueError(f"capacity must be between 1 and {MAX_CAPACITY}, got {capacity}")
+        self.ids = ids
+        # Remember at most half the catalog, so some exercises are always fresh
+        self._ring = [_EMPTY] * max(1, min(capacity, len(ids) // 2))
+        self._position = 0
+        self._counts = bytearray(len(ids))
+        self._lock = threading.Lock()
+
+    def __contains__(self, name: str) -> bool:
+        index = self.ids.get(name)
+        return index is not None and self._counts[index] > 0
+
+    def __len__(self) -> int:
+        return sum(1 for index in self._ring if index != _EMPTY)
+
+    def weight(self, name: str) -> float:
+        """Score multiplier for an exercise: RECENT_WEIGHT if recently prescribed, else 1.0."""
+        index = self.ids.get(name)
+        return RECENT_WEIGHT if index is not None and self._counts[index] else 1.0
+
+    def record(self, names: Iterable[str]):
+        """
+        Record exercises as prescribed, evicting the oldest once the ring is full.
+
+        Names outside the catalog are ignored.
+        """
+        with self._lock:
+            self._record(names)
+
+    def _record(self, names: Iterable[str]):
+        for name in names:
+            index = self.ids.get(name)
+            if index is None:
+                logger.debug(f"Ignoring unknown exercise: {name}")
+                continue
+            evicted = self._ring[self._position]
+            if evicted != _EMPTY:
+                self._counts[evicted] -= 1
+            self._ring[self._position] = index
+            self._counts[index] += 1
+            self._position = (self._position + 1) % len(self._ring)
+
+    def restore(self, names: Iterable[str]):
+        """Replace the history with `names`, oldest first, e.g. as returned by names()."""
+        names = list(names)
+        with self._lock:
+            self._ring = [_EMPTY] * len(self._ring)
+            self._position = 0
+            self._counts = bytearray(len(self._counts))
+            self._record(names)
+
+    def record_workout(self, workout: Dict):
+        """Record every exercise in a generated workout."""
+        self.record(exercise['name'] for section in ('strength_exercises', 'metcon_exercises', 'accessory_exercises')
+                    for exercise in workout.get(section, []))
+
+    def names(self) -> List[str]:
+        """Recent exercise names, oldest first (as stored)."""
+        by_id = {index: name for name, index in self.ids.items()}
+        capacity = len(self._ring)
+        ordered = (self._ring[(self._position + offset) % capacity] for offset in range(capacity))
+        return [by_id[index] for index in ordered if index != _EMPTY]
+
+
+class UserRecentExercises:
+    """Each user's recent exercises, kept in SQLite so every process shares them."""
+
+    def __init__(self, ids: Dict[str, int], path: str = DEFAULT_RECENT_PATH, capacity: int = RECENT_CAPACITY,
+                 retention_days: Optional[int] = RECENT_RETENTION_DAYS):
+        """
+        Initialize the store. The database is opened on first use.
+
+        Args:
+            ids (Dict[str, int]): Exercise name -> catalog exercise ID
+            path (str): SQLite database file
+            capacity (int): Number of exercise IDs remembered per user
+            retention_days (int): Forget users with no workout for this many
+                days (None keeps them forever)
+        """
+        self.ids = ids
+        self.path = path
+        self.capacity = capacity
+        self.retention_days = retention_days
+        self._conn = None
+        self._lock = threading.Lock()
+        self._last_prune = 0.0
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+            self._conn.execute('PRAGMA busy_timeout=5000')
+            self._conn.executescript(SCHEMA)
+        return self._conn
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection().execute('SELECT COUNT(*) FROM recent_exercises').fetchone()[0]
+
+    def _load(self, user_id: str) -> RecentExercises:
+        row = self._connection().execute(
+            'SELECT names FROM recent_exercises WHERE user_id = ?', (user_id,)
+        ).fetchone()
+        recent = RecentExercises(self.ids, self.capacity)
+        if row is not None:
+            recent.restore(json.loads(row[0]))
+        return recent
+
+    def get(self, user_id: str) -> RecentExercises:
+        """Return a snapshot of a user's history (empty for a new user)."""
+        with self._lock:
+            return self._load(user_id)
+
+    def record_workout(self, user_id: str, workout: Dict) -> RecentExercises:
+        """
+        Add a workout prescribed to a user to their history.
+
+        The read, update and write happen in one write transaction, so
+        processes recording for the same user never lose each other's
+        workouts.
+
+        Returns:
+            RecentExercises: The user's updated history
+        """
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                recent = self._load(user_id)
+                recent.record_workout(workout)
+                conn.execute(
+                    'INSERT OR REPLACE INTO recent_exercises (user_id, names, updated_at) VALUES (?, ?, ?)',
+                    (user_id, json.dumps(recent.names()), now)
+                )
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+            if self.retention_days is not None and now - self._last_prune >= PRUNE_INTERVAL:
+                self._prune(now)
+        return recent
+
+    def prune(self, now: Optional[float] = None) -> int:
+        """
+        Forget users with no workout within the retention period.
+
+        Returns:
+            int: Number of users forgotten
+        """
+        if self.retention_days is None:
+            return 0
+        with self._lock:
+            return self._prune(now if now is not None else time.time())
+
+    def _prune(self, now: float) -> int:
+        self._last_prune = now
+        cursor = self._connection().execute(
+            'DELETE FROM recent_exercises WHERE updated_at < ?', (now - self.retention_days * 86400,)
+        )
+        if cursor.rowcount:
+            logger.info(f"Forgot the recent exercises of {cursor.rowcount} inactive user(s)")
+        return cursor.rowcount
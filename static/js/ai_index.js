@@ -0,0 +1,72 @@
+// Preset functionality
+function setPreset(type) {
+    const timeSelect = document.getElementById('time_available');
+    const goalRadios = document.querySelectorAll('input[name="goal"]');
+    const equipmentCheckboxes = document.querySelectorAll('input[name="equipment"]');
+    const experienceRadios = document.querySelectorAll('input[name="experience_level"]');
+
+    switch(type) {
+        case 'quick':
+            timeSelect.value = '30';
+            goalRadios[0].checked = true; // BJJ Performance
+            equipmentCheckboxes[0].checked = true; // Bodyweight only
+            experienceRadios[1].checked = true; // Intermediate
+            break;
+        case 'strength':
+            timeSelect.value = '60';
+            goalRadios[1].checked = true; // Strength
+            equipmentCheckboxes[0].checked = true; // Bodyweight
+            equipmentCheckboxes[1].checked = true; // Barbell
+            equipmentCheckboxes[2].checked = true; // Dumbbells
+            experienceRadios[2].checked = true; // Advanced
+            break;
+        case 'conditioning':
+            timeSelect.value = '45';
+            goalRadios[2].checked = true; // Conditioning
+            equipmentCheckboxes[0].checked = true; // Bodyweight
+            equipmentCheckboxes[5].checked = true; // Assault Bike
+            experienceRadios[1].checked = true; // Intermediate
+            break;
+        case 'bjj':
+            timeSelect.value = '45';
+            goalRadios[0].checked = true; // BJJ Performance
+            equipmentCheckboxes[0].checked = true; // Bodyweight
+            equipmentCheckboxes[1].checked = true; // Barbell
+            equipmentCheckboxes[3].checked = true; // Kettlebell
+            equipmentCheckboxes[4].checked = true; // Pull-up bar
+            experienceRadios[2].checked = true; // Advanced
+            break;
+    }
+}
+
+// Add some interactivity
+document.addEventListener('DOMContentLoaded', function() {
+    // Animate form elements on load
+    const formElements = document.querySelectorAll('.form-group');
+    formElements.forEach((element, index) => {
+        element.style.opacity = '0';
+        element.style.transform = 'translateY(20px)';
+        setTimeout(() => {
+            element.style.transition = 'all 0.5s ease';
+            element.style.opacity = '1';
+            element.style.transform = 'translateY(0)';
+        }, index * 100);
+    });
+
+    // Add loading state to submit button
+    const form = document.querySelector('form');
+    const submitBtn = document.querySelector('.btn');
+
+    form.addEventListener('submit', function() {
+        submitBtn.textContent = '🤖 Generating...';
+        submitBtn.disabled = true;
+    });
+
+    // Prevent zoom on input focus (iOS)
+    const inputs = document.querySelectorAll('input, select');
+    inputs.forEach(input => {
+        input.addEventListener('focus', function() {
+            this.style.fontSize = '16px';
+        });
+    });
+});
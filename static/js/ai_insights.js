@@ -0,0 +1,23 @@
+// Animate chart fills
+document.addEventListener('DOMContentLoaded', function() {
+    const chartFills = document.querySelectorAll('.chart-fill');
+    chartFills.forEach((fill, index) => {
+        const width = fill.style.width;
+        fill.style.width = '0%';
+        setTimeout(() => {
+            fill.style.width = width;
+        }, index * 200);
+    });
+
+    // Animate insight cards
+    const cards = document.querySelectorAll('.insight-card');
+    cards.forEach((card, index) => {
+        card.style.opacity = '0';
+        card.style.transform = 'translateY(20px)';
+        setTimeout(() => {
+            card.style.transition = 'all 0.5s ease';
+            card.style.opacity = '1';
+            card.style.transform = 'translateY(0)';
+        }, index * 200);
+    });
+});
@@ -0,0 +1,65 @@
+// Exercise tracking
+function markCompleted(btn) {
+    const tracker = btn.parentElement;
+    tracker.querySelectorAll('.track-btn').forEach(b => b.classList.remove('completed'));
+    btn.classList.add('completed');
+    btn.textContent = '✓ Completed';
+}
+
+function markSkipped(btn) {
+    const tracker = btn.parentElement;
+    tracker.querySelectorAll('.track-btn').forEach(b => b.classList.remove('completed'));
+    btn.classList.add('completed');
+    btn.textContent = '⏭ Skipped';
+}
+
+function markFailed(btn) {
+    const tracker = btn.parentElement;
+    tracker.querySelectorAll('.track-btn').forEach(b => b.classList.remove('completed'));
+    btn.classList.add('completed');
+    btn.textContent = '❌ Failed';
+}
+
+function provideFeedback() {
+    // Store workout completion data
+    const completedExercises = [];
+    document.querySelectorAll('.exercise-item').forEach(item => {
+        const name = item.querySelector('.exercise-name').textContent;
+        const completedBtn = item.querySelector('.track-btn.completed');
+        let status = 'not_completed';
+
+        if (completedBtn) {
+            if (completedBtn.textContent.includes('Completed')) status = 'completed';
+            else if (completedBtn.textContent.includes('Skipped')) status = 'skipped';
+            else if (completedBtn.textContent.includes('Failed')) status = 'failed';
+        }
+
+        completedExercises.push({ name, status });
+    });
+
+    // Redirect to feedback page with data
+    const workoutData = {
+        workout_id: document.body.dataset.workoutId,
+        duration: seconds,
+        exercises: completedExercises,
+        timestamp: new Date().toISOString()
+    };
+
+    localStorage.setItem('workoutFeedback', JSON.stringify(workoutData));
+    window.location.href = '/feedback';
+}
+
+// Add some interactivity
+document.addEventListener('DOMContentLoaded', function() {
+    // Animate exercise items on load
+    const exerciseItems = document.querySelectorAll('.exercise-item');
+    exerciseItems.forEach((item, index) => {
+        item.style.opacity = '0';
+        item.style.transform = 'translateY(20px)';
+        setTimeout(() => {
+            item.style.transition = 'all 0.5s ease';
+            item.style.opacity = '1';
+            item.style.transform = 'translateY(0)';
+        }, index * 100);
+    });
+});
@@ -0,0 +1,8 @@
+// Ensure at least one equipment is selected
+document.querySelector('form').addEventListener('submit', function(e) {
+    const equipment = document.querySelectorAll('input[name="equipment"]:checked');
+    if (equipment.length === 0) {
+        e.preventDefault();
+        alert('Please select at least one piece of equipment.');
+    }
+});
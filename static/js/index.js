@@ -0,0 +1,10 @@
+// Time slider functionality
+const timeSlider = document.getElementById('time_slider');
+const timeDisplay = document.getElementById('time_display');
+const timeInput = document.getElementById('time_available');
+
+timeSlider.addEventListener('input', function() {
+    const time = this.value;
+    timeDisplay.textContent = time + ' minutes';
+    timeInput.value = time;
+});
@@ -0,0 +1,67 @@
+// Fill in each day as soon as the server finishes generating it
+const MAX_LISTED = 3;
+
+function titleCase(text) {
+    return String(text || '').replace(/_/g, ' ').replace(/\b\w/g, c => c.toUpperCase());
+}
+
+function exerciseItem(text, className) {
+    const item = document.createElement('div');
+    item.className = 'exercise-item' + (className ? ' ' + className : '');
+    item.textContent = text;
+    return item;
+}
+
+function renderDay(result) {
+    const section = document.getElementById('day-' + result.day);
+    if (!section) return;
+    section.classList.remove('pending');
+    const list = section.querySelector('[data-field="exercises"]');
+    list.replaceChildren();
+
+    if (!result.success) {
+        section.classList.add('failed');
+        list.appendChild(exerciseItem('Could not generate this day: ' + result.error));
+        return;
+    }
+
+    const workout = result.workout;
+    section.querySelector('[data-field="type"]').textContent = titleCase(workout.workout_type);
+    section.querySelector('[data-field="duration"]').textContent = workout.estimated_duration + ' min';
+
+    const exercises = ['strength', 'metcon', 'accessory']
+        .flatMap(name => (workout[name] && workout[name].exercises) || []);
+    exercises.slice(0, MAX_LISTED).forEach(exercise => {
+        const item = exerciseItem('');
+        const name = document.createElement('div');
+        name.className = 'exercise-name';
+        name.textContent = exercise.name;
+        const details = document.createElement('div');
+        details.className = 'exercise-details';
+        const amount = exercise.sets ? `${exercise.sets} sets × ${exercise.reps} reps`
+                                     : (exercise.duration ? `${exercise.duration} minutes` : `${exercise.reps} reps`);
+        details.textContent = `${amount} • ${titleCase(exercise.muscle_group)}`;
+        item.append(name, details);
+        list.appendChild(item);
+    });
+    if (exercises.length > MAX_LISTED) {
+        const more = exerciseItem(`+ ${exercises.length - MAX_LISTED} more exercises`);
+        more.style.cssText = 'background: #e3f2fd; color: #1976d2; text-align: center;';
+        list.appendChild(more);
+    }
+}
+
+const status = document.getElementById('plan-status');
+const events = new EventSource(document.body.dataset.streamUrl);
+events.addEventListener('day', event => renderDay(JSON.parse(event.data)));
+events.addEventListener('done', event => {
+    const result = JSON.parse(event.data);
+    status.textContent = result.saved
+        ? `✅ Weekly plan generated and saved as ${result.filename}`
+        : '⚠️ Some days could not be generated; the plan was not saved';
+    events.close();
+});
+events.onerror = () => {
+    status.textContent = '⚠️ Lost connection while generating the plan';
+    events.close();
+};
@@ -0,0 +1,4 @@
+// Auto-start timer when page loads
+window.addEventListener('load', () => {
+    setTimeout(startTimer, 2000);
+});
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Static Assets
+
+Serves the CSS and JavaScript under static/ at fingerprinted URLs such as
+/assets/js/timer.3f9a1c2b7d4e.js. The fingerprint changes whenever a file's
+content does, so responses can be cached by browsers for a year; bodies are
+gzip-compressed once at startup and served to clients that accept it.
+Templates reference assets with `asset_url('js/timer.js')`.
+"""
+
+from typing import Dict, Optional
+import gzip
+import hashlib
+import logging
+import mimetypes
+import os
+
+from flask import Response, abort, request
+
+logger = logging.getLogger(__name__)
+
+ASSET_URL_PREFIX = '/assets'
+
+# Fingerprinted URLs never change content, so caches may keep them for a year
+LONG_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+# Smaller files are not worth a gzip header and a decompression
+MIN_COMPRESS_SIZE = 512
+
+COMPRESSIBLE_TYPES = ('text/', 'application/javascript', 'application/json', 'image/svg+xml')
+
+
+class AssetManifest:
+    """Fingerprinted, pre-compressed copies of the files under a static folder."""
+
+    def __init__(self, static_folder: str):
+        self.static_folder = static_folder
+        self._urls: Dict[str, str] = {}
+        self._assets: Dict[str, Dict] = {}
+        self.build()
+
+    def build(self):
+        """(Re)scan the static folder and fingerprint every file."""
+        urls, assets = {}, {}
+        for directory, _, filenames in os.walk(self.static_folder):
+            for filename in filenames:
+                path = os.path.join(directory, filename)
+                logical = os.path.relpath(path, self.static_folder).replace(os.sep, '/')
+                with open(path, 'rb') as f:
+                    data = f.read()
+
+                digest = hashlib.sha256(data).hexdigest()[:12]
+                stem, ext = os.path.splitext(logical)
+                fingerprinted = f"{stem}.{digest}{ext}"
+                mimetype = mimetypes.guess_type(logical)[0] or 'application/octet-stream'
+
+                compressed = None
+                if len(data) >= MIN_COMPRESS_SIZE and mimetype.startswith(COMPRESSIBLE_TYPES):
+                    compressed = gzip.compress(data, compresslevel=9, mtime=0)
+                    if len(compressed) >= len(data):
+                        compressed = None
+
+                urls[logical] = fingerprinted
+                assets[fingerprinted] = {'data': data, 'gzip': compressed,
+                                         'mimetype': mimetype, 'etag': digest}
+        self._urls, self._assets = urls, assets
+        logger.info(f"Fingerprinted {len(assets)} static assets")
+
+    def url_for(self, logical: str) -> str:
+        """
+        Return the fingerprinted URL of a static file.
+
+        Args:
+            logical (str): Path relative to the static folder, e.g. 'css/index.css'
+
+        Raises:
+            KeyError: If the file does not exist
+        """
+        try:
+            return f"{ASSET_URL_PREFIX}/{self._urls[logical]}"
+        except KeyError:
+            raise KeyError(f"Unknown static asset: {logical}") from None
+
+    def get(self, fingerprinted: str) -> Optional[Dict]:
+        return self._assets.get(fingerprinted)
+
+    def response(self, filename: str) -> Response:
+        """Serve an asset with long-lived caching and gzip when accepted."""
+        asset = self.get(filename)
+        if asset is None:
+            abort(404)
+
+        use_gzip = asset['gzip'] is not None and 'gzip' in request.headers.get('Accept-Encoding', '')
+        response = Response(asset['gzip'] if use_gzip else asset['data'], mimetype=asset['mimetype'])
+        if use_gzip:
+            response.headers['Content-Encoding'] = 'gzip'
+        if asset['gzip'] is not None:
+            response.headers['Vary'] = 'Accept-Encoding'
+        response.headers['Cache-Control'] = LONG_CACHE_CONTROL
+        response.set_etag(asset['etag'])
+        return response.make_conditional(request)
+
+
+def configure_static_assets(app, static_folder: Optional[str] = None) -> AssetManifest:
+    """
+    Serve fingerprinted assets for a Flask app and expose `asset_url()` to templates.
+
+    Args:
+        app: Flask application
+        static_folder (str): Folder to serve (defaults to the app's static folder)
+
+    Returns:
+        AssetManifest: The app's asset manifest
+    """
+    manifest = AssetManifest(static_folder or app.static_folder)
+    app.jinja_env.globals['asset_url'] = manifest.url_for
+    app.add_url_rule(f"{ASSET_URL_PREFIX}/<path:filename>", 'asset', manifest.response)
+    return manifest
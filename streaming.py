@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Streaming Responses
+
+Helpers for endpoints that emit several results (batch and weekly
+generation) as each one is ready, either as newline-delimited JSON or as
+server-sent events for browsers using EventSource.
+"""
+
+from typing import Dict, Iterable, Iterator, Optional
+import json
+
+from flask import Response, stream_with_context
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+SSE_MIMETYPE = 'text/event-stream'
+
+# Keep proxies from buffering the stream or caching it
+STREAM_HEADERS = {
+    'Cache-Control': 'no-cache',
+    'X-Accel-Buffering': 'no'
+}
+
+
+def requested_stream_format(request, body: Optional[Dict] = None) -> Optional[str]:
+    """
+    Return 'sse', 'ndjson' or None (no streaming) for a request.
+
+    SSE is chosen by ?stream=sse or an Accept: text/event-stream header;
+    NDJSON by ?stream=1 / ?stream=true or a truthy 'stream' body field.
+    """
+    stream = request.args.get('stream', '').lower()
+    if stream == 'sse' or SSE_MIMETYPE in request.headers.get('Accept', ''):
+        return 'sse'
+    if stream in ('1', 'true', 'ndjson') or (body or {}).get('stream'):
+        return 'ndjson'
+    return None
+
+
+def ndjson_lines(items: Iterable[Dict]) -> Iterator[str]:
+    """Encode each item as one JSON line."""
+    for item in items:
+        yield json.dumps(item) + '\n'
+
+
+def sse_events(items: Iterable[Dict], event: str = 'message', done: Optional[Dict] = None) -> Iterator[str]:
+    """
+    Encode each item as a server-sent event.
+
+    Args:
+        items (Iterable[Dict]): Payloads, sent as `event` events
+        event (str): Event name for the payloads
+        done (Dict): Optional payload of a final 'done' event; called after
+            the items are exhausted if it is callable
+    """
+    for item in items:
+        yield f"event: {event}\ndata: {json.dumps(item)}\n\n"
+    if done is not None:
+        payload = done() if callable(done) else done
+        yield f"event: done\ndata: {json.dumps(payload)}\n\n"
+
+
+def stream_response(items: Iterable[Dict], fmt: str, event: str = 'message', done=None) -> Response:
+    """
+    Build a streaming Flask response in the requested format.
+
+    Args:
+        items (Iterable[Dict]): Results, produced lazily
+        fmt (str): 'sse' or 'ndjson'
+        event (str): SSE event name for each item
+        done: SSE 'done' payload, or a callable returning it
+    """
+    if fmt == 'sse':
+        body, mimetype = sse_events(items, event, done), SSE_MIMETYPE
+    else:
+        body, mimetype = ndjson_lines(items), NDJSON_MIMETYPE
+    return Response(stream_with_context(body), mimetype=mimetype, headers=STREAM_HEADERS)
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Template Caching
+
+Two layers of template caching for the Flask apps:
+
+- A persistent Jinja bytecode cache, so each worker loads compiled
+  templates from disk instead of re-parsing them on boot. Unless
+  JINJA_CACHE_DIR is set, Jinja keeps it in a per-user temp directory that
+  it creates private and refuses to use if another user owns it.
+- A fragment cache for repeated blocks such as per-exercise cards. A block
+  is keyed by its template and the exact data it renders (exercise name and
+  prescription), so identical cards are rendered once and reused as markup.
+"""
+
+from collections import OrderedDict
+from typing import Dict, Optional
+import json
+import logging
+import os
+import threading
+
+from jinja2 import Environment, FileSystemBytecodeCache
+from markupsafe import Markup
+
+logger = logging.getLogger(__name__)
+
+# Number of rendered fragments kept per process
+DEFAULT_FRAGMENT_CACHE_SIZE = 4096
+
+
+class FragmentCache:
+    """LRU cache of rendered template fragments."""
+
+    def __init__(self, maxsize: int = DEFAULT_FRAGMENT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def render(self, env: Environment, template_name: str, context: Dict) -> Markup:
+        """
+        Return the rendered fragment for `context`, rendering it on a miss.
+
+        Args:
+            env (Environment): Environment that loads the fragment template
+            template_name (str): Fragment template, e.g. 'partials/ai_exercise.html'
+            context (Dict): JSON-serializable data the fragment depends on
+        """
+        key = (template_name, json.dumps(context, sort_keys=True, default=str))
+        with self._lock:
+            fragment = self._entries.get(key)
+            if fragment is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return fragment
+            self.misses += 1
+        fragment = Markup(env.get_template(template_name).render(**context))
+        with self._lock:
+            self._entries[key] = fragment
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return fragment
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def install_bytecode_cache(env: Environment, cache_dir: Optional[str] = None):
+    """Store compiled templates under `cache_dir` (JINJA_CACHE_DIR or Jinja's per-user temp directory)."""
+    cache_dir = cache_dir or os.environ.get('JINJA_CACHE_DIR')
+    if cache_dir is None:
+        env.bytecode_cache = FileSystemBytecodeCache()
+        return
+    os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+    env.bytecode_cache = FileSystemBytecodeCache(cache_dir)
+
+
+def install_fragment_cache(env: Environment, cache: Optional[FragmentCache] = None) -> FragmentCache:
+    """Expose `cached_fragment(template_name, **context)` to templates."""
+    cache = cache if cache is not None else FragmentCache()
+    env.globals['cached_fragment'] = lambda template_name, **context: cache.render(env, template_name, context)
+    return cache
+
+
+def configure_template_caching(app, cache_dir: Optional[str] = None) -> FragmentCache:
+    """
+    Enable bytecode and fragment caching for a Flask app.
+
+    Returns:
+        FragmentCache: The app's fragment cache
+    """
+    install_bytecode_cache(app.jinja_env, cache_dir)
+    return install_fragment_cache(app.jinja_env)
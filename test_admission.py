@@ -0,0 +1,59 @@
+import threading
+import time
+
+import pytest
+from flask import Flask
+
+from admission import (PRIORITY_GENERATION, PRIORITY_RETRAINING, AdmissionController, Overloaded,
+                       RoutePolicy, install_admission_control)
+
+
+def test_generation_is_admitted_before_retraining():
+    controller = AdmissionController({
+        'generate': RoutePolicy(limit=1, queue=4, priority=PRIORITY_GENERATION, timeout=5),
+        'retrain': RoutePolicy(limit=1, queue=4, priority=PRIORITY_RETRAINING, timeout=5)
+    }, capacity=1)
+    order = []
+
+    def run(name):
+        with controller.slot(name):
+            order.append(name)
+
+    controller.acquire('retrain')
+    waiters = [threading.Thread(target=run, args=(name,)) for name in ('retrain', 'generate')]
+    for waiter in waiters:
+        waiter.start()
+        time.sleep(0.05)
+    controller.release('retrain')
+    for waiter in waiters:
+        waiter.join()
+    assert order == ['generate', 'retrain']
+
+
+def test_full_queue_is_rejected_with_retry_after():
+    app = Flask(__name__)
+    controller = install_admission_control(app, {
+        'weekly': RoutePolicy(limit=1, queue=0, retry_after=5)
+    })
+
+    @app.route('/weekly')
+    def weekly():
+        return 'plan'
+
+    client = app.test_client()
+    assert client.get('/weekly').status_code == 200
+
+    controller.acquire('weekly')
+    response = client.get('/weekly')
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '5'
+    controller.release('weekly')
+    assert client.get('/weekly').status_code == 200
+    assert controller.snapshot()['running'] == {'weekly': 0}
+
+
+def test_wait_times_out():
+    controller = AdmissionController({'generate': RoutePolicy(limit=1, queue=1, timeout=0.05)})
+    controller.acquire('generate')
+    with pytest.raises(Overloaded):
+        controller.acquire('generate')
@@ -0,0 +1,44 @@
+import gzip
+import json
+
+from flask import Flask
+
+from api_encoding import COLUMNAR_MIMETYPE, api_response, from_columnar, to_columnar
+
+WORKOUT = {
+    'id': 'workout_1',
+    'user_preferences': {'goal': 'strength', 'equipment': ['barbell']},
+    'strength_exercises': [
+        {'name': f"Exercise {i}", 'sets': 4, 'reps': 8 + i, 'equipment': ['barbell'],
+         'ai_recommended': True, 'notes': f"AI-recommended: 4x{8 + i}"}
+        for i in range(40)
+    ]
+}
+
+
+def test_columnar_round_trip_sends_keys_once():
+    table = to_columnar(WORKOUT)['strength_exercises']
+    assert table['constants'] == {'sets': 4, 'ai_recommended': True}
+    assert table['columns'] == ['name', 'reps', 'equipment', 'notes']
+    assert from_columnar(to_columnar(WORKOUT)) == WORKOUT
+
+
+def test_content_negotiation_and_compression():
+    app = Flask(__name__)
+
+    @app.route('/api/workout')
+    def workout():
+        return api_response({'success': True, 'workout': WORKOUT})
+
+    client = app.test_client()
+    plain = client.get('/api/workout')
+    assert plain.mimetype == 'application/json'
+    assert plain.get_json()['workout'] == WORKOUT
+
+    compact = client.get('/api/workout', headers={'Accept': COLUMNAR_MIMETYPE, 'Accept-Encoding': 'gzip'})
+    assert compact.mimetype == COLUMNAR_MIMETYPE
+    assert compact.headers['Content-Encoding'] == 'gzip'
+    body = json.loads(gzip.decompress(compact.data))
+    assert from_columnar(body)['workout'] == WORKOUT
+    assert len(compact.data) < len(plain.data) / 2
+    assert client.get('/api/workout?format=columnar').mimetype == COLUMNAR_MIMETYPE
@@ -0,0 +1,94 @@
+import asyncio
+import json
+
+from async_server import AsyncWorkoutServer
+
+PREFERENCES = {'time_available': 45, 'goal': 'bjj_performance', 'equipment': ['bodyweight'],
+               'experience_level': 'intermediate'}
+
+
+async def fetch(port, method, path, payload=None, raw=None):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    body = raw if raw is not None else (json.dumps(payload).encode() if payload is not None else b'')
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: test\r\nConnection: close\r\n"
+                 f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+    response = await reader.read()
+    writer.close()
+    head, _, body = response.partition(b'\r\n\r\n')
+    return int(head.split(b' ')[1]), json.loads(body)
+
+
+async def fetch_raw(port, request):
+    """Send raw request bytes; return the status code of the response."""
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(request)
+    response = await reader.read()
+    writer.close()
+    return int(response.split(b' ')[1])
+
+
+def run_with_server(tmp_path, scenario):
+    async def main():
+        server = AsyncWorkoutServer(data_file=str(tmp_path / 'workout_data.json'),
+                                    model_file=str(tmp_path / 'model.pkl'), workers=1,
+                                    store_path=str(tmp_path / 'workouts.db'),
+                                    queue_path=str(tmp_path / 'feedback.db'))
+        await server.start('127.0.0.1', 0)
+        try:
+            await scenario(server.port)
+        finally:
+            await server.close()
+    asyncio.run(main())
+
+
+def test_generate_fetch_and_errors(tmp_path):
+    async def scenario(port):
+        status, body = await fetch(port, 'POST', '/api/workout', {'preferences': PREFERENCES})
+        assert status == 200 and body['success']
+        workout = body['workout']
+        assert workout['strength_exercises']
+
+        status, body = await fetch(port, 'GET', f"/api/workout/{workout['id']}")
+        assert status == 200 and body['workout']['id'] == workout['id']
+
+        status, body = await fetch(port, 'POST', '/api/workout', raw=b'not json')
+        assert status == 400 and not body['success']
+        assert (await fetch(port, 'GET', '/api/nowhere'))[0] == 404
+        assert (await fetch(port, 'GET', '/ready'))[0] == 200
+
+    run_with_server(tmp_path, scenario)
+
+
+def test_feedback_is_applied_by_trainer(tmp_path):
+    async def scenario(port):
+        for rating in (4, 6, 8):
+            feedback = {'difficulty_rating': rating, 'enjoyment_rating': 7, 'completion_rate': 0.9}
+            status, body = await fetch(port, 'POST', '/api/feedback', {'workout_id': 'w1', 'feedback': feedback})
+            assert status == 202 and body['status'] == 'queued'
+        status, body = await fetch(port, 'POST', '/api/feedback', {'workout_id': 'w1', 'feedback': feedback})
+        assert body['status'] == 'duplicate'
+
+        for _ in range(100):
+            _, body = await fetch(port, 'GET', '/api/feedback/queue')
+            if body['queue']['processed'] == 3:
+                break
+            await asyncio.sleep(0.05)
+        _, body = await fetch(port, 'GET', '/api/insights')
+        assert body['insights']['total_workouts'] == 3
+
+    run_with_server(tmp_path, scenario)
+    assert (tmp_path / 'model.pkl').exists()
+
+
+def test_malformed_requests_are_rejected(tmp_path):
+    async def scenario(port):
+        body = json.dumps({'preferences': PREFERENCES}).encode()
+        for lengths in (['abc'], ['-5'], [str(len(body)), '3']):
+            head = ''.join(f"Content-Length: {length}\r\n" for length in lengths)
+            request = f"POST /api/workout HTTP/1.1\r\nHost: test\r\nConnection: close\r\n{head}\r\n"
+            assert await fetch_raw(port, request.encode() + body) == 400
+
+        status, body = await fetch(port, 'POST', '/api/feedback', raw=b'x' * (2 * 1024 * 1024))
+        assert status == 413 and not body['success']
+
+    run_with_server(tmp_path, scenario)
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Tests for batch workout generation
+"""
+
+import json
+
+import pytest
+
+from ai_workout_planner_simple import SimpleAIWorkoutPlanner
+from batch_generation import MAX_BATCH_SIZE, generate_workouts, validate_batch
+
+
+def _preferences(level: str) -> dict:
+    return {
+        'experience_level': level,
+        'equipment': ['barbell', 'dumbbells', 'pull_up_bar'],
+        'focus_areas': ['strength']
+    }
+
+
+def test_results_keep_request_order(tmp_path):
+    """Each result lines up with its preference set and ids are unique."""
+    planner = SimpleAIWorkoutPlanner(model_file=str(tmp_path / 'model.pkl'))
+    levels = ['beginner', 'intermediate', 'advanced'] * 3
+
+    results = generate_workouts(planner, [_preferences(level) for level in levels])
+
+    assert [r['index'] for r in results] == list(range(len(levels)))
+    assert all(r['success'] for r in results)
+    assert [r['workout']['user_preferences']['experience_level'] for r in results] == levels
+    assert len({r['workout']['id'] for r in results}) == len(levels)
+
+
+def test_rejects_bad_batches():
+    with pytest.raises(ValueError):
+        validate_batch([])
+    with pytest.raises(ValueError):
+        validate_batch([{}] * (MAX_BATCH_SIZE + 1))
+    with pytest.raises(ValueError):
+        validate_batch(['beginner'])
+    with pytest.raises(ValueError, match=r'preferences\[1\]'):
+        validate_batch([{'goal': 'strength'}, {}])
+
+
+def test_batch_endpoint_streams_ndjson():
+    import app as web_app
+
+    client = web_app.app.test_client()
+    body = {'preferences': [_preferences('beginner'), _preferences('advanced')]}
+
+    response = client.post('/api/workouts/batch?stream=1', json=body)
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+    assert response.mimetype == 'application/x-ndjson'
+    assert sorted(line['index'] for line in lines) == [0, 1]
+    assert all('predicted_progress' in line['progress_prediction'] for line in lines)
+
+    response = client.post('/api/workouts/batch', json=body, headers={'Accept': 'text/event-stream'})
+    events = response.get_data(as_text=True).strip().split('\n\n')
+    assert response.mimetype == 'text/event-stream'
+    assert [event.split('\n')[0] for event in events] == ['event: workout', 'event: workout', 'event: done']
+    assert client.post('/api/workouts/batch', json={'preferences': []}).status_code == 400
@@ -0,0 +1,60 @@
+import json
+
+import pytest
+from flask import Flask, request
+
+from engine_registry import ENGINE_HEADER, EngineRegistry, default_catalog
+from workout_store import WorkoutStore
+
+PREFERENCES = {'time_available': 45, 'goal': 'strength', 'equipment': ['bodyweight', 'barbell', 'dumbbells'],
+               'experience_level': 'advanced'}
+
+
+@pytest.fixture
+def registry(tmp_path):
+    data_file = tmp_path / 'workout_data.json'
+    data_file.write_text(json.dumps(default_catalog()))
+    return EngineRegistry(str(data_file), model_dir=str(tmp_path))
+
+
+def test_engines_share_one_catalog(registry):
+    assert registry.loaded() == []
+    engines = [registry.get(name) for name in registry.names()]
+    assert registry.get(registry.names()[0]) is engines[0]
+
+    assert all(engine.exercises is registry.data['exercises'] for engine in engines)
+    assert isinstance(registry.data['exercises'], tuple)
+    for engine in engines:
+        workout = engine.generate_workout(PREFERENCES)
+        assert workout
+
+
+def test_select_engine_per_request(registry):
+    app = Flask(__name__)
+    with app.test_request_context('/?engine=rule_based'):
+        assert registry.select(request)[0] == 'rule_based'
+    with app.test_request_context('/', headers={ENGINE_HEADER: 'ml'}):
+        assert registry.select(request, {'engine': 'rule_based'})[0] == 'ml'
+    with app.test_request_context('/'):
+        assert registry.select(request)[0] == registry.default
+        with pytest.raises(ValueError):
+            registry.select(request, {'engine': 'quantum'})
+
+
+@pytest.mark.parametrize('goal', ['general_fitness', 'strength', 'cardio'])
+def test_every_engine_works_without_a_data_file(tmp_path, monkeypatch, goal):
+    """The built-in catalog is shared by all engines, and each one generates from it through the API."""
+    import engine_web_app
+
+    registry = EngineRegistry(str(tmp_path / 'missing.json'), model_dir=str(tmp_path))
+    assert isinstance(registry.data['exercises'], tuple)
+    monkeypatch.setattr(engine_web_app, 'registry', registry)
+    monkeypatch.setattr(engine_web_app, 'workout_store', WorkoutStore(str(tmp_path / 'workouts.db')))
+    client = engine_web_app.app.test_client()
+
+    for name in registry.names():
+        response = client.post(f"/api/workout?engine={name}", json={'preferences': dict(PREFERENCES, goal=goal)})
+        body = response.get_json()
+        assert response.status_code == 200, body
+        assert body['workout']['engine'] == name and registry.get(name).exercises is registry.data['exercises']
+
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Tests for streaming per-exercise rating statistics
+"""
+
+import numpy as np
+
+from exercise_stats import ExerciseStats
+
+
+def test_streaming_stats_match_batch_statistics():
+    """Welford mean/variance agree with NumPy over the same ratings."""
+    stats = ExerciseStats(['Burpees', 'Planks'])
+    ratings = [6, 9, 4, 8, 7]
+    for rating in ratings:
+        stats.update('Burpees', rating, timestamp=1_750_000_000)
+
+    summary = stats.get('Burpees')
+    assert summary['count'] == 5
+    assert np.isclose(summary['mean'], np.mean(ratings))
+    assert np.isclose(summary['variance'], np.var(ratings, ddof=1))
+    assert stats.get('Planks') is None
+
+
+def test_unknown_exercises_do_not_grow_state():
+    """Ratings for names outside the catalog are ignored."""
+    stats = ExerciseStats(['Burpees'])
+
+    assert not stats.update('Made-up Exercise', 9)
+    assert len(stats.count) == 1
+    assert stats.rating_factor('Made-up Exercise') == 1.0
+
+
+def test_rating_factor_follows_recent_ratings():
+    """Well-rated exercises score above neutral, poorly rated ones below."""
+    stats = ExerciseStats(['Burpees', 'Planks'])
+    for _ in range(5):
+        stats.update('Burpees', 10)
+        stats.update('Planks', 1)
+
+    assert stats.rating_factor('Burpees') > 1.15
+    assert stats.rating_factor('Planks') < 0.9
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Tests for asynchronous feedback ingestion
+"""
+
+import json
+
+import pytest
+
+from ai_workout_planner_simple import SimpleAIWorkoutPlanner
+from feedback_queue import FeedbackQueue
+
+
+def _feedback(enjoyment: int = 7) -> dict:
+    return {
+        'difficulty_rating': 6,
+        'enjoyment_rating': enjoyment,
+        'completion_rate': 0.9,
+        'exercise_ratings': {'Back Squat': 8}
+    }
+
+
+@pytest.fixture
+def queue(tmp_path, monkeypatch):
+    planner = SimpleAIWorkoutPlanner(model_file=str(tmp_path / 'model.pkl'))
+    queue = FeedbackQueue(planner, str(tmp_path / 'queue.db'), batch_size=10)
+    # Drive the queue synchronously
+    monkeypatch.setattr(queue, 'start', queue._connection)
+    return queue
+
+
+def test_duplicates_are_applied_once(queue, monkeypatch):
+    """Retried submissions are acknowledged but learned from only once per batch."""
+    batches = []
+    record = queue.planner.record_feedback_batch
+    monkeypatch.setattr(queue.planner, 'record_feedback_batch', lambda items: batches.append(items) or record(items))
+
+    assert queue.submit('w1', _feedback())[0]
+    assert not queue.submit('w1', _feedback())[0]
+    assert queue.submit('w2', _feedback(3), idempotency_key='retry-1')[0]
+    assert not queue.submit('w2', _feedback(9), idempotency_key='retry-1')[0]
+    assert queue.depth() == 2
+
+    assert queue.drain() == 2
+    assert len(batches) == 1
+    assert [f['workout_id'] for f in queue.planner.user_history] == ['w1', 'w2']
+    stats = queue.stats()
+    assert stats['queue_depth'] == 0
+    assert stats['duplicates'] == 2 and stats['processed'] == 2
+
+
+def test_rejects_malformed_feedback(queue):
+    with pytest.raises(ValueError):
+        queue.submit('w1', {'enjoyment_rating': 'great'})
+    assert queue.depth() == 0
+
+
+def test_pending_feedback_survives_restart(queue, tmp_path):
+    queue.submit('w1', _feedback())
+    queue._conn.close()
+
+    reopened = FeedbackQueue(queue.planner, str(tmp_path / 'queue.db'))
+    assert reopened.depth() == 1
+    assert reopened.drain() == 1
+
+
+def test_failures_leave_the_planner_unchanged_and_bad_rows_are_dead_lettered(queue, monkeypatch):
+    """A failing batch changes nothing, good rows still apply and a bad one stops being retried."""
+    import feedback_queue
+
+    planner = queue.planner
+    monkeypatch.setattr(feedback_queue, 'RETRY_DELAY', 0)
+    weights = dict(planner.exercise_weights)
+    save = planner._save_models
+    monkeypatch.setattr(planner, '_save_models', lambda models=None: 1 / 0)
+    with pytest.raises(ZeroDivisionError):
+        planner.record_feedback_batch([('w0', _feedback())])
+    assert len(planner.user_history) == 0 and planner.exercise_weights == weights
+
+    monkeypatch.setattr(planner, '_save_models', save)
+    record = planner.record_feedback_batch
+
+    def reject_bad(items):
+        if any(workout_id == 'bad' for workout_id, _ in items):
+            raise ValueError('bad feedback')
+        record(items)
+
+    monkeypatch.setattr(planner, 'record_feedback_batch', reject_bad)
+    for workout_id in ('w1', 'bad', 'w2'):
+        queue.submit(workout_id, _feedback())
+
+    assert queue.drain() == 3
+    assert [entry['workout_id'] for entry in planner.user_history] == ['w1', 'w2']
+    for _ in range(feedback_queue.MAX_ATTEMPTS - 1):
+        queue.drain()
+    stats = queue.stats()
+    assert stats['queue_depth'] == 0 and stats['dead_letters'] == 1 and stats['processed'] == 2
+    assert len(planner.user_history) == 2
+
+
+def test_consumers_sharing_a_queue_apply_each_row_once(queue, tmp_path):
+    """Claims keep two consumers of one queue file apart, and redelivery is skipped."""
+    other = FeedbackQueue(queue.planner, str(tmp_path / 'queue.db'), batch_size=2)
+    for number in range(4):
+        queue.submit(f"w{number}", _feedback())
+
+    first, second = other._claim(), queue._claim()
+    assert len(first) == 2 and len(second) == 2
+    assert not {row[0] for row in first} & {row[0] for row in second}
+
+    items = [(workout_id, json.loads(payload)) for _, workout_id, payload, _, _ in first]
+    queue.planner.record_feedback_batch(items)
+    queue.planner.record_feedback_batch(items)
+    assert len(queue.planner.user_history) == 2
+
+
+def test_one_process_consumes_and_the_next_continues_from_its_models(queue, tmp_path):
+    """Only the lease holder drains; a successor reloads the models it saved before applying."""
+    planner = SimpleAIWorkoutPlanner(model_file=str(tmp_path / 'model.pkl'))
+    other = FeedbackQueue(planner, str(tmp_path / 'queue.db'), batch_size=10)
+    queue.submit('w1', _feedback())
+    assert queue.drain() == 1
+    queue.submit('w2', _feedback(9))
+    assert other.drain() == 0 and other.depth() == 1
+
+    queue.release_lease()
+    assert other.drain() == 1
+    assert planner.applied_feedback_ids == queue.planner.applied_feedback_ids + [
+        json.loads(row[0])['feedback_id']
+        for row in other._connection().execute("SELECT payload FROM feedback_queue WHERE workout_id = 'w2'")]
+    assert not queue.acquire_lease()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Tests for the indexed workout history store
+"""
+
+import json
+
+import pytest
+
+from history_store import HistoryStore, parse_history_filters
+
+
+def _feedback(day: int, enjoyment: int = 5) -> dict:
+    return {
+        'workout_id': f"ai_workout_202507{day:02d}",
+        'timestamp': f"2025-07-{day:02d}T18:00:00",
+        'difficulty_rating': 6,
+        'enjoyment_rating': enjoyment,
+        'completion_rate': 0.8
+    }
+
+
+def test_pages_newest_first_with_cursor():
+    """Pages walk the history newest first and end with no cursor."""
+    store = HistoryStore([_feedback(day) for day in range(1, 6)])
+
+    first, cursor = store.page(limit=2)
+    second, cursor = store.page(cursor=cursor, limit=2)
+    third, cursor = store.page(cursor=cursor, limit=2)
+
+    days = [f['workout_id'][-2:] for f in first + second + third]
+    assert days == ['05', '04', '03', '02', '01']
+    assert cursor is None
+
+
+def test_cursor_survives_late_arrivals():
+    """Entries added between pages, even older ones, do not shift the next page."""
+    store = HistoryStore([_feedback(day) for day in (2, 4, 6, 8)])
+    first, cursor = store.page(limit=2)
+    store.append(_feedback(1))
+    store.append(_feedback(3))
+    store.append(_feedback(9))
+
+    second, _ = store.page(cursor=cursor, limit=2)
+
+    assert [f['workout_id'][-2:] for f in first + second] == ['08', '06', '04', '03']
+
+
+def test_filters_and_late_arrivals():
+    """Date range and rating filters apply; out-of-order entries are indexed."""
+    store = HistoryStore([_feedback(1, 9), _feedback(5, 3), _feedback(3, 8)])
+    filters = parse_history_filters({'start': '2025-07-02', 'end': '2025-07-05', 'min_rating': '7'})
+
+    lines = list(store.iter_ndjson(**filters))
+
+    assert [json.loads(line)['workout_id'] for line in lines] == ['ai_workout_20250703']
+    assert [f['workout_id'][-2:] for f in store] == ['01', '03', '05']
+    assert store.summary()['count'] == 3
+
+
+def test_column_aggregates_and_export(tmp_path):
+    """Aggregations run over columns and export round-trips the rows."""
+    store = HistoryStore([_feedback(day, enjoyment=day) for day in range(1, 5)])
+
+    assert store.aggregate('enjoyment_rating') == 2.5
+    assert store.aggregate('enjoyment_rating', 'sum', last=2) == 7
+    assert len(store.scan(start=store.column('timestamp')[1])) == 3
+
+    store.export(str(tmp_path / 'history.csv'))
+    lines = (tmp_path / 'history.csv').read_text().splitlines()
+    assert lines[0].startswith('timestamp,workout_id,difficulty_rating')
+    assert lines[1].split(',')[1] == 'ai_workout_20250701'
+
+
+def test_rollback_removes_entries_added_since_mark():
+    """Appended and late-arriving entries since a mark are removed, rollups included."""
+    store = HistoryStore([_feedback(day) for day in (2, 4)])
+    before = store.rollups.query('month')['summary']
+    mark = store.mark()
+    store.extend([_feedback(5), _feedback(6)])
+    store.rollback(mark)
+    assert [f['workout_id'][-2:] for f in store] == ['02', '04']
+    assert store.rollups.query('month')['summary'] == pytest.approx(before)
+
+    mark = store.mark()
+    store.append(_feedback(3))
+    store.append(_feedback(20))
+    store.append(_feedback(1))
+    store.rollback(mark)
+    assert [f['workout_id'][-2:] for f in store] == ['02', '04']
+    assert store.column('timestamp').tolist() == sorted(store.column('timestamp').tolist())
+    weeks = store.rollups.query('week')['buckets']
+    expected = HistoryStore([_feedback(2), _feedback(4)]).rollups.query('week')['buckets']
+    assert [week['start'] for week in weeks] == [week['start'] for week in expected]
+    assert [week['count'] for week in weeks] == [week['count'] for week in expected]
+    store.append(_feedback(3))
+    assert [f['workout_id'][-2:] for f in store] == ['02', '03', '04']
@@ -0,0 +1,32 @@
+from flask import Flask
+
+from metrics import Histogram, MetricsRegistry, install_metrics, timed
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram((0.1, 1.0))
+    for value in (0.05, 0.5, 0.7, 3.0):
+        histogram.observe(value)
+    assert histogram.cumulative() == [('0.1', 1), ('1.0', 3), ('+Inf', 4)]
+    assert histogram.count == 4
+
+
+def test_metrics_endpoint_reports_routes_and_stages():
+    app = Flask(__name__)
+    registry = install_metrics(app, MetricsRegistry())
+
+    @app.route('/workout/<workout_id>')
+    def workout(workout_id):
+        with timed('recommendation', registry):
+            pass
+        return 'missing', 404
+
+    client = app.test_client()
+    client.get('/workout/a')
+    client.get('/workout/b')
+    text = client.get('/metrics').get_data(as_text=True)
+
+    assert 'http_requests_total{route="/workout/<workout_id>",method="GET",status="404"} 2' in text
+    assert 'http_request_errors_total{route="/workout/<workout_id>",method="GET"} 2' in text
+    assert 'http_request_duration_seconds_count{route="/workout/<workout_id>",method="GET"} 2' in text
+    assert 'stage_duration_seconds_bucket{stage="recommendation",le="+Inf"} 2' in text
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Tests for block-periodized multi-week plans
+"""
+
+import json
+
+import pytest
+
+from periodization import HARD_SESSION_ADJUSTMENT, MesocyclePlan
+from workout_planner import WorkoutPlanner
+from workout_store import WorkoutStore
+
+
+@pytest.fixture
+def planner(tmp_path):
+    exercises = [
+        {'name': f"{group.title()} Press", 'type': 'strength', 'category': 'barbell', 'muscle_group': group,
+         'equipment': ['barbell'], 'difficulty': 'beginner'}
+        for group in ['chest', 'back', 'legs', 'shoulders', 'arms', 'core']
+    ] + [
+        {'name': 'Burpees', 'type': 'conditioning', 'category': 'metcon', 'muscle_group': 'full_body',
+         'equipment': ['bodyweight'], 'difficulty': 'beginner', 'bjj_focus': 'endurance'},
+        {'name': 'Dead Hang', 'type': 'accessory', 'category': 'bodyweight', 'muscle_group': 'arms',
+         'equipment': ['bodyweight'], 'difficulty': 'beginner', 'bjj_focus': 'grip_strength'}
+    ]
+    workout_types = {name: {} for name in ['full_body', 'cardio', 'upper_body', 'lower_body', 'hiit', 'core']}
+    data_file = tmp_path / 'workout_data.json'
+    data_file.write_text(json.dumps({'exercises': exercises, 'workout_types': workout_types}))
+    return WorkoutPlanner(str(data_file))
+
+
+PREFERENCES = {'time_available': 40, 'goal': 'strength', 'equipment': ['barbell', 'bodyweight'],
+               'experience_level': 'beginner'}
+
+
+def test_volume_progresses_and_changes_regenerate_one_day(planner):
+    """Build weeks grow, the deload shrinks, and an override only touches its own day."""
+    plan = MesocyclePlan(PREFERENCES, weeks=4)
+    assert len(plan.generate(planner)) == 28
+    mondays = [plan.days[plan.index(week, 'Monday')]['preferences']['time_available'] for week in range(1, 5)]
+    assert mondays == [40, 44, 48, 28]
+
+    before = [slot['workout'] for slot in plan.days]
+    assert plan.update_day(2, 'Wednesday', preferences={'time_available': 60}) == [(2, 'Wednesday')]
+    assert plan.generate(planner) == [(2, 'Wednesday')]
+    changed = [index for index, slot in enumerate(plan.days) if slot['workout'] is not before[index]]
+    assert changed == [plan.index(2, 'Wednesday')]
+    assert plan.days[changed[0]]['workout']['estimated_duration'] == 66
+    assert plan.generate(planner) == []
+
+
+def test_incremental_updates_match_a_full_recompute():
+    """Readiness after several pieces of feedback does not depend on how it was updated."""
+    plan = MesocyclePlan(PREFERENCES, weeks=2)
+    feedback = [(1, 'Monday', {'difficulty_rating': 9}), (1, 'Tuesday', {'difficulty_rating': 9}),
+                (1, 'Thursday', {'difficulty_rating': 3}), (1, 'Wednesday', {'completion_rate': 0.5})]
+    for week, day, item in feedback:
+        plan.update_day(week, day, feedback=item)
+    incremental = [(slot['readiness'], slot['preferences']) for slot in plan.days]
+
+    for slot in plan.days:
+        slot['readiness'] = None
+    plan._refresh_targets(0)
+    assert [(slot['readiness'], slot['preferences']) for slot in plan.days] == incremental
+    assert [slot['readiness'] for slot in plan.days[:3]] == [1.0, 0.9, 0.85]
+
+
+def test_hard_feedback_lowers_the_next_days_through_the_api(planner, tmp_path, monkeypatch):
+    """Feedback on one day lowers the following days' targets, and the change fades out."""
+    import web_app
+
+    monkeypatch.setattr(web_app, 'planner', planner)
+    monkeypatch.setattr(web_app, 'plan_store', WorkoutStore(str(tmp_path / 'plans.db')))
+    client = web_app.app.test_client()
+
+    created = client.post('/api/mesocycle', json={'time_per_day': 60, 'equipment': ['barbell', 'bodyweight'],
+                                                  'weeks': 2}).get_json()
+    assert len(created['days']) == 14
+
+    response = client.post(f"/api/mesocycle/{created['id']}/day",
+                           json={'week': 1, 'day': 'Monday', 'feedback': {'difficulty_rating': 9}})
+    body = response.get_json()
+    regenerated = [(item['week'], item['day']) for item in body['regenerated']]
+    assert regenerated[0] == (1, 'Tuesday') and 0 < len(regenerated) < 7
+    tuesday = body['plan']['days'][1]
+    assert tuesday['readiness'] == 1 + HARD_SESSION_ADJUSTMENT
+    assert tuesday['workout']['estimated_duration'] == 54
+
+    stored = client.get(f"/api/mesocycle/{created['id']}").get_json()
+    assert stored['days'][0]['feedback'] == {'difficulty_rating': 9}
+    assert client.post('/api/mesocycle/missing/day', json={}).status_code == 404
+    assert client.post(f"/api/mesocycle/{created['id']}/day", json={'week': 9, 'day': 'Monday'}).status_code == 400
+
+
+def test_day_updates_keep_concurrent_changes_and_partial_regeneration(planner, tmp_path, monkeypatch):
+    """A plan changed by another request meanwhile is updated again; days regenerated before a failure are kept."""
+    import web_app
+
+    path = str(tmp_path / 'plans.db')
+    monkeypatch.setattr(web_app, 'planner', planner)
+    monkeypatch.setattr(web_app, 'plan_store', WorkoutStore(path))
+    client = web_app.app.test_client()
+    plan_id = client.post('/api/mesocycle', json={'equipment': ['barbell', 'bodyweight'], 'weeks': 1}).get_json()['id']
+
+    # Another process records Sunday's feedback while this request is generating
+    other = WorkoutStore(path)
+    generate = planner.generate_workout
+
+    def generate_during_other_update(preferences):
+        if planner.generate_workout is generate_during_other_update:
+            monkeypatch.setattr(planner, 'generate_workout', generate)
+            plan = MesocyclePlan.from_dict(other.get(plan_id))
+            plan.update_day(1, 'Sunday', feedback={'difficulty_rating': 6})
+            plan.version += 1
+            other.put(plan.to_dict(), expected_version=0)
+        return generate(preferences)
+
+    monkeypatch.setattr(planner, 'generate_workout', generate_during_other_update)
+    response = client.post(f"/api/mesocycle/{plan_id}/day",
+                           json={'week': 1, 'day': 'Monday', 'feedback': {'difficulty_rating': 9}})
+    assert response.status_code == 200
+    stored = MesocyclePlan.from_dict(WorkoutStore(path).get(plan_id))
+    assert stored.version == 2
+    assert stored.days[0]['feedback'] == {'difficulty_rating': 9}
+    assert stored.days[6]['feedback'] == {'difficulty_rating': 6}
+
+    calls = []
+
+    def fail_after_first_day(preferences):
+        calls.append(preferences)
+        if len(calls) > 1:
+            raise RuntimeError('catalog unavailable')
+        return generate(preferences)
+
+    monkeypatch.setattr(planner, 'generate_workout', fail_after_first_day)
+    response = client.post(f"/api/mesocycle/{plan_id}/day",
+                           json={'week': 1, 'day': 'Monday', 'feedback': {'difficulty_rating': 2}})
+    assert response.status_code == 400 and 'catalog unavailable' in response.get_json()['error']
+    stored = MesocyclePlan.from_dict(WorkoutStore(path).get(plan_id))
+    assert stored.days[0]['feedback'] == {'difficulty_rating': 2}
+    assert stored.days[1]['generated_from'] == stored.days[1]['preferences'] == calls[0]
+    assert (1, 'Tuesday') not in stored.stale_days() and stored.stale_days()
+
@@ -0,0 +1,61 @@
+from flask import Flask, jsonify
+
+from profiling import PROFILE_HEADER, PROFILE_ID_HEADER, RequestProfiler, install_profiling
+
+
+class FakePlanner:
+    def recommend_exercises(self):
+        return sum(range(1000))
+
+    def generate_workout(self, preferences=None):
+        return {'total': self.recommend_exercises()}
+
+
+def make_app(tmp_path, **options):
+    app = Flask(__name__)
+    planner = FakePlanner()
+    profiler = install_profiling(app, planner, RequestProfiler(str(tmp_path), **options))
+
+    @app.route('/generate')
+    def generate():
+        return jsonify(planner.generate_workout())
+
+    return app, profiler
+
+
+def test_admin_header_profiles_request(tmp_path):
+    app, profiler = make_app(tmp_path, token='secret')
+    client = app.test_client()
+
+    assert PROFILE_ID_HEADER not in client.get('/generate').headers
+    response = client.get('/generate', headers={PROFILE_HEADER: 'secret', 'X-Request-ID': 'req-1'})
+    assert response.headers[PROFILE_ID_HEADER] == 'req-1'
+
+    summary = client.get('/api/profiles/req-1', headers={PROFILE_HEADER: 'secret'}).get_json()['profile']
+    assert summary['path'] == '/generate'
+    assert summary['calls'][0]['method'] == 'generate_workout'
+    assert summary['stages']['recommendation']['calls'] == 1
+
+    download = client.get('/api/profiles/req-1/download', headers={PROFILE_HEADER: 'secret'})
+    assert download.status_code == 200 and download.data
+    assert client.get('/api/profiles').status_code == 403
+
+
+def test_disabled_profiler_installs_nothing(tmp_path):
+    app = Flask(__name__)
+    planner = FakePlanner()
+    original = planner.generate_workout
+    assert install_profiling(app, planner, RequestProfiler(str(tmp_path))) is None
+    assert planner.generate_workout == original
+    assert not app.before_request_funcs
+
+
+def test_sampled_background_calls_are_pruned(tmp_path):
+    profiler = RequestProfiler(str(tmp_path), sample_rate=1.0, max_profiles=2)
+    planner = FakePlanner()
+    profiler.instrument(planner)
+    for _ in range(3):
+        planner.generate_workout()
+    profiles = profiler.list()
+    assert len(profiles) == 2
+    assert profiles[0]['source'] == 'generate_workout'
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Tests for the recent-exercise history
+"""
+
+import os
+import time
+
+from ai_workout_planner_simple import SimpleAIWorkoutPlanner
+from recent_exercises import RECENT_WEIGHT, RecentExercises, UserRecentExercises
+
+
+def test_ring_evicts_oldest_exercises():
+    """Membership follows the last `capacity` recorded exercises, duplicates included."""
+    ids = {name: index for index, name in enumerate(['Burpees', 'Planks', 'Pull-ups', 'Squats', 'Lunges', 'Dips'])}
+    recent = RecentExercises(ids, capacity=3)
+    recent.record(['Burpees', 'Planks', 'Burpees', 'Made-up Exercise'])
+    assert 'Burpees' in recent and 'Planks' in recent and 'Pull-ups' not in recent
+
+    recent.record(['Pull-ups', 'Pull-ups'])
+    assert 'Planks' not in recent and 'Burpees' in recent
+    assert recent.names() == ['Burpees', 'Pull-ups', 'Pull-ups']
+
+    recent.record(['Pull-ups'])
+    assert 'Burpees' not in recent
+    assert recent.weight('Pull-ups') == RECENT_WEIGHT and recent.weight('Burpees') == 1.0
+
+    recent.restore(['Planks'])
+    assert recent.names() == ['Planks'] and len(recent) == 1
+
+
+def _planner(tmp_path) -> SimpleAIWorkoutPlanner:
+    return SimpleAIWorkoutPlanner(data_file=str(tmp_path / 'missing.json'), model_file=str(tmp_path / 'model.pkl'),
+                                  recent_path=str(tmp_path / 'recent.db'))
+
+
+def test_generated_exercises_are_scored_down(tmp_path):
+    """A user's generated exercises score lower for them only and are shared through the store."""
+    planner = _planner(tmp_path)
+    preferences = {'time_available': 45, 'equipment': ['bodyweight'], 'experience_level': 'beginner'}
+    exercise = next(exercise for exercise in planner.exercises if exercise['name'] == 'Planks')
+    before = planner._calculate_exercise_score(exercise, preferences)
+
+    workout = planner.generate_workout(preferences, user_id='alice')
+    recent = planner.recent_exercises.get('alice')
+    recent.record(['Planks'])
+    assert planner._calculate_exercise_score(exercise, preferences, recent) == before * RECENT_WEIGHT
+    assert planner._calculate_exercise_score(exercise, preferences, planner.recent_exercises.get('bob')) == before
+    for section in ('strength_exercises', 'metcon_exercises', 'accessory_exercises'):
+        assert all(item['name'] in recent for item in workout[section])
+
+    # Another process sees the history without any model save
+    other = _planner(tmp_path)
+    assert not os.path.exists(tmp_path / 'model.pkl')
+    assert other.recent_exercises.get('alice').names() == planner.recent_exercises.get('alice').names()
+    other.generate_workout(preferences, user_id='alice')
+    assert planner.recent_exercises.get('alice').names() == other.recent_exercises.get('alice').names()
+    assert 'recent_exercises' not in planner._model_state()
+
+
+def test_workouts_without_a_user_are_not_recorded(tmp_path):
+    """Bulk and warm-up generation leave every user's history alone; inactive users are forgotten."""
+    planner = _planner(tmp_path)
+    preferences = {'time_available': 45, 'equipment': ['bodyweight'], 'experience_level': 'beginner'}
+    planner.generate_workout(preferences)
+    assert len(planner.recent_exercises) == 0
+
+    users = UserRecentExercises(planner.exercise_performance.ids, str(tmp_path / 'users.db'), retention_days=30)
+    users.record_workout('alice', {'metcon_exercises': [{'name': 'Planks'}]})
+    users.record_workout('bob', {'metcon_exercises': [{'name': 'Burpees'}]})
+    assert users.get('alice').names() == ['Planks'] and len(users.get('carol')) == 0
+    assert users.prune(time.time() + 29 * 86400) == 0
+    assert users.prune(time.time() + 31 * 86400) == 2
+    assert len(users) == 0
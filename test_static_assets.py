@@ -0,0 +1,36 @@
+from flask import Flask, render_template_string
+
+from static_assets import LONG_CACHE_CONTROL, configure_static_assets
+
+
+def make_app(tmp_path, content):
+    (tmp_path / 'js').mkdir()
+    (tmp_path / 'js' / 'timer.js').write_text(content)
+    app = Flask(__name__)
+    return app, configure_static_assets(app, str(tmp_path))
+
+
+def test_asset_url_is_fingerprinted_and_cached(tmp_path):
+    app, manifest = make_app(tmp_path, 'let seconds = 0;\n' * 100)
+    with app.test_request_context():
+        url = render_template_string("{{ asset_url('js/timer.js') }}")
+    assert url.startswith('/assets/js/timer.') and url.endswith('.js')
+
+    client = app.test_client()
+    plain = client.get(url)
+    assert plain.headers['Cache-Control'] == LONG_CACHE_CONTROL
+    assert plain.data == b'let seconds = 0;\n' * 100
+
+    compressed = client.get(url, headers={'Accept-Encoding': 'gzip, br'})
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert len(compressed.data) < len(plain.data)
+    assert client.get(url, headers={'If-None-Match': plain.headers['ETag']}).status_code == 304
+
+
+def test_unknown_or_stale_asset(tmp_path):
+    app, manifest = make_app(tmp_path, 'old')
+    old_url = manifest.url_for('js/timer.js')
+    (tmp_path / 'js' / 'timer.js').write_text('new')
+    manifest.build()
+    assert manifest.url_for('js/timer.js') != old_url
+    assert app.test_client().get(old_url).status_code == 404
@@ -0,0 +1,38 @@
+import os
+import stat
+
+from flask import Flask, render_template_string
+
+from template_cache import FragmentCache, configure_template_caching, install_fragment_cache
+
+
+def test_identical_fragments_render_once(tmp_path):
+    app = Flask(__name__)
+    cache = configure_template_caching(app, str(tmp_path / 'jinja'))
+    exercise = {'name': 'Squat', 'sets': 4, 'reps': 8}
+    template = "{% for e in items %}{{ cached_fragment('partials/ai_exercise.html', exercise=e) }}{% endfor %}"
+    with app.test_request_context():
+        html = render_template_string(template, items=[exercise, exercise, dict(exercise, reps=5)])
+    assert html.count('Squat') >= 3
+    assert (cache.misses, cache.hits) == (2, 1)
+
+
+def test_fragment_cache_evicts_oldest(tmp_path):
+    app = Flask(__name__)
+    cache = install_fragment_cache(app.jinja_env, FragmentCache(maxsize=1))
+    with app.app_context():
+        cache.render(app.jinja_env, 'partials/ai_exercise.html', {'exercise': {'name': 'A'}})
+        cache.render(app.jinja_env, 'partials/ai_exercise.html', {'exercise': {'name': 'B'}})
+    assert len(cache) == 1
+
+
+def test_bytecode_cache_directory_is_private(tmp_path, monkeypatch):
+    monkeypatch.delenv('JINJA_CACHE_DIR', raising=False)
+    app = Flask(__name__)
+    configure_template_caching(app)
+    directory = app.jinja_env.bytecode_cache.directory
+    assert str(os.getuid()) in os.path.basename(directory)
+    assert stat.S_IMODE(os.stat(directory).st_mode) == 0o700
+
+    configure_template_caching(app, str(tmp_path / 'jinja'))
+    assert stat.S_IMODE(os.stat(tmp_path / 'jinja').st_mode) == 0o700
@@ -0,0 +1,95 @@
+import itertools
+import json
+
+import pytest
+
+from ai_workout_planner_simple import SimpleAIWorkoutPlanner
+from time_budget import TRANSITION_SECONDS, fit_section, fit_time_budget
+from workout_planner import WorkoutPlanner
+
+
+def test_fills_budget_exactly_when_possible():
+    groups = [[300, 420], [240, 360, 480], [600], [180, 270]]
+    picks, total = fit_time_budget(groups, 900, slot=30)
+    assert total == 900
+    assert sum(groups[i][j] for i, j in enumerate(picks) if j is not None) == total
+
+    # Matches brute force over every selection
+    totals = (sum(combo) for combo in itertools.product(*[[0] + g for g in groups]))
+    best = max(total for total in totals if total <= 700)
+    assert fit_time_budget(groups, 700, slot=30)[1] == best
+
+
+def test_section_respects_budget_and_counts():
+    candidates = [{'name': f"Exercise {i}", 'time_per_set': 60 + 15 * i} for i in range(10)]
+    plan = lambda exercise: (3, exercise['time_per_set'] + 90)
+    for budget in (750, 1000, 1500):
+        chosen, seconds = fit_section(candidates, budget, plan, max_exercises=4, min_exercises=2)
+        assert 0 < seconds <= budget
+        assert 2 <= len(chosen) <= 4
+    chosen, seconds = fit_section(candidates, 1500, plan, max_exercises=4, min_exercises=2)
+    assert seconds == 1500 and len(chosen) >= 2
+
+
+def test_section_overruns_rather_than_dropping_below_minimum():
+    candidates = [{'name': f"Exercise {i}", 'time_per_set': 300 - 30 * i} for i in range(4)]
+    plan = lambda exercise: (4, exercise['time_per_set'])
+    chosen, seconds = fit_section(candidates, 300, plan, max_exercises=4, min_exercises=2)
+    # The two quickest exercises at the fewest sets, still in rank order
+    assert [(exercise['name'], sets) for exercise, sets in chosen] == [('Exercise 2', 2), ('Exercise 3', 2)]
+    assert seconds == 2 * TRANSITION_SECONDS + 2 * 240 + 2 * 210
+    assert fit_section(candidates[:1], 60, plan, max_exercises=4, min_exercises=2)[0][0][1] == 2
+
+
+def _rule_based_planner(tmp_path) -> WorkoutPlanner:
+    levels = ['beginner', 'intermediate', 'advanced']
+    exercises = [
+        {'name': f"{group.title()} {variant}", 'type': 'strength', 'category': 'barbell', 'muscle_group': group,
+         'equipment': ['barbell'], 'difficulty': levels[index], 'time_per_set': 45 + 15 * index}
+        for group in ['chest', 'back', 'legs', 'shoulders', 'arms', 'core']
+        for index, variant in enumerate(['Press', 'Row', 'Carry'])
+    ] + [
+        {'name': 'Burpees', 'type': 'conditioning', 'category': 'metcon', 'muscle_group': 'full_body',
+         'equipment': ['bodyweight'], 'difficulty': 'beginner', 'bjj_focus': 'endurance'}
+    ] + [
+        {'name': f"Grip {index}", 'type': 'accessory', 'category': 'bodyweight', 'muscle_group': 'arms',
+         'equipment': ['bodyweight'], 'difficulty': 'beginner', 'bjj_focus': 'grip_strength', 'time_per_set': 40}
+        for index in range(3)
+    ]
+    data_file = tmp_path / 'workout_data.json'
+    data_file.write_text(json.dumps({'exercises': exercises, 'workout_types': {'strength': {}}}))
+    return WorkoutPlanner(str(data_file))
+
+
+def test_rule_based_sections_fit_their_share(tmp_path):
+    planner = _rule_based_planner(tmp_path)
+    for minutes in (45, 90):
+        workout = planner.generate_workout({'time_available': minutes, 'goal': 'strength',
+                                            'equipment': ['barbell', 'bodyweight']})
+        assert 2 <= len(workout['strength']['exercises'])
+        assert 0 < workout['strength']['estimated_duration'] <= minutes * 0.4
+        assert 1 <= len(workout['accessory']['exercises']) <= 2
+        assert workout['accessory']['estimated_duration'] <= minutes * 0.2
+        assert sum(workout[section]['estimated_duration'] for section in ('strength', 'metcon', 'accessory')) <= minutes
+
+
+@pytest.mark.parametrize('level', ['beginner', 'intermediate', 'advanced'])
+@pytest.mark.parametrize('minutes', [15, 20, 30])
+def test_short_sessions_keep_minimum_exercises(tmp_path, level, minutes):
+    """Sessions too short for the minimum overrun at the fewest sets instead of dropping exercises."""
+    preferences = {'time_available': minutes, 'goal': 'strength', 'experience_level': level,
+                   'equipment': ['barbell', 'bodyweight']}
+    workout = _rule_based_planner(tmp_path).generate_workout(preferences)
+    assert len(workout['strength']['exercises']) >= 2
+    assert len(workout['accessory']['exercises']) >= 1
+    assert workout['metcon']['estimated_duration'] >= 0
+
+    planner = SimpleAIWorkoutPlanner(data_file=str(tmp_path / 'missing.json'),
+                                     model_file=str(tmp_path / 'model.pkl'))
+    equipment = ['bodyweight', 'dumbbells', 'barbell', 'bench', 'rack', 'pull-up bar']
+    workout = planner.generate_workout(dict(preferences, equipment=equipment))
+    # The built-in catalog has a single beginner strength exercise
+    assert len(workout['strength_exercises']) >= min(2, len(planner._candidate_pool('strength', equipment, level)))
+    assert len(workout['accessory_exercises']) >= 1
+    section_seconds = workout['section_seconds']
+    assert section_seconds['metcon'] == max(0, minutes * 60 - section_seconds['strength'] - section_seconds['accessory'])
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Tests for incremental weekly/monthly training rollups
+"""
+
+from datetime import datetime
+
+from history_store import HistoryStore
+
+
+def _feedback(day: int, difficulty: int) -> dict:
+    return {
+        'workout_id': f"ai_workout_202507{day:02d}",
+        'timestamp': f"2025-07-{day:02d}T18:00:00",
+        'difficulty_rating': difficulty,
+        'enjoyment_rating': 7,
+        'completion_rate': 0.9
+    }
+
+
+def test_weekly_buckets_and_range_summary():
+    """Feedback lands in Monday-based weeks; range summaries match the raw data."""
+    # 2025-07-07 and 2025-07-14 are Mondays
+    store = HistoryStore([_feedback(7, 8), _feedback(9, 6), _feedback(14, 4), _feedback(2, 10)])
+
+    weekly = store.rollups.query('week')
+    assert [b['start'] for b in weekly['buckets']] == ['2025-06-30', '2025-07-07', '2025-07-14']
+    assert [b['count'] for b in weekly['buckets']] == [1, 2, 1]
+    assert weekly['summary']['avg_difficulty'] == 7.0
+
+    july_8 = datetime(2025, 7, 8).timestamp()
+    ranged = store.rollups.query('week', start=july_8)
+    assert ranged['summary']['count'] == 3
+    assert ranged['summary']['avg_difficulty'] == 6.0
+
+    monthly = store.rollups.query('month')
+    assert [b['start'] for b in monthly['buckets']] == ['2025-07-01']
+
+
+def test_compare_recent_week_against_baseline():
+    """The latest week is compared with the weeks before it."""
+    store = HistoryStore([_feedback(1, 8), _feedback(8, 8), _feedback(15, 4)])
+
+    recent, baseline = store.rollups.compare_recent('week')
+
+    assert recent['avg_difficulty'] == 4.0
+    assert baseline['avg_difficulty'] == 8.0
+    assert HistoryStore([_feedback(1, 8)]).rollups.compare_recent('week') is None
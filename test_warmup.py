@@ -0,0 +1,39 @@
+from flask import Flask, jsonify
+
+from ai_workout_planner_simple import SimpleAIWorkoutPlanner
+from warmup import Warmup
+
+
+def make_planner(tmp_path):
+    return SimpleAIWorkoutPlanner(model_file=str(tmp_path / 'model.pkl'))
+
+
+def make_app(planner):
+    app = Flask(__name__)
+    warmup = Warmup(app, planner)
+
+    @app.route('/ready')
+    def ready():
+        return jsonify(warmup.status()), (200 if warmup.ready else 503)
+
+    return app, warmup
+
+
+def test_ready_only_after_warmup(tmp_path):
+    app, warmup = make_app(make_planner(tmp_path))
+    client = app.test_client()
+    assert client.get('/ready').status_code == 503
+
+    warmup.start()
+    assert warmup.wait(timeout=10)
+    status = client.get('/ready').get_json()
+    assert status['status'] == 'ready'
+    assert {'catalog', 'predictions', 'templates', 'total'} <= set(status['timings'])
+
+
+def test_failed_warmup_is_never_ready():
+    app, warmup = make_app(None)
+    warmup.run()
+    response = app.test_client().get('/ready')
+    assert response.status_code == 503
+    assert response.get_json()['status'] == 'failed'
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Tests for concurrent weekly plan generation
+"""
+
+import json
+
+import pytest
+
+from weekly_planning import WEEKLY_SCHEDULE, generate_weekly_plan, iter_weekly_plan
+from workout_planner import WorkoutPlanner
+from workout_storage import WorkoutStorage
+
+
+@pytest.fixture
+def planner(tmp_path):
+    exercises = [
+        {'name': f"{group.title()} Press", 'type': 'strength', 'category': 'barbell', 'muscle_group': group,
+         'equipment': ['barbell'], 'difficulty': 'beginner'}
+        for group in ['chest', 'back', 'legs', 'shoulders', 'arms', 'core']
+    ] + [
+        {'name': 'Burpees', 'type': 'conditioning', 'category': 'metcon', 'muscle_group': 'full_body',
+         'equipment': ['bodyweight'], 'difficulty': 'beginner', 'bjj_focus': 'endurance'},
+        {'name': 'Dead Hang', 'type': 'accessory', 'category': 'bodyweight', 'muscle_group': 'arms',
+         'equipment': ['bodyweight'], 'difficulty': 'beginner', 'bjj_focus': 'grip_strength'}
+    ]
+    workout_types = {name: {} for name in ['full_body', 'cardio', 'upper_body', 'lower_body', 'hiit', 'core']}
+    data_file = tmp_path / 'workout_data.json'
+    data_file.write_text(json.dumps({'exercises': exercises, 'workout_types': workout_types}))
+    planner = WorkoutPlanner(str(data_file))
+    planner.storage = WorkoutStorage(str(tmp_path / 'saved'))
+    return planner
+
+
+def test_week_in_calendar_order_without_touching_planner(planner):
+    preferences = {'time_available': 30, 'goal': 'strength',
+                   'equipment': ['barbell', 'bodyweight'], 'experience_level': 'beginner'}
+
+    plan = generate_weekly_plan(planner, preferences)
+
+    assert list(plan) == list(WEEKLY_SCHEDULE)
+    assert [workout['workout_type'] for workout in plan.values()] == \
+        [day['type'] for day in WEEKLY_SCHEDULE.values()]
+    assert {e['muscle_group'] for e in plan['Friday']['strength']['exercises']} <= {'legs', 'core'}
+    assert planner.user_preferences == {}
+
+
+def test_streamed_days_carry_their_names(planner):
+    results = list(iter_weekly_plan(planner, {'equipment': ['bodyweight']}))
+
+    assert sorted(r['day'] for r in results) == sorted(WEEKLY_SCHEDULE)
+    assert all(r['success'] for r in results)
+
+
+def test_weekly_page_streams_days_as_events(planner, monkeypatch):
+    import web_app
+
+    monkeypatch.setattr(web_app, 'planner', planner)
+    client = web_app.app.test_client()
+    form = {'time_per_day': '30', 'goal': 'strength', 'equipment': ['barbell', 'bodyweight']}
+
+    page = client.post('/generate_weekly', data=form).get_data(as_text=True)
+    assert 'id="day-Sunday"' in page and '/weekly_plan/events?' in page
+
+    response = client.get('/weekly_plan/events', query_string=form)
+    events = [block.split('\n', 1) for block in response.get_data(as_text=True).strip().split('\n\n')]
+
+    assert response.mimetype == 'text/event-stream'
+    assert [name for name, _ in events] == ['event: day'] * 7 + ['event: done']
+    done = json.loads(events[-1][1][len('data: '):])
+    planner.storage.flush()
+    assert done['saved'] and planner.storage.load(done['filename'])['Monday']['workout_type'] == 'full_body'
@@ -0,0 +1,20 @@
+import random
+from collections import Counter
+
+from weighted_sampling import weighted_sample
+
+
+def test_draws_without_replacement_and_skips_zero_weights():
+    items = ['a', 'b', 'c', 'd']
+    rng = random.Random(1)
+    for _ in range(100):
+        drawn = weighted_sample(items, [1, 0, 2, 3], 3, rng)
+        assert sorted(drawn) == ['a', 'c', 'd']
+    assert len(weighted_sample(items, [1, 1, 1, 1], 10, rng)) == 4
+    assert weighted_sample([], [], 3) == []
+
+
+def test_first_draw_is_proportional_to_weight():
+    rng = random.Random(7)
+    firsts = Counter(weighted_sample(['light', 'heavy'], [1, 3], 1, rng)[0] for _ in range(20000))
+    assert abs(firsts['heavy'] / 20000 - 0.75) < 0.02
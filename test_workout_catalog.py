@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Tests for the saved workout catalog
+"""
+
+import json
+
+import pytest
+
+from workout_catalog import MAX_PAGE_SIZE, WorkoutCatalog
+
+
+def _workout(day: int, workout_type: str, goal: str) -> dict:
+    return {
+        'date': f"2025-07-{day:02d} 18:00",
+        'workout_type': workout_type,
+        'goal': goal,
+        'estimated_duration': 30 + day,
+        'strength': {'exercises': [{'name': 'Back Squat'}]},
+        'metcon': {'exercises': [{'name': 'Burpees'}, {'name': 'Rowing'}]}
+    }
+
+
+def test_sorted_filtered_pages(tmp_path):
+    catalog = WorkoutCatalog(str(tmp_path / 'catalog.db'))
+    for day in range(1, 8):
+        catalog.add(f"workout_{day}.json", _workout(day, 'strength' if day % 2 else 'cardio', 'general_fitness'))
+
+    first, total = catalog.list(per_page=3)
+    second, _ = catalog.list(page=2, per_page=3)
+    assert total == 7
+    assert [w['filename'] for w in first + second] == [f"workout_{day}.json" for day in range(7, 1, -1)]
+    assert first[0]['exercise_count'] == 3
+
+    cardio, total = catalog.list(sort='date', descending=False, workout_type='cardio')
+    assert total == 3 and [w['date'][8:10] for w in cardio] == ['02', '04', '06']
+
+    with pytest.raises(ValueError):
+        catalog.list(sort='filename; DROP TABLE saved_workouts')
+
+
+def test_adopts_existing_files_and_only_loads_cataloged_ones(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'workout_old.json').write_text(json.dumps(_workout(1, 'strength', 'strength')))
+    (tmp_path / 'notes.json').write_text('{}')
+    catalog = WorkoutCatalog('catalog.db', cache_size=1)
+
+    assert catalog.rebuild() == 1
+    assert catalog.rebuild() == 0
+    assert catalog.load('workout_old.json')['goal'] == 'strength'
+    with pytest.raises(KeyError):
+        catalog.load('notes.json')
+
+
+def test_saved_workouts_page_links_follow_the_capped_page_size(tmp_path, monkeypatch):
+    import web_app
+
+    catalog = WorkoutCatalog(str(tmp_path / 'catalog.db'))
+    for index in range(MAX_PAGE_SIZE + 5):
+        catalog.add(f"workout_{index:03d}.json", _workout(1 + index % 28, 'strength', 'strength'))
+    monkeypatch.setattr(web_app, 'catalog', catalog)
+    monkeypatch.setattr(web_app, 'catalog_adopted', True)
+    client = web_app.app.test_client()
+
+    page = client.get('/saved_workouts?per_page=500').get_data(as_text=True)
+    assert page.count('workout_') >= MAX_PAGE_SIZE
+    assert 'page=2&amp;per_page=100' in page or 'per_page=100&amp;page=2' in page
+
+    page = client.get('/saved_workouts?per_page=0').get_data(as_text=True)
+    assert 'per_page must be positive' in page
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Tests for sharded background workout storage
+"""
+
+import json
+import os
+from datetime import datetime
+
+from workout_storage import WorkoutStorage
+
+
+def test_background_writes_are_sharded_and_compact(tmp_path):
+    storage = WorkoutStorage(str(tmp_path), max_pending=2)
+    path = storage.save({'date': 'today', 'exercises': []}, 'workout_1.json')
+
+    assert storage.load(path)['date'] == 'today'  # readable before the write lands
+    storage.flush()
+
+    today = datetime.now()
+    assert path == os.path.join(str(tmp_path), today.strftime('%Y'), today.strftime('%m'),
+                                today.strftime('%d'), 'workout_1.json')
+    with open(path) as f:
+        assert f.read() == '{"date":"today","exercises":[]}'
+    storage.stop()
+
+
+def test_retention_compacts_then_deletes_old_shards(tmp_path):
+    removed = []
+    storage = WorkoutStorage(str(tmp_path), compact_after_days=7, retention_days=30, on_remove=removed.extend)
+    for month, day, name in [(6, 1, 'old.json'), (6, 20, 'recent.json'), (7, 5, 'new.json')]:
+        shard = tmp_path / '2025' / f"{month:02d}" / f"{day:02d}"
+        shard.mkdir(parents=True)
+        (shard / name).write_text(json.dumps({'day': day}))
+
+    storage.apply_retention(now=datetime(2025, 7, 10))
+
+    assert removed == [str(tmp_path / '2025' / '06' / '01' / 'old.json')]
+    assert (tmp_path / '2025' / '06' / '20.jsonl.gz').exists()
+    assert not (tmp_path / '2025' / '06' / '20').exists()
+    assert storage.load(str(tmp_path / '2025' / '06' / '20' / 'recent.json')) == {'day': 20}
+    assert (tmp_path / '2025' / '07' / '05' / 'new.json').exists()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Tests for the server-side workout store
+"""
+
+import pytest
+
+from workout_store import VersionConflict, WorkoutStore
+
+
+def test_read_through_cache(tmp_path):
+    """Reads hit the cache, fall back to SQLite, and evict least recently used."""
+    store = WorkoutStore(str(tmp_path / 'workouts.db'), cache_size=2)
+    for number in range(3):
+        store.put({'id': f"workout_{number}", 'total_duration': 45 + number})
+
+    assert store.get('workout_2')['total_duration'] == 47
+    assert store.hits == 1
+    assert store.get('workout_0')['total_duration'] == 45  # evicted, read from disk
+    assert store.misses == 1
+    assert store.get('missing') is None
+
+    reopened = WorkoutStore(str(tmp_path / 'workouts.db'))
+    assert 'workout_1' in reopened
+
+
+def test_session_carries_only_the_workout_id(tmp_path, monkeypatch):
+    import app as web_app
+
+    monkeypatch.setattr(web_app, 'workout_store', WorkoutStore(str(tmp_path / 'workouts.db')))
+    monkeypatch.setattr(web_app.planner, 'save_workout', lambda workout: None)
+    client = web_app.app.test_client()
+
+    client.post('/generate_workout', data={'experience_level': 'beginner', 'equipment': ['barbell']})
+    with client.session_transaction() as session:
+        workout_id = session['current_workout_id']
+        assert 'current_workout' not in session
+
+    assert client.get(f"/api/workout/{workout_id}").json['workout']['id'] == workout_id
+    assert client.get('/api/workout/unknown').status_code == 404
+
+
+def test_prunes_workouts_past_retention(tmp_path):
+    """Workouts not written within the retention period are deleted from disk and cache."""
+    store = WorkoutStore(str(tmp_path / 'workouts.db'), retention_days=7)
+    store.put({'id': 'old'})
+    store.put({'id': 'rewritten'})
+    store._connection().execute("UPDATE workouts SET created_at = created_at - 8 * 86400")
+    store.put({'id': 'rewritten'})
+    store.put({'id': 'new'})
+
+    assert store.prune() == 1
+    assert 'old' not in store and 'rewritten' in store and 'new' in store
+    assert WorkoutStore(str(tmp_path / 'workouts.db'), retention_days=None).prune() == 0
+
+
+def test_conditional_put_rejects_stale_versions(tmp_path):
+    """A put based on an outdated read fails, in another process too, and the reader sees the newer item."""
+    path = str(tmp_path / 'plans.db')
+    first, second = WorkoutStore(path), WorkoutStore(path)
+    first.put({'id': 'plan', 'days': 1})
+    assert second.get('plan')['days'] == 1
+
+    first.put({'id': 'plan', 'version': 1, 'days': 2}, expected_version=0)
+    with pytest.raises(VersionConflict):
+        second.put({'id': 'plan', 'version': 1, 'days': 3}, expected_version=0)
+    assert second.get('plan') == {'id': 'plan', 'version': 1, 'days': 2}
+    second.put({'id': 'plan', 'version': 2, 'days': 3}, expected_version=1)
+    assert WorkoutStore(path).get('plan')['days'] == 3
+    with pytest.raises(VersionConflict):
+        second.put({'id': 'missing', 'version': 1}, expected_version=0)
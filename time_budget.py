@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Time-Budget Fitting
+
+Chooses which exercises go into a section, and how many sets each gets, so
+that the section fills its share of the session without running over.
+Each candidate exercise offers several set counts, each with a known
+duration (sets x (time per set + rest) plus a transition). Picking at most
+one option per exercise to fill a budget is a multiple-choice knapsack. It
+is solved by dynamic programming over time slots: for each number of
+exercises chosen, a Python int serves as a bitset of reachable durations,
+so adding an option to every state is a single shift-and-or. For a
+section's dozen candidates this takes tens of microseconds.
+"""
+
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Durations are rounded up to whole slots, so fitted sections never overrun
+SLOT_SECONDS = 15
+
+# Moving to and setting up the next exercise
+TRANSITION_SECONDS = 60
+
+# Set counts the solver may choose from
+MIN_SETS = 2
+MAX_SETS = 5
+
+# Best-ranked candidates considered per section
+MAX_CANDIDATES = 12
+
+# Used when the catalog gives no time_per_set
+DEFAULT_SET_SECONDS = 60
+
+# Rest between accessory sets
+ACCESSORY_REST_SECONDS = 45
+
+
+def fit_time_budget(groups: List[List[int]], budget_seconds: int, max_items: Optional[int] = None,
+                    min_items: int = 0, slot: int = SLOT_SECONDS) -> Tuple[List[Optional[int]], int]:
+    """
+    Pick at most one option from each group, filling the budget as fully as possible.
+
+    Among selections with the longest total duration that fits, earlier
+    groups and earlier options are preferred, so callers list groups
+    best-ranked first and each group's options most-preferred first.
+
+    Args:
+        groups (List[List[int]]): Per candidate, the duration in seconds of each option
+        budget_seconds (int): Time to fill
+        max_items (int): Most groups to pick from (defaults to all)
+        min_items (int): Fewest groups to pick from, if the budget allows
+        slot (int): Time resolution in seconds
+
+    Returns:
+        Tuple[List[Optional[int]], int]: Chosen option index per group (None
+            if the group is skipped), and the total duration in seconds
+    """
+    slots = max(0, budget_seconds) // slot
+    limit = (1 << (slots + 1)) - 1
+    max_items = len(groups) if max_items is None else min(max_items, len(groups))
+    weights = [[-(-seconds // slot) for seconds in options] for options in groups]
+
+    # reach[k] has bit t set when k groups can fill exactly t slots
+    reach = [1] + [0] * max_items
+    history = []
+    for options in weights:
+        history.append(reach)
+        updated = list(reach)
+        for k in range(1, max_items + 1):
+            previous = reach[k - 1]
+            if previous:
+                for weight in options:
+                    updated[k] |= previous << weight
+                updated[k] &= limit
+        reach = updated
+
+    # Longest fill, using as few exercises as achieve it; fewer than
+    # min_items only if nothing else fits
+    best_k, best_t = 0, 0
+    for first in (min(min_items, max_items), 1):
+        for k in range(first, max_items + 1):
+            t = reach[k].bit_length() - 1
+            if t > best_t:
+                best_k, best_t = k, t
+        if best_t:
+            break
+
+    # Walk back, skipping the lowest-ranked groups whenever the fill allows
+    picks: List[Optional[int]] = [None] * len(groups)
+    k, t, total = best_k, best_t, 0
+    for index in range(len(groups) - 1, -1, -1):
+        before = history[index]
+        if (before[k] >> t) & 1:
+            continue
+        for option, weight in enumerate(weights[index]):
+            if weight <= t and (before[k - 1] >> (t - weight)) & 1:
+                picks[index] = option
+                total += groups[index][option]
+                k, t = k - 1, t - weight
+                break
+    return picks, total
+
+
+def set_options(preferred_sets: int) -> List[int]:
+    """Set counts from MIN_SETS to MAX_SETS, closest to `preferred_sets` first."""
+    return sorted(range(MIN_SETS, MAX_SETS + 1), key=lambda sets: (abs(sets - preferred_sets), -sets))
+
+
+def fit_section(candidates: List[Dict], budget_seconds: int, plan: Callable[[Dict], Tuple[int, int]],
+                max_exercises: int, min_exercises: int = 1) -> Tuple[List[Tuple[Dict, int]], int]:
+    """
+    Fit ranked exercises and their set counts to a section's time budget.
+
+    Args:
+        candidates (List[Dict]): Exercises, best first; only the first
+            MAX_CANDIDATES are considered
+        budget_seconds (int): Section length
+        plan (Callable): exercise -> (preferred sets, seconds per set including rest)
+        max_exercises (int): Most exercises in the section
+        min_exercises (int): Fewest exercises, always met when there are
+            enough candidates. If they do not fit even at MIN_SETS, the
+            quickest ones are given MIN_SETS and the section overruns.
+
+    Returns:
+        Tuple[List[Tuple[Dict, int]], int]: (exercise, sets) in rank order, and
+            the section's duration in seconds (more than the budget when it
+            overruns)
+    """
+    candidates = candidates[:MAX_CANDIDATES]
+    counts, groups = [], []
+    for exercise in candidates:
+        preferred_sets, seconds_per_set = plan(exercise)
+        options = set_options(preferred_sets)
+        counts.append(options)
+        groups.append([TRANSITION_SECONDS + sets * seconds_per_set for sets in options])
+
+    picks, seconds = fit_time_budget(groups, budget_seconds, max_exercises, min_exercises)
+    if sum(pick is not None for pick in picks) < min(min_exercises, len(candidates)):
+        # No selection of min_exercises fits: take the quickest at the fewest sets
+        floor = [counts[index].index(MIN_SETS) for index in range(len(candidates))]
+        quickest = sorted(range(len(candidates)), key=lambda index: groups[index][floor[index]])[:min_exercises]
+        picks = [floor[index] if index in quickest else None for index in range(len(candidates))]
+        seconds = sum(groups[index][floor[index]] for index in quickest)
+    chosen = [(exercise, counts[index][pick]) for index, (exercise, pick) in enumerate(zip(candidates, picks))
+              if pick is not None]
+    return chosen, seconds
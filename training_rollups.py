@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Training Rollups
+
+Weekly and monthly aggregates of workout feedback (difficulty, enjoyment,
+completion), maintained incrementally as feedback is recorded. Each period
+keeps per-bucket sums plus prefix sums, so any range of buckets is
+summarized with two lookups instead of a pass over the raw history.
+"""
+
+import bisect
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+PERIODS = ('week', 'month')
+ROLLUP_FIELDS = ('difficulty_rating', 'enjoyment_rating', 'completion_rate')
+
+
+def bucket_bounds(timestamp: float, period: str) -> Tuple[float, float]:
+    """
+    Return the [start, end) epoch bounds of the bucket containing `timestamp`.
+
+    Weeks start on Monday and months on the 1st, both at local midnight.
+    """
+    moment = datetime.fromtimestamp(timestamp)
+    midnight = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    if period == 'week':
+        start = midnight - timedelta(days=midnight.weekday())
+        end = start + timedelta(days=7)
+    elif period == 'month':
+        start = midnight.replace(day=1)
+        end = (start + timedelta(days=32)).replace(day=1)
+    else:
+        raise ValueError(f"Unknown rollup period: {period!r} (expected one of {', '.join(PERIODS)})")
+    return start.timestamp(), end.timestamp()
+
+
+class RollupSeries:
+    """Time-ordered buckets for one period with per-bucket and prefix sums."""
+
+    def __init__(self, period: str):
+        """
+        Initialize an empty series.
+
+        Args:
+            period (str): 'week' or 'month'
+        """
+        bucket_bounds(0, period)  # validate period
+        self.period = period
+        self.starts = []
+        self._ends = []
+        self._counts = []
+        self._sums = {field: [] for field in ROLLUP_FIELDS}
+        # Prefix arrays have one more element than there are buckets
+        self._prefix_counts = [0]
+        self._prefix_sums = {field: [0.0] for field in ROLLUP_FIELDS}
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def add(self, timestamp: float, values: Dict[str, float]):
+        """Fold one feedback row into its bucket."""
+        if self.starts and self.starts[-1] <= timestamp < self._ends[-1]:
+            # Fast path: feedback arrives in time order, mostly into the latest bucket
+            index = len(self.starts) - 1
+        else:
+            start, end = bucket_bounds(timestamp, self.period)
+            index = bisect.bisect_left(self.starts, start)
+            if index == len(self.starts) or self.starts[index] != start:
+                self._insert_bucket(index, start, end)
+
+        self._counts[index] += 1
+        for field in ROLLUP_FIELDS:
+            self._sums[field][index] += values[field]
+
+        # Only buckets at or after `index` have prefixes covering it; for the
+        # usual append into the latest bucket this is a single update.
+        for position in range(index + 1, len(self._prefix_counts)):
+            self._prefix_counts[position] += 1
+            for field in ROLLUP_FIELDS:
+                self._prefix_sums[field][position] += values[field]
+
+    def remove(self, timestamp: float, values: Dict[str, float]):
+        """Take back a row folded in with add(), dropping its bucket if it empties."""
+        start, _ = bucket_bounds(timestamp, self.period)
+        index = bisect.bisect_left(self.starts, start)
+        if index == len(self.starts) or self.starts[index] != start:
+            raise ValueError(f"No {self.period} bucket holds timestamp {timestamp}")
+        self._counts[index] -= 1
+        for field in ROLLUP_FIELDS:
+            self._sums[field][index] -= values[field]
+        for position in range(index + 1, len(self._prefix_counts)):
+            self._prefix_counts[position] -= 1
+            for field in ROLLUP_FIELDS:
+                self._prefix_sums[field][position] -= values[field]
+        if not self._counts[index]:
+            self._remove_bucket(index)
+
+    def _remove_bucket(self, index: int):
+        """Remove the empty bucket at `index` (the inverse of _insert_bucket)."""
+        del self.starts[index], self._ends[index], self._counts[index]
+        for field in ROLLUP_FIELDS:
+            del self._sums[field][index]
+        del self._prefix_counts[index + 1]
+        for field in ROLLUP_FIELDS:
+            del self._prefix_sums[field][index + 1]
+
+    def _insert_bucket(self, index: int, start: float, end: float):
+        """Insert an empty bucket at `index`."""
+        self.starts.insert(index, start)
+        self._ends.insert(index, end)
+        self._counts.insert(index, 0)
+        for field in ROLLUP_FIELDS:
+            self._sums[field].insert(index, 0.0)
+        # The new empty bucket's prefix equals the prefix before it
+        self._prefix_counts.insert(index + 1, self._prefix_counts[index])
+        for field in ROLLUP_FIELDS:
+            self._prefix_sums[field].insert(index + 1, self._prefix_sums[field][index])
+
+    def bucket_range(self, start: Optional[float] = None, end: Optional[float] = None) -> Tuple[int, int]:
+        """Return [lo, hi) indexes of buckets whose start lies within [start, end]."""
+        lo = bisect.bisect_left(self.starts, bucket_bounds(start, self.period)[0]) if start is not None else 0
+        hi = bisect.bisect_right(self.starts, end) if end is not None else len(self.starts)
+        return lo, hi
+
+    def _averages(self, count: int, sums: Dict[str, float]) -> Dict:
+        return {
+            'count': count,
+            'avg_difficulty': sums['difficulty_rating'] / count if count else 0.0,
+            'avg_enjoyment': sums['enjoyment_rating'] / count if count else 0.0,
+            'avg_completion': sums['completion_rate'] / count if count else 0.0
+        }
+
+    def summarize(self, lo: int, hi: int) -> Dict:
+        """Summarize buckets [lo, hi) from prefix sums in O(1)."""
+        lo, hi = max(0, lo), max(0, min(hi, len(self.starts)))
+        hi = max(lo, hi)
+        count = self._prefix_counts[hi] - self._prefix_counts[lo]
+        sums = {field: self._prefix_sums[field][hi] - self._prefix_sums[field][lo] for field in ROLLUP_FIELDS}
+        return self._averages(count, sums)
+
+    def buckets(self, lo: int, hi: int) -> List[Dict]:
+        """Return per-bucket averages for buckets [lo, hi)."""
+        result = []
+        for index in range(lo, hi):
+            bucket = self._averages(self._counts[index], {field: self._sums[field][index] for field in ROLLUP_FIELDS})
+            bucket['start'] = datetime.fromtimestamp(self.starts[index]).date().isoformat()
+            result.append(bucket)
+        return result
+
+
+class TrainingRollups:
+    """Weekly and monthly rollups of workout feedback."""
+
+    def __init__(self):
+        self.series = {period: RollupSeries(period) for period in PERIODS}
+
+    def add(self, timestamp: float, values: Dict[str, float]):
+        """
+        Record one feedback row in every period.
+
+        Args:
+            timestamp (float): Feedback time in epoch seconds
+            values (Dict[str, float]): difficulty_rating, enjoyment_rating, completion_rate
+        """
+        for series in self.series.values():
+            series.add(timestamp, values)
+
+    def remove(self, timestamp: float, values: Dict[str, float]):
+        """Take back a row recorded with add()."""
+        for series in self.series.values():
+            series.remove(timestamp, values)
+
+    def _series(self, period: str) -> RollupSeries:
+        if period not in self.series:
+            raise ValueError(f"Unknown rollup period: {period!r} (expected one of {', '.join(PERIODS)})")
+        return self.series[period]
+
+    def query(self, period: str = 'week', start: Optional[float] = None,
+              end: Optional[float] = None) -> Dict:
+        """
+        Return per-bucket trends and a range summary.
+
+        Args:
+            period (str): 'week' or 'month'
+            start (float): Earliest bucket to include (epoch seconds)
+            end (float): Latest bucket start to include (epoch seconds)
+
+        Returns:
+            Dict: {'period', 'buckets': [...], 'summary': {...}}
+        """
+        series = self._series(period)
+        lo, hi = series.bucket_range(start, end)
+        return {
+            'period': period,
+            'buckets': series.buckets(lo, hi),
+            'summary': series.summarize(lo, hi)
+        }
+
+    def compare_recent(self, period: str = 'week', baseline_buckets: int = 4) -> Optional[Tuple[Dict, Dict]]:
+        """
+        Compare the latest bucket against the preceding `baseline_buckets`.
+
+        Returns:
+            Optional[Tuple[Dict, Dict]]: (recent, baseline) summaries, or None
+            when fewer than two buckets exist
+        """
+        series = self._series(period)
+        size = len(series)
+        if size < 2:
+            return None
+        recent = series.summarize(size - 1, size)
+        baseline = series.summarize(size - 1 - baseline_buckets, size - 1)
+        return recent, baseline
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Startup Warm-up
+
+Pays the first-request costs at startup instead: building the catalog's
+candidate pools, first-call model overhead on representative predictions,
+and compiling and rendering the key templates. The web apps expose the
+result at /ready, which only succeeds once warm-up has completed, while
+/health keeps reporting liveness.
+"""
+
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Representative requests: each goal and experience level, common equipment sets
+WARMUP_PREFERENCES = [
+    {'time_available': 30, 'goal': 'bjj_performance', 'equipment': ['bodyweight'],
+     'experience_level': 'beginner'},
+    {'time_available': 45, 'goal': 'conditioning', 'equipment': ['bodyweight', 'kettlebell'],
+     'experience_level': 'intermediate'},
+    {'time_available': 60, 'goal': 'strength',
+     'equipment': ['bodyweight', 'barbell', 'dumbbells', 'kettlebell', 'pull-up bar'],
+     'experience_level': 'advanced'}
+]
+
+
+class Warmup:
+    """Runs the startup warm-up once and reports its progress and timings."""
+
+    def __init__(self, app, planner, pages: Optional[Dict[str, Callable[[Dict], Dict]]] = None):
+        """
+        Args:
+            app: Flask application whose templates are warmed
+            planner: Workout planner (None if it failed to initialize)
+            pages (Dict[str, Callable]): Template name -> function building its
+                render context from a warm-up workout
+        """
+        self.app = app
+        self.planner = planner
+        self.pages = pages or {}
+        self.timings: Dict[str, float] = {}
+        self.error: Optional[str] = None
+        self._done = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._started_at = time.time()
+        # A process forked mid-warm-up does not inherit the warm-up thread
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    @property
+    def ready(self) -> bool:
+        return self._done.is_set() and self.error is None
+
+    def record(self, stage: str, seconds: float):
+        """Record the duration of a startup stage, e.g. model loading."""
+        self.timings[stage] = round(seconds, 4)
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def run(self):
+        """Run the warm-up in the calling thread."""
+        try:
+            if self.planner is None:
+                raise RuntimeError("Planner failed to initialize")
+
+            with self.stage('catalog'):
+                for preferences in WARMUP_PREFERENCES:
+                    self.planner.warm_candidate_pools(preferences)
+
+            with self.stage('predictions'):
+                # No user, so nothing is recorded as recently prescribed
+                workouts = [self.planner.generate_workout(preferences) for preferences in WARMUP_PREFERENCES]
+                if hasattr(self.planner, 'predict_progress'):
+                    for workout in workouts:
+                        self.planner.predict_progress(workout)
+
+            with self.stage('templates'):
+                with self.app.test_request_context():
+                    for template_name, context in self.pages.items():
+                        self.app.jinja_env.get_template(template_name).render(**context(workouts[-1]))
+
+            logger.info(f"Warm-up complete: {self.timings}")
+        except Exception as e:
+            self.error = str(e)
+            logger.error(f"Warm-up failed: {e}")
+        finally:
+            self.timings['total'] = round(sum(v for k, v in self.timings.items() if k != 'total'), 4)
+            self._done.set()
+
+    def start(self):
+        """Run the warm-up in a background thread (once)."""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self.run, name='warmup', daemon=True)
+                self._thread.start()
+
+    def _after_fork(self):
+        if self._thread is not None and not self._done.is_set():
+            self._lock = threading.Lock()
+            self._done = threading.Event()
+            self._thread = None
+            self.start()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until warm-up finishes.
+
+        Returns:
+            bool: True if the app is ready
+        """
+        self._done.wait(timeout)
+        return self.ready
+
+    def status(self) -> Dict:
+        """Readiness report for /ready."""
+        if self.ready:
+            state = 'ready'
+        elif self.error:
+            state = 'failed'
+        else:
+            state = 'warming_up'
+        status = {'status': state, 'timings': dict(self.timings),
+                  'uptime_seconds': round(time.time() - self._started_at, 3)}
+        if self.error:
+            status['error'] = self.error
+        return status
@@ -8,17 +8,78 @@ through a mobile-friendly web interface.
 
 from flask import Flask, render_template, request, jsonify, redirect, url_for
 from workout_planner import WorkoutPlanner
+from admission import PRIORITY_BULK, PRIORITY_GENERATION, RoutePolicy, install_admission_control
+from api_encoding import api_response
+from metrics import install_metrics
+from periodization import DEFAULT_PLAN_STORE_PATH, DEFAULT_WEEKS, PLAN_RETENTION_DAYS, MesocyclePlan
+from profiling import install_profiling
+from static_assets import configure_static_assets
+from streaming import requested_stream_format, stream_response
+from template_cache import configure_template_caching
+from warmup import Warmup
+from weekly_planning import WEEKLY_SCHEDULE, generate_weekly_plan, iter_weekly_plan
+from workout_catalog import DEFAULT_CATALOG_PATH, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, WorkoutCatalog
+from workout_store import VersionConflict, WorkoutStore
 import json
+import os
+import time
 from datetime import datetime
 
 app = Flask(__name__)
+configure_template_caching(app)
+configure_static_assets(app)
+install_metrics(app)
+
+# Concurrency limits for expensive endpoints: single workouts are admitted
+# ahead of weekly plans
+admission = install_admission_control(app, {
+    'generate_workout': RoutePolicy(limit=8, queue=16, priority=PRIORITY_GENERATION),
+    'api_generate_workout': RoutePolicy(limit=8, queue=16, priority=PRIORITY_GENERATION),
+    'weekly_plan_events': RoutePolicy(limit=2, queue=4, priority=PRIORITY_BULK, retry_after=5),
+    'api_weekly_plan': RoutePolicy(limit=2, queue=4, priority=PRIORITY_BULK, retry_after=5),
+    'api_create_mesocycle': RoutePolicy(limit=1, queue=2, priority=PRIORITY_BULK, retry_after=10),
+    'api_update_mesocycle_day': RoutePolicy(limit=8, queue=16, priority=PRIORITY_GENERATION)
+})
+
+load_started = time.perf_counter()
 planner = WorkoutPlanner()
 
+# Opt-in profiling of workout generation (PROFILE_TOKEN / PROFILE_SAMPLE_RATE)
+profiler = install_profiling(app, planner)
+
+# Metadata index of saved workouts; files saved before it existed are
+# adopted on the first listing
+catalog = WorkoutCatalog(os.environ.get('WORKOUT_CATALOG_PATH', DEFAULT_CATALOG_PATH),
+                         loader=planner.storage.load)
+catalog_adopted = False
+planner.storage.on_remove = catalog.remove
+
+# Multi-week plans, stored whole and updated in place as days change
+plan_store = WorkoutStore(os.environ.get('PLAN_STORE_PATH', DEFAULT_PLAN_STORE_PATH),
+                          retention_days=PLAN_RETENTION_DAYS)
+
+# Times a day update is redone when another request changed the plan first
+PLAN_UPDATE_ATTEMPTS = 3
+
+# Build candidate pools, run representative predictions and render the key
+# templates before traffic arrives; /ready succeeds once this has finished
+warmup = Warmup(app, planner, pages={
+    'index.html': lambda workout: {},
+    'workout_result.html': lambda workout: {'workout': workout, 'filename': 'warmup.json'}
+})
+warmup.record('models', time.perf_counter() - load_started)
+warmup.start()
+
 @app.route('/')
 def index():
     """Home page with workout planner form."""
     return render_template('index.html')
 
+@app.route('/ready')
+def readiness_check():
+    """Readiness probe: succeeds only once the startup warm-up has completed."""
+    return jsonify(warmup.status()), (200 if warmup.ready else 503)
+
 @app.route('/generate_workout', methods=['POST'])
 def generate_workout():
     """Generate workout based on form data."""
@@ -51,7 +112,8 @@ def generate_workout():
         # Save workout with timestamp
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f"workout_{timestamp}.json"
-        planner.save_workout(workout, filename)
+        filename = planner.save_workout(workout, filename)
+        catalog.add(filename, workout)
         
         return render_template('workout_result.html', workout=workout, filename=filename)
         
@@ -78,7 +140,7 @@ def api_generate_workout():
         planner.set_user_preferences(preferences)
         workout = planner.generate_workout()
         
-        return jsonify(workout)
+        return api_response(workout)
         
     except Exception as e:
         return jsonify({'error': str(e)}), 400
@@ -88,79 +150,185 @@ def weekly_plan():
     """Generate weekly workout plan."""
     return render_template('weekly_plan.html')
 
+def _weekly_preferences(values) -> dict:
+    """Read shared weekly preferences from form or query parameters."""
+    return {
+        'time_available': int(values.get('time_per_day', 30)),
+        'goal': values.get('goal', 'general_fitness'),
+        'equipment': values.getlist('equipment'),
+        'experience_level': values.get('experience_level', 'beginner')
+    }
+
+def _save_weekly_plan(weekly_workouts: dict) -> str:
+    """Save a weekly plan and return its path."""
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    filename = f"weekly_plan_{timestamp}.json"
+    return planner.storage.save(weekly_workouts, filename)
+
 @app.route('/generate_weekly', methods=['POST'])
 def generate_weekly():
-    """Generate weekly workout plan."""
+    """Show the weekly plan page; days stream in from /weekly_plan/events as they are generated."""
     try:
-        time_per_day = int(request.form.get('time_per_day', 30))
-        goal = request.form.get('goal', 'general_fitness')
-        experience_level = request.form.get('experience_level', 'beginner')
-        equipment = request.form.getlist('equipment')
+        _weekly_preferences(request.form)  # validate before rendering
+        stream_url = url_for('weekly_plan_events', **request.form.to_dict(flat=False))
+        return render_template('weekly_result.html', days=list(WEEKLY_SCHEDULE), stream_url=stream_url)
         
-        weekly_schedule = {
-            'Monday': {'type': 'full_body', 'focus': None},
-            'Tuesday': {'type': 'cardio', 'focus': None},
-            'Wednesday': {'type': 'upper_body', 'focus': ['chest', 'back', 'shoulders']},
-            'Thursday': {'type': 'cardio', 'focus': None},
-            'Friday': {'type': 'lower_body', 'focus': ['legs', 'core']},
-            'Saturday': {'type': 'hiit', 'focus': None},
-            'Sunday': {'type': 'core', 'focus': ['core']}
+    except Exception as e:
+        return render_template('error.html', error=str(e))
+
+@app.route('/weekly_plan/events')
+def weekly_plan_events():
+    """Server-sent events: one 'day' event per generated day, then 'done' once the plan is saved."""
+    try:
+        base_preferences = _weekly_preferences(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    weekly_workouts = {}
+    
+    def days():
+        for result in iter_weekly_plan(planner, base_preferences):
+            if result['success']:
+                weekly_workouts[result['day']] = result['workout']
+            yield result
+    
+    def done():
+        if len(weekly_workouts) < len(WEEKLY_SCHEDULE):
+            return {'saved': False}
+        ordered = {day: weekly_workouts[day] for day in WEEKLY_SCHEDULE}
+        return {'saved': True, 'filename': _save_weekly_plan(ordered)}
+    
+    return stream_response(days(), 'sse', event='day', done=done)
+
+@app.route('/api/weekly_plan', methods=['POST'])
+def api_weekly_plan():
+    """API endpoint for generating a weekly plan; ?stream=1 (NDJSON) or ?stream=sse emits days as they complete."""
+    try:
+        data = request.get_json() or {}
+        
+        base_preferences = {
+            'time_available': data.get('time_per_day', 30),
+            'goal': data.get('goal', 'general_fitness'),
+            'equipment': data.get('equipment', ['bodyweight']),
+            'experience_level': data.get('experience_level', 'beginner')
         }
         
-        weekly_workouts = {}
-        
-        for day, schedule in weekly_schedule.items():
-            preferences = {
-                'time_available': time_per_day,
-                'goal': goal,
-                'equipment': equipment,
-                'experience_level': experience_level,
-                'workout_type': schedule['type'],
-                'focus_areas': schedule['focus']
-            }
-            
-            planner.set_user_preferences(preferences)
-            workout = planner.generate_workout()
-            weekly_workouts[day] = workout
+        stream_format = requested_stream_format(request, data)
+        if stream_format:
+            return stream_response(iter_weekly_plan(planner, base_preferences), stream_format, event='day')
         
-        # Save weekly plan
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"weekly_plan_{timestamp}.json"
-        with open(filename, 'w') as f:
-            json.dump(weekly_workouts, f, indent=2)
+        return api_response(generate_weekly_plan(planner, base_preferences))
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/api/mesocycle', methods=['POST'])
+def api_create_mesocycle():
+    """API endpoint for generating a multi-week periodized plan."""
+    try:
+        data = request.get_json() or {}
         
-        return render_template('weekly_result.html', weekly_workouts=weekly_workouts, filename=filename)
+        plan = MesocyclePlan({
+            'time_available': data.get('time_per_day', 30),
+            'goal': data.get('goal', 'general_fitness'),
+            'equipment': data.get('equipment', ['bodyweight']),
+            'experience_level': data.get('experience_level', 'beginner')
+        }, weeks=int(data.get('weeks', DEFAULT_WEEKS)))
+        plan.generate(planner)
+        plan_store.put(plan.to_dict())
+        
+        return api_response(plan.to_dict())
         
     except Exception as e:
-        return render_template('error.html', error=str(e))
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/api/mesocycle/<plan_id>')
+def api_get_mesocycle(plan_id):
+    """API endpoint for fetching a stored plan."""
+    data = plan_store.get(plan_id)
+    if data is None:
+        return jsonify({'error': f"Plan {plan_id} not found"}), 404
+    return api_response(data)
+
+@app.route('/api/mesocycle/<plan_id>/day', methods=['POST'])
+def api_update_mesocycle_day(plan_id):
+    """
+    Change one day's preferences or record its feedback; only the affected days are regenerated.
+    
+    The plan is stored only if no other request changed it meanwhile; otherwise the update is
+    redone on the newer plan. Days regenerated before a failure are stored before the error
+    is returned.
+    """
+    try:
+        body = request.get_json() or {}
+        for _ in range(PLAN_UPDATE_ATTEMPTS):
+            data = plan_store.get(plan_id)
+            if data is None:
+                return jsonify({'error': f"Plan {plan_id} not found"}), 404
+            
+            plan = MesocyclePlan.from_dict(data)
+            plan.update_day(int(body.get('week', 1)), body.get('day', ''),
+                            preferences=body.get('preferences'), feedback=body.get('feedback'))
+            error = None
+            try:
+                regenerated = plan.generate(planner)
+            except ValueError as e:
+                error = e
+            plan.version += 1
+            try:
+                plan_store.put(plan.to_dict(), expected_version=data.get('version', 0))
+            except VersionConflict:
+                continue
+            if error is not None:
+                raise error
+            
+            return api_response({
+                'regenerated': [{'week': week, 'day': day} for week, day in regenerated],
+                'plan': plan.to_dict()
+            })
+        
+        return jsonify({'error': f"Plan {plan_id} is being changed by other requests, please retry"}), 409
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
 
 @app.route('/saved_workouts')
 def saved_workouts():
-    """Show saved workouts."""
-    import os
-    workouts = []
-    
-    for filename in os.listdir('.'):
-        if filename.startswith('workout_') and filename.endswith('.json'):
-            with open(filename, 'r') as f:
-                workout_data = json.load(f)
-                workouts.append({
-                    'filename': filename,
-                    'date': workout_data.get('date', 'Unknown'),
-                    'workout_type': workout_data.get('workout_type', 'Unknown'),
-                    'goal': workout_data.get('goal', 'Unknown'),
-                    'duration': workout_data.get('estimated_duration', 0)
-                })
-    
-    workouts.sort(key=lambda x: x['date'], reverse=True)
-    return render_template('saved_workouts.html', workouts=workouts)
+    """Show saved workouts, sorted and paginated from the catalog."""
+    global catalog_adopted
+    try:
+        if not catalog_adopted:
+            catalog.rebuild()
+            catalog_adopted = True
+        
+        sort = request.args.get('sort', 'date')
+        descending = request.args.get('order', 'desc') != 'asc'
+        page = int(request.args.get('page', 1))
+        per_page = int(request.args.get('per_page', DEFAULT_PAGE_SIZE))
+        if page < 1 or per_page < 1:
+            raise ValueError("page and per_page must be positive")
+        # Capped as the catalog caps it, so the paging links count the same rows
+        per_page = min(per_page, MAX_PAGE_SIZE)
+        workouts, total = catalog.list(sort=sort, descending=descending, page=page, per_page=per_page,
+                                       workout_type=request.args.get('type'), goal=request.args.get('goal'))
+        
+        # Carry the current sort and filters into the paging links
+        params = {key: value for key, value in request.args.items() if key != 'page'}
+        if 'per_page' in params:
+            params['per_page'] = per_page
+        newer_url = url_for('saved_workouts', page=page - 1, **params) if page > 1 else None
+        older_url = url_for('saved_workouts', page=page + 1, **params) if page * per_page < total else None
+        
+        return render_template('saved_workouts.html', workouts=workouts, total=total,
+                               newer_url=newer_url, older_url=older_url)
+    except Exception as e:
+        return render_template('error.html', error=str(e))
 
-@app.route('/view_workout/<filename>')
+@app.route('/view_workout/<path:filename>')
 def view_workout(filename):
     """View a specific saved workout."""
     try:
-        with open(filename, 'r') as f:
-            workout = json.load(f)
+        workout = catalog.load(filename)
         return render_template('workout_result.html', workout=workout, filename=filename)
     except Exception as e:
         return render_template('error.html', error=str(e))
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Weekly Planning
+
+Builds seven-day plans by generating every day through the batch
+generator. Days share the planner's precomputed candidate pools and never
+touch its preferences. Days can be collected in calendar order or streamed
+as they complete.
+"""
+
+from typing import Dict, Iterator, Optional
+import logging
+
+from batch_generation import iter_workouts
+
+logger = logging.getLogger(__name__)
+
+WEEKLY_SCHEDULE = {
+    'Monday': {'type': 'full_body', 'focus': None},
+    'Tuesday': {'type': 'cardio', 'focus': None},
+    'Wednesday': {'type': 'upper_body', 'focus': ['chest', 'back', 'shoulders']},
+    'Thursday': {'type': 'cardio', 'focus': None},
+    'Friday': {'type': 'lower_body', 'focus': ['legs', 'core']},
+    'Saturday': {'type': 'hiit', 'focus': None},
+    'Sunday': {'type': 'core', 'focus': ['core']}
+}
+
+DAYS_PER_WEEK = len(WEEKLY_SCHEDULE)
+
+
+def daily_preferences(base_preferences: Dict, schedule: Optional[Dict] = None) -> Dict[str, Dict]:
+    """
+    Expand shared weekly preferences into one preference set per day.
+
+    Args:
+        base_preferences (Dict): time_available, goal, equipment, experience_level
+        schedule (Dict): Day -> {'type', 'focus'} (defaults to WEEKLY_SCHEDULE)
+
+    Returns:
+        Dict[str, Dict]: Day -> preferences, in schedule order
+    """
+    schedule = schedule or WEEKLY_SCHEDULE
+    return {
+        day: dict(base_preferences, workout_type=plan['type'], focus_areas=plan['focus'])
+        for day, plan in schedule.items()
+    }
+
+
+def iter_weekly_plan(planner, base_preferences: Dict, schedule: Optional[Dict] = None) -> Iterator[Dict]:
+    """
+    Generate a week of workouts, yielding each day as it completes.
+
+    Args:
+        planner: Any workout planner accepting generate_workout(preferences)
+        base_preferences (Dict): Preferences shared by every day
+        schedule (Dict): Day -> {'type', 'focus'} (defaults to WEEKLY_SCHEDULE)
+
+    Yields:
+        Dict: {'day', 'index', 'success', 'workout'} or {'day', 'index', 'success', 'error'}
+    """
+    days = daily_preferences(base_preferences, schedule)
+    names = list(days)
+    for result in iter_workouts(planner, list(days.values())):
+        result['day'] = names[result['index']]
+        yield result
+
+
+def generate_weekly_plan(planner, base_preferences: Dict, schedule: Optional[Dict] = None) -> Dict[str, Dict]:
+    """
+    Generate a week of workouts.
+
+    Returns:
+        Dict[str, Dict]: Day -> workout, in schedule order
+
+    Raises:
+        ValueError: If any day fails to generate
+    """
+    results = {}
+    for result in iter_weekly_plan(planner, base_preferences, schedule):
+        if not result['success']:
+            raise ValueError(f"{result['day']}: {result['error']}")
+        results[result['day']] = result['workout']
+    return {day: results[day] for day in (schedule or WEEKLY_SCHEDULE)}
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Weighted Sampling
+
+Draws exercises without replacement with probability proportional to their
+weights (learned preference scores, rating factors). Uses the keyed method
+of Efraimidis and Spirakis. Each item gets the key u ** (1 / weight), where
+u is uniform on [0, 1). This is the exponential key E / weight, transformed
+monotonically. The k largest keys are exactly a sequence of k weighted draws
+without replacement, in draw order. It takes one pass over the items plus a
+size-k heap, with no sort of the whole list. It is pure Python, so the
+rule-based deployment needs no numpy.
+"""
+
+from typing import Iterable, List, Optional, Sequence
+import heapq
+import random
+
+
+def weighted_sample(items: Sequence, weights: Iterable[float], k: int,
+                    rng: Optional[random.Random] = None) -> List:
+    """
+    Draw up to `k` items without replacement, proportionally to weight.
+
+    Args:
+        items (Sequence): Items to draw from
+        weights (Iterable[float]): One weight per item; items with a weight of
+            zero or less are never drawn
+        k (int): Number of items to draw
+        rng (random.Random): Random source (defaults to the `random` module)
+
+    Returns:
+        List: The drawn items in draw order, so earlier items are the ones the
+            weights favour most
+    """
+    uniform = (rng or random).random
+    keys = [uniform() ** (1.0 / weight) if weight > 0 else -1.0 for weight in weights]
+    top = heapq.nlargest(k, range(len(keys)), key=keys.__getitem__)
+    return [items[index] for index in top if keys[index] >= 0]
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Workout Catalog
+
+Metadata index for saved workout files. Each save records the file's date,
+type, goal, duration and exercise count in a SQLite table, so the saved
+workouts page is a sorted, paginated index query instead of a directory scan
+that parses every file. Parsed workouts are kept in an LRU cache for viewing.
+"""
+
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+import json
+import logging
+import os
+import sqlite3
+import threading
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CATALOG_PATH = 'workout_catalog.db'
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+# Number of parsed workouts kept in memory
+DEFAULT_CACHE_SIZE = 128
+
+SORT_FIELDS = ('date', 'workout_type', 'goal')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS saved_workouts (
+    filename TEXT PRIMARY KEY,
+    date TEXT NOT NULL,
+    workout_type TEXT NOT NULL,
+    goal TEXT NOT NULL,
+    duration INTEGER NOT NULL,
+    exercise_count INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS saved_workouts_date ON saved_workouts (date, filename);
+CREATE INDEX IF NOT EXISTS saved_workouts_type ON saved_workouts (workout_type, date, filename);
+CREATE INDEX IF NOT EXISTS saved_workouts_goal ON saved_workouts (goal, date, filename);
+CREATE INDEX IF NOT EXISTS saved_workouts_type_goal ON saved_workouts (workout_type, goal, date, filename);
+"""
+
+COLUMNS = ('filename', 'date', 'workout_type', 'goal', 'duration', 'exercise_count')
+
+
+def workout_metadata(filename: str, workout: Dict) -> Dict:
+    """Extract the catalog columns from a saved workout."""
+    exercise_count = sum(
+        len(section.get('exercises', []))
+        for section in workout.values()
+        if isinstance(section, dict)
+    ) + len(workout.get('exercises', []))
+    return {
+        'filename': filename,
+        'date': str(workout.get('date', 'Unknown')),
+        'workout_type': str(workout.get('workout_type') or 'Unknown'),
+        'goal': str(workout.get('goal') or 'Unknown'),
+        'duration': int(workout.get('estimated_duration', 0) or 0),
+        'exercise_count': exercise_count
+    }
+
+
+def _read_json(filename: str) -> Dict:
+    with open(filename, 'r') as f:
+        return json.load(f)
+
+
+class WorkoutCatalog:
+    """SQLite index of saved workout files with an LRU cache of parsed workouts."""
+
+    def __init__(self, path: str = DEFAULT_CATALOG_PATH, cache_size: int = DEFAULT_CACHE_SIZE,
+                 loader: Optional[Callable[[str], Dict]] = None):
+        """
+        Initialize the catalog. The database is opened on first use.
+
+        Args:
+            path (str): SQLite database file
+            cache_size (int): Maximum number of parsed workouts cached in memory
+            loader (Callable): Reads a saved workout by filename (defaults to
+                opening the file directly)
+        """
+        self.path = path
+        self.cache_size = cache_size
+        self.loader = loader or _read_json
+        self._cache = OrderedDict()
+        self._conn = None
+        self._lock = threading.RLock()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+            self._conn.executescript(SCHEMA)
+        return self._conn
+
+    def add(self, filename: str, workout: Dict):
+        """Index a workout that has been written to `filename`."""
+        metadata = workout_metadata(filename, workout)
+        with self._lock:
+            self._connection().execute(
+                f"INSERT OR REPLACE INTO saved_workouts ({', '.join(COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?)",
+                tuple(metadata[column] for column in COLUMNS)
+            )
+            self._cache.pop(filename, None)
+
+    def remove(self, filenames: List[str]):
+        """Drop deleted files from the catalog."""
+        with self._lock:
+            self._connection().executemany('DELETE FROM saved_workouts WHERE filename = ?',
+                                           [(filename,) for filename in filenames])
+            for filename in filenames:
+                self._cache.pop(filename, None)
+
+    def rebuild(self, directory: str = '.', prefix: str = 'workout_') -> int:
+        """
+        Index saved workout files not yet in the catalog.
+
+        Used once to adopt files written before the catalog existed.
+
+        Returns:
+            int: Number of files added
+        """
+        with self._lock:
+            known = {row[0] for row in self._connection().execute('SELECT filename FROM saved_workouts')}
+        added = 0
+        for name in os.listdir(directory):
+            filename = os.path.normpath(os.path.join(directory, name)) if directory != '.' else name
+            if not name.startswith(prefix) or not name.endswith('.json') or filename in known:
+                continue
+            try:
+                with open(filename, 'r') as f:
+                    self.add(filename, json.load(f))
+                added += 1
+            except (OSError, ValueError) as e:
+                logger.warning(f"Skipping unreadable workout file {filename}: {e}")
+        if added:
+            logger.info(f"Indexed {added} saved workout(s)")
+        return added
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection().execute('SELECT COUNT(*) FROM saved_workouts').fetchone()[0]
+
+    def __contains__(self, filename: str) -> bool:
+        with self._lock:
+            return self._connection().execute(
+                'SELECT 1 FROM saved_workouts WHERE filename = ?', (filename,)
+            ).fetchone() is not None
+
+    def list(self, sort: str = 'date', descending: bool = True, page: int = 1,
+             per_page: int = DEFAULT_PAGE_SIZE, workout_type: Optional[str] = None,
+             goal: Optional[str] = None) -> Tuple[List[Dict], int]:
+        """
+        Return one page of saved workout metadata.
+
+        Args:
+            sort (str): 'date', 'workout_type' or 'goal'; ties break by date
+            descending (bool): Sort direction
+            page (int): 1-based page number
+            per_page (int): Page size (capped at MAX_PAGE_SIZE)
+            workout_type (str): Only include this workout type
+            goal (str): Only include this goal
+
+        Returns:
+            Tuple[List[Dict], int]: (rows, total matching rows)
+
+        Raises:
+            ValueError: If the sort field or paging arguments are invalid
+        """
+        if sort not in SORT_FIELDS:
+            raise ValueError(f"Unknown sort field: {sort!r} (expected one of {', '.join(SORT_FIELDS)})")
+        page, per_page = int(page), int(per_page)
+        if page < 1 or per_page < 1:
+            raise ValueError("page and per_page must be positive")
+        per_page = min(per_page, MAX_PAGE_SIZE)
+
+        where, params = [], []
+        if workout_type:
+            where.append('workout_type = ?')
+            params.append(workout_type)
+        if goal:
+            where.append('goal = ?')
+            params.append(goal)
+        clause = f"WHERE {' AND '.join(where)}" if where else ''
+        direction = 'DESC' if descending else 'ASC'
+        order = ', '.join(f"{column} {direction}" for column in dict.fromkeys((sort, 'date', 'filename')))
+
+        with self._lock:
+            conn = self._connection()
+            total = conn.execute(f"SELECT COUNT(*) FROM saved_workouts {clause}", params).fetchone()[0]
+            rows = conn.execute(
+                f"SELECT {', '.join(COLUMNS)} FROM saved_workouts {clause} ORDER BY {order} LIMIT ? OFFSET ?",
+                params + [per_page, (page - 1) * per_page]
+            ).fetchall()
+        return [dict(zip(COLUMNS, row)) for row in rows], total
+
+    def load(self, filename: str) -> Dict:
+        """
+        Return a parsed saved workout, reading from disk on a cache miss.
+
+        Only cataloged files can be loaded.
+
+        Raises:
+            KeyError: If the file is not in the catalog
+        """
+        with self._lock:
+            workout = self._cache.get(filename)
+            if workout is not None:
+                self._cache.move_to_end(filename)
+                return workout
+        if filename not in self:
+            raise KeyError(f"Saved workout not found: {filename}")
+        workout = self.loader(filename)
+        with self._lock:
+            self._cache[filename] = workout
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return workout
@@ -13,30 +13,42 @@ An intelligent workout generator that creates personalized workouts based on:
 import json
 import random
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 import logging
-import re
+import uuid
+
+from metrics import timed, timed_stage
+from time_budget import ACCESSORY_REST_SECONDS, DEFAULT_SET_SECONDS, fit_section
+from weighted_sampling import weighted_sample
+from workout_storage import default_storage
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Upper bound on cached (section, equipment, experience level) candidate pools
+MAX_CANDIDATE_POOLS = 1024
+
 class WorkoutPlanner:
     """AI-powered workout planner that generates personalized workouts."""
     
-    def __init__(self, data_file: str = 'workout_data.json'):
+    def __init__(self, data_file: str = 'workout_data.json', data: Optional[Dict] = None):
         """
         Initialize the workout planner.
         
         Args:
             data_file (str): Path to workout data file
+            data (Dict): Already-loaded workout data, e.g. a catalog shared with
+                other planners; data_file is not read when this is given
         """
-        self.data = self._load_workout_data(data_file)
+        self.data = data if data is not None else self._load_workout_data(data_file)
         self.user_preferences = {}
         # Assign top-level keys for convenience
         self.exercises = self.data.get('exercises', [])
         self.workout_types = self.data.get('workout_types', {})
         self.muscle_groups = self.data.get('muscle_groups', {})
+        self.storage = default_storage()
+        self._candidate_pools = {}
         
     def _load_workout_data(self, data_file: str) -> Dict:
         """Load workout data from JSON file."""
@@ -50,7 +62,8 @@ class WorkoutPlanner:
             logger.error(f"Error parsing workout data file: {e}")
             return self._create_default_data()
     
-    def _create_default_data(self) -> Dict:
+    @staticmethod
+    def _create_default_data() -> Dict:
         """Create default workout data structure."""
         return {
             "exercises": {
@@ -119,6 +132,18 @@ class WorkoutPlanner:
                     "rest_between_sets": 30,
                     "rest_between_exercises": 60
                 },
+                "metcon": {
+                    "description": "Mixed-modal conditioning",
+                    "focus": ["cardio", "strength"],
+                    "rest_between_sets": 30,
+                    "rest_between_exercises": 60
+                },
+                "endurance": {
+                    "description": "Sustained aerobic work",
+                    "focus": ["cardio"],
+                    "rest_between_sets": 30,
+                    "rest_between_exercises": 60
+                },
                 "hiit": {
                     "description": "High-intensity interval training",
                     "focus": ["cardio"],
@@ -162,22 +187,29 @@ class WorkoutPlanner:
         self.user_preferences = preferences
         logger.info(f"User preferences set: {preferences}")
     
-    def generate_workout(self) -> Dict:
+    def generate_workout(self, preferences: Optional[Dict] = None) -> Dict:
         """
         Generate a personalized workout based on user preferences.
         
+        Args:
+            preferences (Dict): Preferences for this workout; defaults to the
+                ones given to set_user_preferences(). Passing them explicitly
+                leaves the planner's state untouched, so concurrent calls
+                are safe.
+        
         Returns:
             Dict: Complete workout plan
         """
-        if not self.user_preferences:
+        preferences = preferences if preferences is not None else self.user_preferences
+        if not preferences:
             raise ValueError("User preferences must be set before generating workout")
         
-        time_available = self.user_preferences.get('time_available', 60)
-        goal = self.user_preferences.get('goal', 'general_fitness')
-        equipment = self.user_preferences.get('equipment', ['bodyweight'])
-        experience_level = self.user_preferences.get('experience_level', 'beginner')
-        focus_areas = self.user_preferences.get('focus_areas', [])
-        workout_type = self.user_preferences.get('workout_type')
+        time_available = preferences.get('time_available', 60)
+        goal = preferences.get('goal', 'general_fitness')
+        equipment = preferences.get('equipment', ['bodyweight'])
+        experience_level = preferences.get('experience_level', 'beginner')
+        focus_areas = preferences.get('focus_areas', [])
+        workout_type = preferences.get('workout_type')
         
         # Determine workout type based on goal if not specified
         if not workout_type:
@@ -186,26 +218,27 @@ class WorkoutPlanner:
         # Get workout template
         workout_template = self.workout_types[workout_type]
         
-        # Calculate time allocation for each section
-        strength_time = int(time_available * 0.4)  # 40% for strength
-        metcon_time = int(time_available * 0.4)    # 40% for metcon
-        accessory_time = int(time_available * 0.2) # 20% for accessory
+        # Strength (40%) and accessory (20%) work is fitted to its share of the
+        # session; the metcon is a timed block that takes the time left over
+        strength_exercises, strength_seconds = self._generate_strength_section(
+            equipment, experience_level, focus_areas, int(time_available * 60 * 0.4)
+        )
         
-        # Generate each section
-        strength_exercises = self._generate_strength_section(
-            equipment, experience_level, focus_areas, strength_time
+        accessory_exercises, accessory_seconds = self._generate_accessory_section(
+            equipment, experience_level, focus_areas, int(time_available * 60 * 0.2)
         )
         
+        strength_time = -(-strength_seconds // 60)
+        accessory_time = -(-accessory_seconds // 60)
+        # Nothing is left for it when strength and accessory work overran
+        metcon_time = max(0, time_available - strength_time - accessory_time)
         metcon_exercises = self._generate_metcon_section(
             equipment, experience_level, focus_areas, metcon_time
         )
         
-        accessory_exercises = self._generate_accessory_section(
-            equipment, experience_level, focus_areas, accessory_time
-        )
-        
         # Create workout plan
         workout = {
+            'id': f"workout_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}",
             'date': datetime.now().strftime("%Y-%m-%d %H:%M"),
             'workout_type': workout_type,
             'goal': goal,
@@ -253,8 +286,13 @@ class WorkoutPlanner:
         return goal_mapping.get(goal, 'metcon')
     
     def _generate_strength_section(self, equipment: List[str], experience_level: str, 
-                                  focus_areas: List[str], available_time: int) -> List[Dict]:
-        """Generate strength exercises."""
+                                  focus_areas: List[str], available_seconds: int) -> Tuple[List[Dict], int]:
+        """
+        Generate strength exercises, with their sets fitted to the time available.
+        
+        Returns:
+            Tuple[List[Dict], int]: Exercises, and the section's length in seconds
+        """
         exercises = []
         available_exercises = []
         
@@ -265,23 +303,29 @@ class WorkoutPlanner:
         if focus_areas:
             muscle_groups = [mg for mg in muscle_groups if mg in focus_areas]
         
-        # Collect available exercises from the flat structure
-        for exercise in self.exercises:
-            if (exercise.get('type') == 'strength' and 
-                exercise.get('muscle_group') in muscle_groups and
-                self._exercise_matches_criteria(exercise, equipment, experience_level)):
+        # Collect available exercises for the targeted muscle groups
+        for exercise in self._candidate_pool('strength', equipment, experience_level):
+            if exercise.get('muscle_group') in muscle_groups:
                 available_exercises.append(exercise)
         
         # Calculate exercises per muscle group
         exercises_per_group = max(1, len(muscle_groups) // 2)
         total_exercises = min(len(available_exercises), exercises_per_group * len(muscle_groups))
         
-        # Select exercises
-        selected_exercises = random.sample(available_exercises, min(total_exercises, len(available_exercises)))
+        # Put the candidates in random order, then fit exercises and sets to the time available
+        candidates = self._draw(available_exercises, len(available_exercises))
+        
+        def plan(exercise: Dict) -> Tuple[int, int]:
+            sets, _ = self._determine_sets_reps(exercise['difficulty'], experience_level)
+            rest_time = self._determine_rest_time(exercise['difficulty'], experience_level)
+            return sets, exercise.get('time_per_set', DEFAULT_SET_SECONDS) + rest_time
+        
+        selected, seconds = fit_section(candidates, available_seconds, plan,
+                                        max_exercises=total_exercises, min_exercises=2)
         
         # Create exercise entries
-        for exercise in selected_exercises:
-            sets, reps = self._determine_sets_reps(exercise['difficulty'], experience_level)
+        for exercise, sets in selected:
+            _, reps = self._determine_sets_reps(exercise['difficulty'], experience_level)
             rest_time = self._determine_rest_time(exercise['difficulty'], experience_level)
             
             exercises.append({
@@ -295,7 +339,7 @@ class WorkoutPlanner:
                 'notes': self._generate_exercise_notes(exercise, sets, reps)
             })
         
-        return exercises
+        return exercises, seconds
     
     def _generate_metcon_section(self, equipment: List[str], experience_level: str, 
                                 focus_areas: List[str], available_time: int) -> List[Dict]:
@@ -311,16 +355,13 @@ class WorkoutPlanner:
             bjj_focuses = [focus for focus in bjj_focuses if focus in focus_areas]
         
         # Collect available metcon exercises
-        for exercise in self.exercises:
-            if (exercise.get('type') in ['conditioning', 'olympic'] and
-                exercise.get('category') in ['metcon', 'explosive', 'functional'] and
-                exercise.get('bjj_focus') in bjj_focuses and
-                self._exercise_matches_criteria(exercise, equipment, experience_level)):
+        for exercise in self._candidate_pool('metcon', equipment, experience_level):
+            if exercise.get('bjj_focus') in bjj_focuses:
                 available_exercises.append(exercise)
         
         # Select 3-5 exercises for metcon
         num_exercises = min(5, max(3, available_time // 5))
-        selected_exercises = random.sample(available_exercises, min(num_exercises, len(available_exercises)))
+        selected_exercises = self._draw(available_exercises, num_exercises)
         
         # Determine workout format
         formats = ['amrap', 'emom', 'fortime']
@@ -366,23 +407,27 @@ class WorkoutPlanner:
         return exercises
     
     def _generate_accessory_section(self, equipment: List[str], experience_level: str, 
-                                    focus_areas: List[str], available_time: int) -> List[Dict]:
-        """Generate accessory exercises for BJJ-specific movements."""
+                                    focus_areas: List[str], available_seconds: int) -> Tuple[List[Dict], int]:
+        """
+        Generate 1-2 accessory exercises for BJJ-specific movements, fitted to the time available.
+        
+        Returns:
+            Tuple[List[Dict], int]: Exercises, and the section's length in seconds
+        """
         exercises = []
-        available_exercises = []
         
-        # Collect accessory exercises (BJJ-specific movements)
-        for exercise in self.exercises:
-            if (exercise.get('category') in ['bodyweight', 'functional'] and
-                exercise.get('bjj_focus') in ['grip_strength', 'core_strength', 'stabilization'] and
-                self._exercise_matches_criteria(exercise, equipment, experience_level)):
-                available_exercises.append(exercise)
+        # Collect accessory exercises (BJJ-specific movements) in random order
+        available_exercises = self._candidate_pool('accessory', equipment, experience_level)
+        candidates = self._draw(available_exercises, len(available_exercises))
         
-        # Select 1-2 accessory exercises
-        selected_exercises = random.sample(available_exercises, min(2, len(available_exercises)))
+        def plan(exercise: Dict) -> Tuple[int, int]:
+            sets, _ = self._determine_skill_reps(exercise, experience_level)
+            return sets, exercise.get('time_per_set', DEFAULT_SET_SECONDS) + ACCESSORY_REST_SECONDS
         
-        for exercise in selected_exercises:
-            sets, reps = self._determine_skill_reps(exercise, experience_level)
+        selected, seconds = fit_section(candidates, available_seconds, plan, max_exercises=2, min_exercises=1)
+        
+        for exercise, sets in selected:
+            _, reps = self._determine_skill_reps(exercise, experience_level)
             exercises.append({
                 'name': exercise['name'],
                 'muscle_group': exercise['muscle_group'],
@@ -395,7 +440,7 @@ class WorkoutPlanner:
                 'notes': f"BJJ-specific: {sets}x{reps}, focus on form"
             })
         
-        return exercises
+        return exercises, seconds
     
     def _generate_steady_cardio(self, available_exercises: List[Dict], 
                               available_time: int, workout_template: Dict) -> List[Dict]:
@@ -403,7 +448,7 @@ class WorkoutPlanner:
         exercises = []
         
         # Select 1-2 cardio exercises
-        selected_exercises = random.sample(available_exercises, min(2, len(available_exercises)))
+        selected_exercises = self._draw(available_exercises, 2)
         
         for exercise in selected_exercises:
             duration = available_time // len(selected_exercises)
@@ -419,6 +464,55 @@ class WorkoutPlanner:
         
         return exercises
     
+    def _draw(self, exercises: List[Dict], k: int) -> List[Dict]:
+        """
+        Draw up to k exercises without replacement, in draw order.
+        
+        Uses the same sampler as the AI planners. This planner learns no
+        scores, so every exercise weighs the same.
+        """
+        return weighted_sample(exercises, [1.0] * len(exercises), k)
+    
+    def warm_candidate_pools(self, preferences: Optional[Dict] = None):
+        """Precompute every section's candidate pool for `preferences`, e.g. before fanning out."""
+        preferences = preferences if preferences is not None else self.user_preferences
+        equipment = preferences.get('equipment', ['bodyweight'])
+        experience_level = preferences.get('experience_level', 'beginner')
+        for section in ('strength', 'metcon', 'accessory'):
+            self._candidate_pool(section, equipment, experience_level)
+    
+    def _candidate_pool(self, section: str, equipment: List[str], experience_level: str) -> List[Dict]:
+        """
+        Return the catalog exercises eligible for a workout section.
+        
+        Pools are cached per (section, equipment, experience level) so repeated
+        and concurrent generation share the filtering work. Callers must not
+        mutate the returned list.
+        """
+        key = (section, frozenset(equipment), experience_level)
+        pool = self._candidate_pools.get(key)
+        if pool is None:
+            if len(self._candidate_pools) >= MAX_CANDIDATE_POOLS:
+                self._candidate_pools.clear()
+            with timed('catalog_filter'):
+                pool = [exercise for exercise in self.exercises
+                        if self._exercise_in_section(exercise, section) and
+                        self._exercise_matches_criteria(exercise, equipment, experience_level)]
+            self._candidate_pools[key] = pool
+        return pool
+    
+    def _exercise_in_section(self, exercise: Dict, section: str) -> bool:
+        """Check if an exercise belongs in a workout section."""
+        if section == 'strength':
+            return exercise.get('type') == 'strength'
+        if section == 'metcon':
+            return (exercise.get('type') in ['conditioning', 'olympic'] and
+                    exercise.get('category') in ['metcon', 'explosive', 'functional'])
+        if section == 'accessory':
+            return (exercise.get('category') in ['bodyweight', 'functional'] and
+                    exercise.get('bjj_focus') in ['grip_strength', 'core_strength', 'stabilization'])
+        return False
+    
     def _exercise_matches_criteria(self, exercise: Dict, equipment: List[str], 
                                  experience_level: str) -> bool:
         """Check if exercise matches user criteria."""
@@ -495,41 +589,24 @@ class WorkoutPlanner:
         
         return cooldown_exercises
     
-    def _calculate_duration(self, exercises: List[Dict], workout_template: Dict) -> int:
-        """Calculate estimated workout duration."""
-        total_time = 0
-        
-        for exercise in exercises:
-            if 'sets' in exercise:
-                # Strength exercise
-                set_time = exercise.get('work_time', 60)  # Default 60 seconds per set
-                rest_time = exercise.get('rest_time', 90)  # Default 90 seconds rest
-                # Ensure rest_time is an integer
-                if isinstance(rest_time, str):
-                    # Try to extract number from string like "60-90 seconds"
-                    numbers = re.findall(r'\d+', rest_time)
-                    rest_time = int(numbers[0]) if numbers else 90
-                total_time += (set_time + rest_time) * exercise['sets']
-            else:
-                # Cardio exercise
-                total_time += exercise.get('duration', 0) * 60  # Convert minutes to seconds
+    @timed_stage('save_workout')
+    def save_workout(self, workout: Dict, filename: str = None) -> str:
+        """
+        Save workout to a JSON file in the workout storage.
         
-        # Add rest between exercises (default 60 seconds)
-        rest_between_exercises = workout_template.get('rest_between_exercises', 60)
-        total_time += rest_between_exercises * (len(exercises) - 1)
+        The file is written in the background; the returned path can be read
+        back immediately through the storage.
         
-        return total_time // 60  # Convert back to minutes
-    
-    def save_workout(self, workout: Dict, filename: str = None):
-        """Save workout to JSON file."""
+        Returns:
+            str: Path the workout is saved under
+        """
         if not filename:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             filename = f"workout_{timestamp}.json"
         
-        with open(filename, 'w') as f:
-            json.dump(workout, f, indent=2)
-        
-        logger.info(f"Workout saved to {filename}")
+        path = self.storage.save(workout, filename)
+        logger.info(f"Workout saved to {path}")
+        return path
     
     def print_workout(self, workout: Dict):
         """Print workout in a readable format."""
@@ -636,16 +713,13 @@ class WorkoutPlanner:
             bjj_focuses = [focus for focus in bjj_focuses if focus in focus_areas]
         
         # Collect available metcon exercises
-        for exercise in self.exercises:
-            if (exercise.get('type') in ['conditioning', 'olympic'] and
-                exercise.get('category') in ['metcon', 'explosive', 'functional'] and
-                exercise.get('bjj_focus') in bjj_focuses and
-                self._exercise_matches_criteria(exercise, equipment, experience_level)):
+        for exercise in self._candidate_pool('metcon', equipment, experience_level):
+            if exercise.get('bjj_focus') in bjj_focuses:
                 available_exercises.append(exercise)
         
         # Select 3-5 exercises for metcon
         num_exercises = min(5, max(3, available_time // 5))
-        selected_exercises = random.sample(available_exercises, min(num_exercises, len(available_exercises)))
+        selected_exercises = self._draw(available_exercises, num_exercises)
         
         # Determine workout format
         formats = ['amrap', 'emom', 'fortime']
@@ -704,7 +778,7 @@ class WorkoutPlanner:
                 available_exercises.append(exercise)
         
         # Select 1-2 endurance exercises
-        selected_exercises = random.sample(available_exercises, min(2, len(available_exercises)))
+        selected_exercises = self._draw(available_exercises, 2)
         
         for exercise in selected_exercises:
             duration = available_time // len(selected_exercises)
@@ -734,7 +808,7 @@ class WorkoutPlanner:
                 available_exercises.append(exercise)
         
         # Select 2-3 skill exercises
-        selected_exercises = random.sample(available_exercises, min(3, len(available_exercises)))
+        selected_exercises = self._draw(available_exercises, 3)
         
         for exercise in selected_exercises:
             sets, reps = self._determine_skill_reps(exercise, experience_level)
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Workout Storage
+
+File storage for saved workouts and weekly plans. Files are written as
+compact JSON under a configurable root, sharded into YYYY/MM/DD directories,
+by a background writer thread fed from a bounded queue, so the request path
+only pays for an enqueue. Old day shards can be compacted into a single
+gzipped JSON-lines archive and eventually deleted.
+
+Configuration (environment):
+    WORKOUT_STORAGE_ROOT          Root directory (default: saved_workouts)
+    WORKOUT_COMPACT_AFTER_DAYS    Compact day shards older than this
+    WORKOUT_RETENTION_DAYS        Delete day shards older than this
+"""
+
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+import atexit
+import gzip
+import json
+import logging
+import os
+import queue
+import shutil
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STORAGE_ROOT = 'saved_workouts'
+
+# Pending writes allowed before save() blocks the caller
+DEFAULT_MAX_PENDING = 256
+
+# Seconds between retention/compaction passes of the writer thread
+MAINTENANCE_INTERVAL = 3600
+
+ARCHIVE_SUFFIX = '.jsonl.gz'
+
+_STOP = object()
+
+
+def _env_days(name: str) -> Optional[int]:
+    value = os.environ.get(name)
+    return int(value) if value else None
+
+
+class WorkoutStorage:
+    """Date-sharded JSON file storage with a background writer."""
+
+    def __init__(self, root: str = DEFAULT_STORAGE_ROOT, max_pending: int = DEFAULT_MAX_PENDING,
+                 retention_days: Optional[int] = None, compact_after_days: Optional[int] = None,
+                 on_remove: Optional[Callable[[List[str]], None]] = None):
+        """
+        Initialize the storage. The writer thread starts on the first save.
+
+        Args:
+            root (str): Root directory for day shards
+            max_pending (int): Bound on queued writes; save() blocks when full
+            retention_days (int): Delete shards older than this many days
+            compact_after_days (int): Archive shards older than this many days
+            on_remove (Callable): Called with the paths of deleted files
+        """
+        self.root = root
+        self.retention_days = retention_days
+        self.compact_after_days = compact_after_days
+        self.on_remove = on_remove
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._writer = None
+        self._flush_at_exit = False
+        self._last_maintenance = 0.0
+        self.metrics = {'written': 0, 'failed': 0, 'compacted': 0, 'deleted': 0}
+
+    def path_for(self, filename: str, when: Optional[datetime] = None) -> str:
+        """Return the sharded path a file saved at `when` is stored under."""
+        when = when or datetime.now()
+        return os.path.join(self.root, when.strftime('%Y'), when.strftime('%m'), when.strftime('%d'),
+                            os.path.basename(filename))
+
+    def _start(self):
+        with self._lock:
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(target=self._run, name='workout-writer', daemon=True)
+                self._writer.start()
+                if not self._flush_at_exit:
+                    atexit.register(self.flush)
+                    self._flush_at_exit = True
+
+    def save(self, data: Dict, filename: str) -> str:
+        """
+        Queue `data` to be written under today's shard.
+
+        Blocks while the write queue is full, which applies backpressure to
+        callers when the disk falls behind.
+
+        Args:
+            data (Dict): JSON-serializable workout or plan
+            filename (str): File name (any directory part is ignored)
+
+        Returns:
+            str: Path the file will be written to
+        """
+        path = self.path_for(filename)
+        self._start()
+        with self._lock:
+            self._pending[path] = data
+        self._queue.put((path, data))
+        return path
+
+    def load(self, path: str) -> Dict:
+        """
+        Read a saved file, including ones still queued or already compacted.
+
+        Raises:
+            FileNotFoundError: If the file does not exist
+        """
+        with self._lock:
+            if path in self._pending:
+                return self._pending[path]
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                return json.load(f)
+        archive = os.path.dirname(path) + ARCHIVE_SUFFIX
+        if os.path.exists(archive):
+            name = os.path.basename(path)
+            with gzip.open(archive, 'rt') as f:
+                for line in f:
+                    record = json.loads(line)
+                    if record['filename'] == name:
+                        return record['data']
+        raise FileNotFoundError(path)
+
+    def flush(self):
+        """Wait until every queued write has reached disk."""
+        if self._writer is not None and self._writer.is_alive():
+            self._queue.join()
+
+    def stop(self):
+        """Flush pending writes and stop the writer thread."""
+        if self._writer is not None and self._writer.is_alive():
+            self._queue.put(_STOP)
+            self._writer.join()
+        self._writer = None
+
+    @property
+    def pending(self) -> int:
+        """Number of writes waiting in the queue."""
+        return self._queue.qsize()
+
+    def _write(self, path: str, data: Dict):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(data, f, separators=(',', ':'))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+
+    def _run(self):
+        """Writer loop: drain the queue, then run maintenance when idle."""
+        while True:
+            try:
+                item = self._queue.get(timeout=1.0)
+            except queue.Empty:
+                self._maybe_maintain()
+                continue
+            try:
+                if item is _STOP:
+                    return
+                path, data = item
+                try:
+                    self._write(path, data)
+                    self.metrics['written'] += 1
+                except (OSError, TypeError, ValueError) as e:
+                    self.metrics['failed'] += 1
+                    logger.error(f"Error writing workout file {path}: {e}")
+                with self._lock:
+                    if self._pending.get(path) is data:
+                        del self._pending[path]
+            finally:
+                self._queue.task_done()
+
+    def _maybe_maintain(self):
+        if self.retention_days is None and self.compact_after_days is None:
+            return
+        if time.time() - self._last_maintenance < MAINTENANCE_INTERVAL:
+            return
+        self._last_maintenance = time.time()
+        try:
+            self.apply_retention()
+        except OSError as e:
+            logger.error(f"Error applying workout storage retention: {e}")
+
+    def _day_shards(self):
+        """Yield (date, path, is_archive) for every day shard under the root."""
+        if not os.path.isdir(self.root):
+            return
+        for year in sorted(os.listdir(self.root)):
+            year_dir = os.path.join(self.root, year)
+            if not year.isdigit() or not os.path.isdir(year_dir):
+                continue
+            for month in sorted(os.listdir(year_dir)):
+                month_dir = os.path.join(year_dir, month)
+                if not month.isdigit() or not os.path.isdir(month_dir):
+                    continue
+                for day in sorted(os.listdir(month_dir)):
+                    is_archive = day.endswith(ARCHIVE_SUFFIX)
+                    label = day[:-len(ARCHIVE_SUFFIX)] if is_archive else day
+                    try:
+                        date = datetime(int(year), int(month), int(label))
+                    except ValueError:
+                        continue
+                    yield date, os.path.join(month_dir, day), is_archive
+
+    def _compact(self, shard: str):
+        """Fold a day directory into a gzipped JSON-lines archive."""
+        names = sorted(name for name in os.listdir(shard) if name.endswith('.json'))
+        with gzip.open(shard + ARCHIVE_SUFFIX, 'at') as archive:
+            for name in names:
+                with open(os.path.join(shard, name), 'r') as f:
+                    record = {'filename': name, 'data': json.load(f)}
+                archive.write(json.dumps(record, separators=(',', ':')) + '\n')
+        shutil.rmtree(shard)
+        self.metrics['compacted'] += len(names)
+
+    def apply_retention(self, now: Optional[datetime] = None) -> List[str]:
+        """
+        Compact and delete old day shards according to the configured limits.
+
+        Today's shard is never touched, so in-flight writes are unaffected.
+
+        Returns:
+            List[str]: Paths of deleted workout files
+        """
+        now = now or datetime.now()
+        today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        removed = []
+        for date, shard, is_archive in list(self._day_shards()):
+            age = today - date
+            if age <= timedelta(0):
+                continue
+            if self.retention_days is not None and age > timedelta(days=self.retention_days):
+                directory = shard[:-len(ARCHIVE_SUFFIX)] if is_archive else shard
+                if is_archive:
+                    with gzip.open(shard, 'rt') as f:
+                        removed.extend(os.path.join(directory, json.loads(line)['filename']) for line in f)
+                    os.remove(shard)
+                else:
+                    removed.extend(os.path.join(directory, name) for name in os.listdir(shard))
+                    shutil.rmtree(shard)
+            elif (not is_archive and self.compact_after_days is not None and
+                  age > timedelta(days=self.compact_after_days)):
+                self._compact(shard)
+        if removed:
+            self.metrics['deleted'] += len(removed)
+            logger.info(f"Deleted {len(removed)} workout file(s) past retention")
+            if self.on_remove is not None:
+                self.on_remove(removed)
+        return removed
+
+
+_default_storage = None
+_default_lock = threading.Lock()
+
+
+def default_storage() -> WorkoutStorage:
+    """Return the process-wide storage configured from the environment."""
+    global _default_storage
+    with _default_lock:
+        if _default_storage is None:
+            _default_storage = WorkoutStorage(
+                root=os.environ.get('WORKOUT_STORAGE_ROOT', DEFAULT_STORAGE_ROOT),
+                retention_days=_env_days('WORKOUT_RETENTION_DAYS'),
+                compact_after_days=_env_days('WORKOUT_COMPACT_AFTER_DAYS')
+            )
+        return _default_storage
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Workout Store
+
+Server-side storage for generated workouts, keyed by workout ID. Workouts
+are kept in a local SQLite table so the session only needs to carry the ID,
+with a small in-memory LRU cache in front for the common case of reading
+back a workout that was just generated. Workouts not written for longer
+than the retention period are deleted, at most once an hour, as new ones
+are stored.
+
+Configuration (environment):
+    WORKOUT_STORE_RETENTION_DAYS  Default retention (days; 0 keeps everything)
+"""
+
+from collections import OrderedDict
+from typing import Dict, Optional
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STORE_PATH = 'workouts.db'
+
+# Number of parsed workouts kept in memory
+DEFAULT_CACHE_SIZE = 256
+
+# Days a workout is kept after it was last written
+DEFAULT_RETENTION_DAYS = int(os.environ.get('WORKOUT_STORE_RETENTION_DAYS', 30))
+
+# Seconds between retention passes
+PRUNE_INTERVAL = 3600
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS workouts (
+    id TEXT PRIMARY KEY,
+    created_at REAL NOT NULL,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS workouts_created_at ON workouts (created_at);
+"""
+
+
+class VersionConflict(Exception):
+    """Raised when a conditional put finds the item changed since it was read."""
+
+    def __init__(self, item_id: str, expected_version: int):
+        super().__init__(f"{item_id} changed since version {expected_version} was read")
+        self.item_id = item_id
+        self.expected_version = expected_version
+
+
+class WorkoutStore:
+    """SQLite-backed workout store with a read-through LRU cache."""
+
+    def __init__(self, path: str = DEFAULT_STORE_PATH, cache_size: int = DEFAULT_CACHE_SIZE,
+                 retention_days: Optional[int] = DEFAULT_RETENTION_DAYS):
+        """
+        Initialize the store. The database is opened on first use.
+
+        Args:
+            path (str): SQLite database file
+            cache_size (int): Maximum number of workouts cached in memory
+            retention_days (int): Delete workouts not written for this many
+                days (None or 0 keeps them forever)
+        """
+        self.path = path
+        self.cache_size = cache_size
+        self.retention_days = retention_days or None
+        self._cache = OrderedDict()
+        self._conn = None
+        self._lock = threading.Lock()
+        self._last_prune = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.pruned = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+            self._conn.executescript(SCHEMA)
+        return self._conn
+
+    def _remember(self, workout_id: str, workout: Dict):
+        self._cache[workout_id] = workout
+        self._cache.move_to_end(workout_id)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def put(self, workout: Dict, expected_version: Optional[int] = None) -> str:
+        """
+        Store a workout under its 'id'.
+
+        Args:
+            workout (Dict): Item to store
+            expected_version (int): Only replace the stored item if its
+                'version' (0 when absent) still equals this; the caller
+                stores the next version in `workout`
+
+        Returns:
+            str: The workout ID
+
+        Raises:
+            ValueError: If the workout has no ID
+            VersionConflict: If the stored item is missing or has another
+                version; every process then rereads it from the database
+        """
+        workout_id = workout.get('id')
+        if not workout_id:
+            raise ValueError("workout has no 'id'")
+        with self._lock:
+            if expected_version is None:
+                self._connection().execute(
+                    'INSERT OR REPLACE INTO workouts (id, created_at, payload) VALUES (?, ?, ?)',
+                    (workout_id, time.time(), json.dumps(workout))
+                )
+            else:
+                # Compared and written in one statement, so it holds across processes
+                cursor = self._connection().execute(
+                    "UPDATE workouts SET created_at = ?, payload = ? "
+                    "WHERE id = ? AND COALESCE(json_extract(payload, '$.version'), 0) = ?",
+                    (time.time(), json.dumps(workout), workout_id, expected_version)
+                )
+                if cursor.rowcount == 0:
+                    self._cache.pop(workout_id, None)
+                    raise VersionConflict(workout_id, expected_version)
+            self._remember(workout_id, workout)
+            if self.retention_days is not None and time.time() - self._last_prune >= PRUNE_INTERVAL:
+                self._prune(time.time())
+        return workout_id
+
+    def prune(self, now: Optional[float] = None) -> int:
+        """
+        Delete workouts not written for longer than the retention period.
+
+        Args:
+            now (float): Current time in epoch seconds (defaults to the clock)
+
+        Returns:
+            int: Number of workouts deleted
+        """
+        if self.retention_days is None:
+            return 0
+        with self._lock:
+            return self._prune(now if now is not None else time.time())
+
+    def _prune(self, now: float) -> int:
+        self._last_prune = now
+        cutoff = now - self.retention_days * 86400
+        conn = self._connection()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            expired = [row[0] for row in conn.execute('SELECT id FROM workouts WHERE created_at < ?', (cutoff,))]
+            conn.execute('DELETE FROM workouts WHERE created_at < ?', (cutoff,))
+            conn.execute('COMMIT')
+        except sqlite3.Error as e:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            logger.error(f"Error pruning workout store {self.path}: {e}")
+            return 0
+        for workout_id in expired:
+            self._cache.pop(workout_id, None)
+        if expired:
+            self.pruned += len(expired)
+            logger.info(f"Deleted {len(expired)} workout(s) past retention from {self.path}")
+        return len(expired)
+
+    def get(self, workout_id: Optional[str]) -> Optional[Dict]:
+        """Return the workout with the given ID, or None if it is unknown."""
+        if not workout_id:
+            return None
+        with self._lock:
+            workout = self._cache.get(workout_id)
+            if workout is not None:
+                self._cache.move_to_end(workout_id)
+                self.hits += 1
+                return workout
+            self.misses += 1
+            row = self._connection().execute(
+                'SELECT payload FROM workouts WHERE id = ?', (workout_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            workout = json.loads(row[0])
+            self._remember(workout_id, workout)
+            return workout
+
+    def __contains__(self, workout_id: str) -> bool:
+        return self.get(workout_id) is not None